@@ -5,6 +5,9 @@ Usage:
     python manage.py backtest
     python manage.py tune --buy 0.3 0.4 --sell -0.3 -0.4
     python manage.py dashboard
+    python manage.py live --replay candles.csv
+    python manage.py --import-profile run          # run the command and report time spent importing
+    python manage.py --import-budget 300 run       # exit 1 if importing the command module takes > 300ms
 """
 
 import sys
@@ -15,12 +18,85 @@ ROOT = Path(__file__).resolve().parent
 sys.path.append(str(ROOT / "src"))
 
 
+def parse_importtime(stderr: str, module: str | None = None) -> tuple[float, dict[str, float], list[str]]:
+    """Parse ``python -X importtime`` output.
+
+    Returns the cumulative import time of ``module`` (or of every import when None), the self time
+    per top-level package, both in milliseconds, and the remaining non-timing stderr lines.
+    """
+    total_ms, by_package, other = 0.0, {}, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            other.append(line)
+            continue
+        if "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        by_package[package] = by_package.get(package, 0.0) + int(self_us) / 1000
+        if module is None:
+            total_ms += int(self_us) / 1000
+        elif name.strip() == module:
+            total_ms = int(cumulative_us) / 1000
+    return total_ms, by_package, other
+
+
+def import_profile(args: list[str], top: int = 15):
+    """Run the command in a child interpreter under ``-X importtime`` and report where import time went."""
+    import subprocess
+    import time
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", __file__, *args], stderr=subprocess.PIPE, text=True)
+    wall_ms = (time.perf_counter() - t0) * 1000
+    total_ms, by_package, other = parse_importtime(proc.stderr)
+    if other:
+        print("\n".join(other), file=sys.stderr)
+    print(f"\nImport profile for '{' '.join(args)}': {total_ms:.1f} ms of {wall_ms:.1f} ms wall time spent importing")
+    for package, ms in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {package:<28} {ms:8.1f} ms")
+    sys.exit(proc.returncode)
+
+
+def command_import_ms(command_name: str) -> float:
+    """Cumulative time to import ``commands.<name>`` in a fresh interpreter."""
+    import subprocess
+    code = f"import sys; sys.path.append({str(ROOT / 'src')!r}); import commands.{command_name}"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr.strip().splitlines()[-1])
+        sys.exit(1)
+    return parse_importtime(proc.stderr, f"commands.{command_name}")[0]
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python manage.py <command> [args]")
+    args = sys.argv[1:]
+    profile, budget_ms = False, None
+    while args and args[0].startswith("--"):
+        opt = args.pop(0)
+        if opt == "--import-profile":
+            profile = True
+        elif opt == "--import-budget" and args:
+            budget_ms = float(args.pop(0))
+        else:
+            print(f"Unknown option: {opt}")
+            sys.exit(1)
+
+    if not args:
+        print("Usage: python manage.py [--import-profile] [--import-budget MS] <command> [args]")
         sys.exit(1)
 
-    command_name = sys.argv[1]
+    command_name = args[0]
+    if budget_ms is not None:
+        import_ms = command_import_ms(command_name)
+        if import_ms > budget_ms:
+            print(f"commands.{command_name} import took {import_ms:.1f} ms, over the {budget_ms:.0f} ms budget")
+            sys.exit(1)
+        print(f"commands.{command_name} import took {import_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+        if not profile:
+            return
+    if profile:
+        import_profile(args)
+
     try:
         module = importlib.import_module(f"commands.{command_name}")
     except ModuleNotFoundError:
@@ -33,7 +109,7 @@ def main():
         sys.exit(1)
 
     cmd = command()
-    cmd.run(sys.argv[2:])
+    cmd.run(args[1:])
 
 
 if __name__ == "__main__":
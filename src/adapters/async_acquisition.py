@@ -0,0 +1,147 @@
+import asyncio
+from typing import Optional
+import aiohttp
+import ccxt
+import ccxt.async_support as ccxt_async
+import pandas as pd
+
+from src.adapters.candle_store import CandleStore
+from src.adapters.exchange_ccxt import CCXTClient, OHLCVPager, StoreRead
+from src.adapters.sentiment_cache import SentimentCache
+from src.adapters import sentiment_providers as sp
+from src.utils.timeframes import timeframe_to_ms
+
+DEFAULT_URLS = sp.URLS
+
+
+class AsyncCCXTClient:
+    """``CCXTClient`` on ``ccxt.async_support``: same paging and candle-store semantics, awaitable.
+
+    One instance shares its exchange connection pool and rate limiter across every concurrent
+    ``fetch_ohlcv_df`` call, so gathering several timeframes stays within the exchange limit.
+    """
+
+    def __init__(self, exchange_name: str, api_key: Optional[str] = None, secret: Optional[str] = None,
+                 market_type: str = "spot", store: Optional[CandleStore] = None, offline: bool = False):
+        self.exchange_name = exchange_name
+        self.market_type = market_type
+        self.store = store
+        self.offline = offline
+        ex_cls = getattr(ccxt_async, exchange_name)
+        self.ex = ex_cls({
+            "apiKey": api_key or "",
+            "secret": secret or "",
+            "enableRateLimit": True,
+        })
+        if exchange_name == "binance":
+            self.ex.options["defaultType"] = "future" if market_type.lower().startswith("future") else "spot"
+
+    async def close(self):
+        await self.ex.close()
+
+    async def _fetch_range(self, symbol: str, timeframe: str, since_ms: int, until_ms: Optional[int] = None,
+                           limit: int = 1000, max_rows: Optional[int] = None) -> list:
+        pager = OHLCVPager(since_ms, until_ms, max_rows)
+        while pager.add(await self.ex.fetch_ohlcv(symbol, timeframe=timeframe, since=pager.since_ms, limit=limit)):
+            pass
+        return pager.rows
+
+    async def fetch_ohlcv_df(self, symbol: str, timeframe: str, since_ms: Optional[int] = None, limit: int = 1000,
+                             lookback_bars: int = 1500) -> pd.DataFrame:
+        if self.store is None:
+            if since_ms is None:
+                since_ms = self.ex.milliseconds() - (lookback_bars + 5) * timeframe_to_ms(timeframe)
+            rows = await self._fetch_range(symbol, timeframe, since_ms, limit=limit, max_rows=lookback_bars)
+            if not rows:
+                raise RuntimeError("No OHLCV data returned")
+            return CCXTClient._rows_to_df(rows)
+
+        read = StoreRead(self, symbol, timeframe, since_ms, lookback_bars)
+        rows = []
+        try:
+            # The missing head, gaps and tail of one window are fetched concurrently too.
+            batches = await asyncio.gather(*[
+                self._fetch_range(symbol, timeframe, since, until_ms=until, limit=limit)
+                for since, until in read.ranges
+            ])
+            rows = [r for batch in batches for r in batch]
+        except ccxt.NetworkError as exc:
+            read.network_error(exc)
+        return read.finish(rows)
+
+
+async def _get_json(session: aiohttp.ClientSession, url: str, params: dict):
+    try:
+        async with session.get(url, params=params) as r:
+            if r.status == 200:
+                return await r.json(content_type=None)
+    except Exception:
+        pass
+    return None
+
+
+async def acquire_async(client: AsyncCCXTClient, symbol: str, requests: list[tuple[str, int]], api_mode: str = "live",
+                        *, use_fear_greed: bool = True, use_funding: bool = True, use_news: bool = True,
+                        urls: dict | None = None, max_connections: int = 10, timeout: float = 10.0,
+                        cache: SentimentCache | None = None):
+    """Fetch every ``(timeframe, lookback_bars)`` OHLCV request and the raw sentiment JSON concurrently.
+
+    Returns ``(frames, raw)``: one DataFrame per request (in order) and the raw provider payloads
+    keyed by source (``None`` where a request failed). Sentiment is only requested in live mode,
+    and not at all for sources whose ``cache`` entry is still fresh.
+    """
+    urls = {**DEFAULT_URLS, **(urls or {})}
+    connector = aiohttp.TCPConnector(limit=max_connections)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        raw_jobs = {}
+        enabled = {"fear_greed": use_fear_greed, "funding": use_funding, "news": use_news}
+        for name in (n for n, on in enabled.items() if on):
+            params = sp.pending_request(name, symbol, api_mode, cache)
+            if params is not None:
+                raw_jobs[name] = _get_json(session, urls[name], params)
+        try:
+            results = await asyncio.gather(
+                *[client.fetch_ohlcv_df(symbol, tf, lookback_bars=n) for tf, n in requests],
+                *raw_jobs.values(),
+            )
+        finally:
+            await client.close()
+    return list(results[:len(requests)]), dict(zip(raw_jobs, results[len(requests):]))
+
+
+def sentiment_from_raw(raw: dict, symbol: str, index: pd.DatetimeIndex, api_mode: str = "live", *,
+                       use_fear_greed: bool = True, use_funding: bool = True, use_news: bool = True,
+                       cache: SentimentCache | None = None, report: dict | None = None) -> pd.Series:
+    """Build the combined sentiment from raw payloads, falling back to the cache or simulation."""
+    enabled = {"fear_greed": use_fear_greed, "funding": use_funding, "news": use_news}
+    components = [
+        (name, sp.resolve_source(name, symbol, index, api_mode, raw.get(name), cache, report))
+        for name, on in enabled.items() if on
+    ]
+    return sp.combine_sentiment(components, index)
+
+
+def acquire(cfg: dict, symbol: str, requests: list[tuple[str, int]], api_mode: str,
+            store: Optional[CandleStore] = None, offline: bool = False,
+            sentiment_cache: SentimentCache | None = None, report: dict | None = None,
+            sentiment_bars: int | None = None):
+    """Blocking entry point: returns the OHLCV frames (in request order) and the sentiment on the last
+    one, or on its last ``sentiment_bars`` bars when the caller keeps only those."""
+    acq_cfg = cfg.get('acquisition', {})
+    sent_cfg = cfg.get('sentiment', {})
+    flags = dict(
+        use_fear_greed=sent_cfg.get('use_fear_greed', True),
+        use_funding=sent_cfg.get('use_funding', True),
+        use_news=sent_cfg.get('use_news', True),
+    )
+
+    async def run():
+        client = AsyncCCXTClient(cfg['exchange'], market_type=cfg['market_type'], store=store, offline=offline)
+        return await acquire_async(client, symbol, requests, api_mode, urls=acq_cfg.get('urls'),
+                                   max_connections=acq_cfg.get('max_connections', 10),
+                                   cache=sentiment_cache, **flags)
+
+    frames, raw = asyncio.run(run())
+    index = frames[-1].index if sentiment_bars is None else frames[-1].index[-sentiment_bars:]
+    sent = sentiment_from_raw(raw, symbol, index, api_mode, cache=sentiment_cache, report=report, **flags)
+    return frames, sent
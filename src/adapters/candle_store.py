@@ -0,0 +1,165 @@
+import json
+import os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from ..utils.io import ensure_parents, save_parquet, load_parquet
+from ..utils.timeframes import timeframe_to_ms
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+# Row groups bound how much ``iter_blocks`` has to decode at once.
+ROW_GROUP_ROWS = 65_536
+
+
+def _safe_part(value: str) -> str:
+    return value.replace("/", "-").replace(":", "_")
+
+
+def _coalesce(ranges) -> list[tuple[int, int]]:
+    """Sorted ``[start, end)`` ranges with overlapping or touching ones joined."""
+    out: list[tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if out and start <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], end))
+        else:
+            out.append((start, end))
+    return out
+
+
+def _subtract(ranges, known) -> list[tuple[int, int]]:
+    """The parts of each ``[start, end)`` range outside the sorted, disjoint ``known`` ranges."""
+    out = []
+    for start, end in ranges:
+        for k_start, k_end in known:
+            if k_end <= start or k_start >= end:
+                continue
+            if k_start > start:
+                out.append((start, k_start))
+            start = max(start, k_end)
+        if start < end:
+            out.append((start, end))
+    return out
+
+
+class CandleStore:
+    """Local Parquet store of OHLCV candles, one file per exchange/market_type/symbol/timeframe.
+
+    Frames are indexed by bar open time (naive UTC, as returned by ``CCXTClient``) and are
+    always kept sorted and de-duplicated, the most recently written copy of a bar winning.
+
+    Next to each file a small ``<timeframe>.empty.json`` lists the past ranges the exchange
+    returned no bars for (before the listing, outages), so they are not requested on every run.
+    Delete it to have them fetched again.
+    """
+
+    def __init__(self, root: Path | str = "data/candles"):
+        self.root = Path(root)
+
+    def path_for(self, exchange: str, market_type: str, symbol: str, timeframe: str) -> Path:
+        return self.root / _safe_part(exchange) / _safe_part(market_type) / _safe_part(symbol) / f"{timeframe}.parquet"
+
+    def load(self, exchange: str, market_type: str, symbol: str, timeframe: str) -> pd.DataFrame:
+        path = self.path_for(exchange, market_type, symbol, timeframe)
+        if not path.exists():
+            return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="timestamp"), dtype=float)
+        return load_parquet(path)
+
+    def empty_path_for(self, exchange: str, market_type: str, symbol: str, timeframe: str) -> Path:
+        return self.path_for(exchange, market_type, symbol, timeframe).with_name(f"{timeframe}.empty.json")
+
+    def load_empty(self, exchange: str, market_type: str, symbol: str, timeframe: str) -> list[tuple[int, int]]:
+        """The ``[start, end)`` millisecond ranges known to hold no bars."""
+        path = self.empty_path_for(exchange, market_type, symbol, timeframe)
+        if not path.exists():
+            return []
+        return [(int(start), int(end)) for start, end in json.loads(path.read_text())]
+
+    def record_empty(self, exchange: str, market_type: str, symbol: str, timeframe: str,
+                     ranges: list[tuple[int, int]], fetched_ms) -> list[tuple[int, int]]:
+        """Note the parts of the fetched ``[start, end)`` ranges that hold none of the ``fetched_ms``
+        bar open times as empty, and return all known empty ranges.
+
+        Only pass ranges that lie in the past and were fetched in full: a bar the exchange did not
+        return there will not appear later.
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        ts = np.unique(np.asarray(fetched_ms, dtype=np.int64))
+        new = []
+        for start, end in ranges:
+            inside = ts[(ts >= start) & (ts < end)]
+            new += [(int(a), int(b)) for a, b in zip(np.r_[start, inside + tf_ms], np.r_[inside, end]) if b > a]
+        known = self.load_empty(exchange, market_type, symbol, timeframe)
+        if not new:
+            return known
+        known = _coalesce(known + new)
+        # Write then rename, as save_parquet does.
+        path = self.empty_path_for(exchange, market_type, symbol, timeframe)
+        ensure_parents(path)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(known))
+        os.replace(tmp, path)
+        return known
+
+    def load_ranges(self, exchange: str, market_type: str, symbol: str, timeframe: str,
+                    ranges: list[tuple[int, int]]) -> pd.DataFrame:
+        """The stored candles within any of the ``[start, end)`` millisecond ranges.
+
+        Filters are pushed down to Parquet, so row groups outside every range are never decoded.
+        """
+        path = self.path_for(exchange, market_type, symbol, timeframe)
+        if not path.exists() or not ranges:
+            return self.load(exchange, market_type, symbol, timeframe).iloc[:0]
+        filters = [[("timestamp", ">=", pd.Timestamp(start, unit="ms")), ("timestamp", "<", pd.Timestamp(end, unit="ms"))]
+                   for start, end in ranges]
+        return pd.read_parquet(path, filters=filters)[OHLCV_COLUMNS]
+
+    def merge(self, exchange: str, market_type: str, symbol: str, timeframe: str,
+              new: pd.DataFrame) -> pd.DataFrame:
+        cached = self.load(exchange, market_type, symbol, timeframe)
+        if new is None or new.empty:
+            return cached
+        merged = pd.concat([cached, new[OHLCV_COLUMNS]]) if not cached.empty else new[OHLCV_COLUMNS]
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        merged.index.name = "timestamp"
+        save_parquet(merged, self.path_for(exchange, market_type, symbol, timeframe), row_group_size=ROW_GROUP_ROWS)
+        return merged
+
+    def iter_blocks(self, exchange: str, market_type: str, symbol: str, timeframe: str,
+                    block_rows: int = 262_144):
+        """Yield the stored candles as consecutive frames of at most ``block_rows`` bars.
+
+        Batches are read straight from the Parquet file, so the whole history is never loaded.
+        """
+        import pyarrow.parquet as pq
+        path = self.path_for(exchange, market_type, symbol, timeframe)
+        if not path.exists():
+            return
+        # pre_buffer would keep every column chunk read so far cached until the file is closed.
+        for batch in pq.ParquetFile(path, pre_buffer=False).iter_batches(batch_size=block_rows):
+            df = batch.to_pandas()
+            if "timestamp" in df.columns:
+                df = df.set_index("timestamp")
+            yield df[OHLCV_COLUMNS]
+
+    def missing_ranges(self, cached: pd.DataFrame, timeframe_ms: int, since_ms: int, until_ms: int,
+                       empty: list[tuple[int, int]] = ()) -> list[tuple[int, int]]:
+        """Return the ``[start, end)`` millisecond ranges of ``[since_ms, until_ms)`` not covered by ``cached``.
+
+        The last cached bar is always treated as missing because it may have been stored while
+        it was still forming. The head and gaps leave out the ``empty`` ranges (see
+        ``load_empty``); the tail, from the last cached bar on, is always the last range.
+        """
+        if cached.empty:
+            return [(since_ms, until_ms)]
+        ts = cached.index.as_unit("ms").asi8
+        ts = ts[ts >= since_ms - timeframe_ms]
+        if len(ts) == 0:
+            return [(since_ms, until_ms)]
+        ranges = []
+        if ts[0] > since_ms:
+            ranges.append((since_ms, int(ts[0])))
+        gaps = (ts[1:] - ts[:-1]) > timeframe_ms
+        for prev, nxt in zip(ts[:-1][gaps], ts[1:][gaps]):
+            ranges.append((int(prev) + timeframe_ms, int(nxt)))
+        return _subtract(ranges, _coalesce(empty)) + [(int(ts[-1]), until_ms)]
@@ -1,42 +1,192 @@
-import ccxt
+import time
 import pandas as pd
 from typing import Optional
+from loguru import logger as log
 from ..utils.timeframes import timeframe_to_ms
+from .candle_store import CandleStore
 
-class CCXTClient:
-    def __init__(self, exchange_name: str, api_key: Optional[str] = None, secret: Optional[str] = None, market_type: str = "spot"):
-        ex_cls = getattr(ccxt, exchange_name)
-        self.ex = ex_cls({
-            "apiKey": api_key or "",
-            "secret": secret or "",
-            "enableRateLimit": True,
-        })
-        if exchange_name == "binance":
-            if market_type.lower().startswith("future"):
-                self.ex.options["defaultType"] = "future"
-            else:
-                self.ex.options["defaultType"] = "spot"
+class OHLCVPager:
+    """Paging state of one ``fetch_ohlcv`` walk from ``since_ms``, shared by the sync and async clients.
 
-    def fetch_ohlcv_df(self, symbol: str, timeframe: str, since_ms: Optional[int] = None, limit: int = 1000, lookback_bars: int = 1500) -> pd.DataFrame:
-        all_rows = []
+    Feed each page to ``add`` and request the next one from ``since_ms`` while it returns True:
+    paging stops at an empty page, after ``max_rows`` rows or once a page reaches ``until_ms``.
+    """
+
+    def __init__(self, since_ms: int, until_ms: Optional[int] = None, max_rows: Optional[int] = None):
+        self.since_ms = since_ms
+        self.until_ms = until_ms
+        self.max_rows = max_rows
+        self.rows: list = []
+
+    def add(self, batch: list) -> bool:
+        if not batch:
+            return False
+        self.rows += batch
+        last_ts = batch[-1][0]
+        self.since_ms = last_ts + 1
+        if self.max_rows is not None and len(self.rows) >= self.max_rows:
+            return False
+        return self.until_ms is None or last_ts < self.until_ms
+
+
+class StoreRead:
+    """One ``fetch_ohlcv_df`` call served through the client's ``CandleStore``; shared by the sync and
+    async clients so both fetch the same ranges, merge the same way and fall back alike.
+
+    ``ranges`` are the ``(since_ms, until_ms)`` pages still to fetch (none for offline clients),
+    leaving out ranges the store knows to be empty. ``finish`` merges the fetched rows into the
+    store, records what the exchange left empty before the newest bar it returned, and returns
+    the requested window; ``network_error`` re-raises unless there are cached candles to fall
+    back to.
+    """
+
+    def __init__(self, client, symbol: str, timeframe: str, since_ms: Optional[int], lookback_bars: int):
+        self.store = client.store
+        self.key = (client.exchange_name, client.market_type, symbol, timeframe)
+        self.cached = self.store.load(*self.key)
         tf_ms = timeframe_to_ms(timeframe)
+        now_ms = int(time.time() * 1000)
         if since_ms is None:
-            now = self.ex.milliseconds()
-            since_ms = now - (lookback_bars + 5) * tf_ms
+            # Offline reads never reach the exchange, so the window ends at the newest stored bar
+            # rather than now: a store last updated before the lookback still serves it in full.
+            end_ms = self.cached.index[-1].value // 1_000_000 if client.offline and not self.cached.empty else now_ms
+            since_ms = end_ms - (lookback_bars + 5) * tf_ms
+        self.since_ms = since_ms
+        self.missing = [] if client.offline else self.store.missing_ranges(
+            self.cached, tf_ms, since_ms, now_ms, self.store.load_empty(*self.key))
+        self.ranges = [(start, end - tf_ms) for start, end in self.missing]
+        self.complete = True
 
-        while True:
-            batch = self.ex.fetch_ohlcv(symbol, timeframe=timeframe, since=since_ms, limit=limit)
-            if not batch:
-                break
-            all_rows += batch
-            last_ts = batch[-1][0]
-            since_ms = last_ts + 1
-            if len(all_rows) >= lookback_bars:
-                break
+    def network_error(self, exc: Exception):
+        if self.cached.empty:
+            raise exc
+        self.complete = False
+        log.warning(f"{'/'.join(self.key)}: {exc!r}; using the {len(self.cached)} stored candles")
 
-        if not all_rows:
+    def _record_empty(self, rows: list):
+        # Up to the newest bar there is, whatever the exchange left out (the time before the
+        # listing, outages) it will leave out next time too. Past it, bars are still to come.
+        fetched = [r[0] for r in rows]
+        newest = max(fetched + ([self.cached.index[-1].value // 1_000_000] if not self.cached.empty else []),
+                     default=None)
+        if newest is None:
+            return
+        past = [(start, min(end, newest)) for start, end in self.missing if start < min(end, newest)]
+        self.store.record_empty(*self.key, past, fetched)
+
+    def finish(self, rows: list) -> pd.DataFrame:
+        if self.missing and self.complete:
+            self._record_empty(rows)
+        cached = self.store.merge(*self.key, CCXTClient._rows_to_df(rows)) if rows else self.cached
+        out = cached.loc[cached.index >= pd.Timestamp(self.since_ms, unit="ms")]
+        if out.empty:
             raise RuntimeError("No OHLCV data returned")
-        df = pd.DataFrame(all_rows, columns=["timestamp","open","high","low","close","volume"])
+        return out
+
+
+class CCXTClient:
+    def __init__(self, exchange_name: str, api_key: Optional[str] = None, secret: Optional[str] = None, market_type: str = "spot",
+                 store: Optional[CandleStore] = None, offline: bool = False):
+        self.exchange_name = exchange_name
+        self.market_type = market_type
+        self.store = store
+        self.offline = offline
+        self._credentials = (api_key, secret)
+        self._ex = None
+
+    @property
+    def ex(self):
+        # ccxt takes a third of a second to import; offline runs served from the store never need it.
+        if self._ex is None:
+            import ccxt
+            api_key, secret = self._credentials
+            ex_cls = getattr(ccxt, self.exchange_name)
+            self._ex = ex_cls({
+                "apiKey": api_key or "",
+                "secret": secret or "",
+                "enableRateLimit": True,
+            })
+            if self.exchange_name == "binance":
+                if self.market_type.lower().startswith("future"):
+                    self._ex.options["defaultType"] = "future"
+                else:
+                    self._ex.options["defaultType"] = "spot"
+        return self._ex
+
+    def _fetch_range(self, symbol: str, timeframe: str, since_ms: int, until_ms: Optional[int] = None,
+                     limit: int = 1000, max_rows: Optional[int] = None) -> list:
+        pager = OHLCVPager(since_ms, until_ms, max_rows)
+        while pager.add(self.ex.fetch_ohlcv(symbol, timeframe=timeframe, since=pager.since_ms, limit=limit)):
+            pass
+        return pager.rows
+
+    def fetch_ranges_df(self, symbol: str, timeframe: str, ranges: list[tuple[int, int]],
+                        limit: int = 1000) -> pd.DataFrame:
+        """Candles within each ``[start, end)`` millisecond range, e.g. the minutes of a few hourly bars.
+
+        With a store, ranges it already covers are read from it and only incomplete ones are
+        fetched (and merged into it); offline clients return what the store has, and so does a
+        network failure (with whatever was fetched before it).
+        """
+        tf_ms = timeframe_to_ms(timeframe)
+        key = (self.exchange_name, self.market_type, symbol, timeframe)
+        cached = self.store.load_ranges(*key, ranges) if self.store is not None else None
+        if self.offline:
+            return cached if cached is not None else self._rows_to_df([])
+        todo = ranges
+        if cached is not None:
+            ts = cached.index.as_unit("ms").asi8
+            todo = [(start, end) for start, end in ranges
+                    if ts.searchsorted(end) - ts.searchsorted(start) < (end - start) // tf_ms]
+        rows = []
+        if todo:
+            import ccxt
+            try:
+                for done, (start, end) in enumerate(todo):
+                    rows += [r for r in self._fetch_range(symbol, timeframe, start, until_ms=end - tf_ms, limit=limit)
+                             if start <= r[0] < end]
+            except ccxt.NetworkError as exc:
+                # Bars without fine candles fall back to the open-distance rule; keep what arrived.
+                log.warning(f"{'/'.join(key)}: {exc!r}; {len(todo) - done} of {len(todo)} range(s) left to "
+                            "the stored candles")
+        if not rows:
+            return cached if cached is not None else self._rows_to_df([])
+        fetched = self._rows_to_df(rows)
+        if self.store is not None:
+            self.store.merge(*key, fetched)
+            return self.store.load_ranges(*key, ranges)
+        return fetched[~fetched.index.duplicated(keep="last")].sort_index()
+
+    @staticmethod
+    def _rows_to_df(rows: list) -> pd.DataFrame:
+        df = pd.DataFrame(rows, columns=["timestamp","open","high","low","close","volume"])
         df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
         df.set_index("timestamp", inplace=True)
         return df
+
+    def fetch_ohlcv_df(self, symbol: str, timeframe: str, since_ms: Optional[int] = None, limit: int = 1000, lookback_bars: int = 1500) -> pd.DataFrame:
+        if self.store is not None:
+            return self._fetch_via_store(symbol, timeframe, since_ms, limit, lookback_bars)
+
+        tf_ms = timeframe_to_ms(timeframe)
+        if since_ms is None:
+            now = int(time.time() * 1000)
+            since_ms = now - (lookback_bars + 5) * tf_ms
+
+        all_rows = self._fetch_range(symbol, timeframe, since_ms, limit=limit, max_rows=lookback_bars)
+        if not all_rows:
+            raise RuntimeError("No OHLCV data returned")
+        return self._rows_to_df(all_rows)
+
+    def _fetch_via_store(self, symbol: str, timeframe: str, since_ms: Optional[int], limit: int,
+                         lookback_bars: int) -> pd.DataFrame:
+        read = StoreRead(self, symbol, timeframe, since_ms, lookback_bars)
+        rows = []
+        if read.ranges:
+            import ccxt
+            try:
+                for since, until in read.ranges:
+                    rows += self._fetch_range(symbol, timeframe, since, until_ms=until, limit=limit)
+            except ccxt.NetworkError as exc:
+                read.network_error(exc)
+        return read.finish(rows)
@@ -0,0 +1,85 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable
+import pandas as pd
+
+from ..utils.io import save_parquet, load_parquet
+
+DEFAULT_TTL_HOURS = {"fear_greed": 24.0, "funding": 8.0, "news": 1.0}
+
+
+class SentimentCache:
+    """On-disk cache of normalised sentiment series, one Parquet file per source key.
+
+    A series younger than its source's TTL is served without touching the network. Once it
+    expires, only the data after the last cached timestamp is requested and merged in (the newest
+    response wins on overlapping timestamps). If that request fails the stale copy is still used,
+    so a flaky provider no longer silently swaps real history for simulated data.
+    """
+
+    def __init__(self, root: Path | str = "data/cache/sentiment", ttl_hours: dict | None = None):
+        self.root = Path(root)
+        self.ttl_hours = {**DEFAULT_TTL_HOURS, **(ttl_hours or {})}
+        self.meta_path = self.root / "meta.json"
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.parquet"
+
+    def _meta(self) -> dict:
+        return json.loads(self.meta_path.read_text()) if self.meta_path.exists() else {}
+
+    def _touch(self, key: str, rows: int):
+        # Re-read before writing: other processes may be refreshing other keys.
+        meta = self._meta()
+        meta[key] = {"fetched_at": time.time(), "rows": rows}
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.meta_path.with_name(f"meta.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(meta, indent=2))
+        os.replace(tmp, self.meta_path)
+
+    def load(self, key: str) -> pd.Series | None:
+        path = self._path(key)
+        return load_parquet(path)["value"] if path.exists() else None
+
+    def is_fresh(self, key: str, source: str) -> bool:
+        entry = self._meta().get(key)
+        if entry is None or not self._path(key).exists():
+            return False
+        return time.time() - entry["fetched_at"] < self.ttl_hours.get(source, 0.0) * 3600
+
+    def last_timestamp(self, key: str) -> pd.Timestamp | None:
+        cached = self.load(key)
+        return cached.index[-1] if cached is not None and len(cached) else None
+
+    def merge(self, key: str, new: pd.Series | None) -> pd.Series | None:
+        """Merge freshly fetched data into the cached series and restart its TTL.
+
+        ``new`` may be ``None`` when an incremental request returned nothing new.
+        """
+        cached = self.load(key)
+        if new is None or new.empty:
+            if cached is not None:
+                self._touch(key, len(cached))
+            return cached
+        merged = pd.concat([cached, new]) if cached is not None else new
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index().rename("value")
+        save_parquet(merged.to_frame(), self._path(key))
+        self._touch(key, len(merged))
+        return merged
+
+    def resolve(self, key: str, source: str, raw, parse: Callable) -> tuple[pd.Series | None, str]:
+        """Return ``(series, origin)`` for a source given its raw response.
+
+        ``raw`` is ``None`` when no request was made (the entry was fresh) or the request failed.
+        ``origin`` is ``"network"``, ``"cache"``, ``"stale"`` (expired but the refresh failed) or
+        ``"fallback"`` (nothing usable, the caller simulates).
+        """
+        if raw is not None:
+            merged = self.merge(key, parse(raw))
+            return merged, "network" if merged is not None else "fallback"
+        cached = self.load(key)
+        if cached is None:
+            return None, "fallback"
+        return cached, "cache" if self.is_fresh(key, source) else "stale"
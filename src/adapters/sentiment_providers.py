@@ -1,13 +1,18 @@
 import numpy as np
 import pandas as pd
-import requests
+from src.adapters.sentiment_cache import SentimentCache
 from src.env import get_api_keys
+from src.indicators.streaming import ewm_mean
 
 
-API_KEYS = get_api_keys()
+FEAR_GREED_URL = "https://api.alternative.me/fng/"
+FUNDING_URL = "https://fapi.binance.com/fapi/v1/fundingRate"
+NEWS_URL = "https://cryptopanic.com/api/developer/v2/posts/"
+URLS = {"fear_greed": FEAR_GREED_URL, "funding": FUNDING_URL, "news": NEWS_URL}
 
 def _safe_get_json(url: str, params: dict | None = None, timeout: int = 10):
     try:
+        import requests
         r = requests.get(url, params=params or {}, timeout=timeout)
         if r.status_code == 200:
             return r.json()
@@ -15,84 +20,195 @@ def _safe_get_json(url: str, params: dict | None = None, timeout: int = 10):
         pass
     return None
 
-def get_fear_greed(index: pd.DatetimeIndex, mode: str = "live") -> pd.Series:
-    if mode == "live":
-        data = _safe_get_json("https://api.alternative.me/fng/", params={"limit": 0})
-        if data and "data" in data:
-            rows = data["data"]
-            df = pd.DataFrame(rows)
-            if "timestamp" in df.columns and "value" in df.columns:
-                df["ts"] = pd.to_datetime(df["timestamp"].astype(int), unit="s")
-                df = df.set_index("ts").sort_index()
-                s = ((100 - df["value"].astype(float)) / 50.0) - 1.0  # 0=>+1, 50=>0, 100=>-1
-                s = s.clip(-1, 1)
-                out = s.reindex(index, method="ffill")
-                return out.ffill().bfill().clip(-1, 1)
+# Each provider is split into request params, a parser from the raw JSON to a normalised series
+# on the provider's own timestamps, and a simulated fallback, so the sync getters below and the
+# async acquisition layer share the exact same transformations.
+
+def fear_greed_params(since: pd.Timestamp | None = None) -> dict:
+    if since is None:
+        return {"limit": 0}  # full history
+    days = (pd.Timestamp.now(tz="UTC").tz_localize(None) - since).days
+    return {"limit": max(days + 2, 2)}
+
+def parse_fear_greed(data) -> pd.Series | None:
+    if data and "data" in data:
+        df = pd.DataFrame(data["data"])
+        if "timestamp" in df.columns and "value" in df.columns:
+            df["ts"] = pd.to_datetime(df["timestamp"].astype(int), unit="s")
+            df = df.set_index("ts").sort_index()
+            s = ((100 - df["value"].astype(float)) / 50.0) - 1.0  # 0=>+1, 50=>0, 100=>-1
+            return s.clip(-1, 1)
+    return None
+
+# Simulators take an optional ``state`` dict (updated in place) so consecutive index blocks continue
+# one series: the bar count, random stream and random walk level carry over.
+
+def simulate_fear_greed(index: pd.DatetimeIndex, state: dict | None = None) -> pd.Series:
+    state = {} if state is None else state
     n = len(index)
-    t = np.arange(n)
-    sim = 0.6 * np.sin(t / 48.0) + 0.15 * np.cos(t / 111.0) + np.random.default_rng(42).normal(0, 0.05, n)
+    start = state.get("start", 0)
+    t = np.arange(start, start + n)
+    rng = state.setdefault("rng", np.random.default_rng(42))
+    sim = 0.6 * np.sin(t / 48.0) + 0.15 * np.cos(t / 111.0) + rng.normal(0, 0.05, n)
+    state["start"] = start + n
     return pd.Series(np.clip(sim, -1, 1), index=index)
 
-def get_funding_sentiment(symbol: str, index: pd.DatetimeIndex, mode: str = "live") -> pd.Series:
-    def norm_rate(x: float) -> float:
-        import numpy as _np
-        return float(_np.tanh(-100.0 * x))
-    if mode == "live":
-        sym = symbol.replace("/", "")
-        url = "https://fapi.binance.com/fapi/v1/fundingRate"
-        try:
-            js = requests.get(url, params={"symbol": sym, "limit": 1000}, timeout=10).json()
-        except Exception:
-            js = None
-        if js:
-            df = pd.DataFrame(js)
-            if not df.empty and "fundingRate" in df.columns and "fundingTime" in df.columns:
-                df["ts"] = pd.to_datetime(df["fundingTime"].astype(int), unit="ms")
-                df = df.set_index("ts").sort_index()
-                rates = df["fundingRate"].astype(float)
-                s = rates.apply(norm_rate)
-                return s.reindex(index, method="ffill").ffill().bfill().clip(-1, 1)
-    rng = np.random.default_rng(123)
+def funding_params(symbol: str, since: pd.Timestamp | None = None) -> dict:
+    params = {"symbol": symbol.replace("/", ""), "limit": 1000}
+    if since is not None:
+        params["startTime"] = since.value // 1_000_000 + 1
+    return params
+
+def parse_funding(js) -> pd.Series | None:
+    if js and isinstance(js, list):
+        df = pd.DataFrame(js)
+        if not df.empty and "fundingRate" in df.columns and "fundingTime" in df.columns:
+            df["ts"] = pd.to_datetime(df["fundingTime"].astype(int), unit="ms")
+            df = df.set_index("ts").sort_index()
+            rates = df["fundingRate"].astype(float)
+            return rates.apply(lambda x: float(np.tanh(-100.0 * x)))
+    return None
+
+def simulate_funding(index: pd.DatetimeIndex, state: dict | None = None) -> pd.Series:
+    state = {} if state is None else state
+    rng = state.setdefault("rng", np.random.default_rng(123))
     n = len(index)
-    steps = rng.normal(0, 0.00003, n).cumsum()
+    steps = rng.normal(0, 0.00003, n)
+    if "level" in state:
+        steps = np.concatenate(([state["level"]], steps)).cumsum()[1:]
+    else:
+        steps = steps.cumsum()
+    if n:
+        state["level"] = steps[-1]
     rates = np.clip(steps, -0.0005, 0.0005)
     s = np.tanh(-100.0 * rates)
     return pd.Series(s, index=index).clip(-1, 1)
 
-def get_news_sentiment(index: pd.DatetimeIndex, mode: str = "live") -> pd.Series:
-    token = API_KEYS.get("cryptopanic", "")
-    if mode == "live" and token:
-        url = "https://cryptopanic.com/api/developer/v2/posts/"
-        try:
-            js = requests.get(url, params={"auth_token": token, "public": "true", "filter": "important"}, timeout=10).json()
-        except Exception:
-            js = None
-        if js and "results" in js:
-            rows = js["results"]
-            scores = {}
-            for r in rows:
-                ts = pd.to_datetime(r.get("published_at") or r.get("created_at"))
-                if ts is None:
-                    continue
-                k = ts.normalize()
-                tags = r.get("votes", {})
-                bull = (tags.get("positive", 0) or 0) + (1 if "bullish" in (r.get("tags") or []) else 0)
-                bear = (tags.get("negative", 0) or 0) + (1 if "bearish" in (r.get("tags") or []) else 0)
-                tot = bull + bear + 1e-9
-                sc = (bull - bear) / tot
-                scores[k] = scores.get(k, 0.0) + sc
-            if scores:
-                s = pd.Series(scores).sort_index().rolling(3, min_periods=1).mean().clip(-1, 1)
-                if getattr(index, "tz", None) is not None:
-                    index = index.tz_localize(None)
-                if getattr(s.index, "tz", None) is not None:
-                    s.index = s.index.tz_localize(None)
-                return s.reindex(index, method="ffill").ffill().bfill().clip(-1, 1)
+def news_params(token: str) -> dict:
+    return {"auth_token": token, "public": "true", "filter": "important"}
+
+def parse_news(js) -> pd.Series | None:
+    if js and "results" in js:
+        scores = {}
+        for r in js["results"]:
+            ts = pd.to_datetime(r.get("published_at") or r.get("created_at"))
+            if ts is None:
+                continue
+            k = ts.normalize()
+            tags = r.get("votes", {})
+            bull = (tags.get("positive", 0) or 0) + (1 if "bullish" in (r.get("tags") or []) else 0)
+            bear = (tags.get("negative", 0) or 0) + (1 if "bearish" in (r.get("tags") or []) else 0)
+            tot = bull + bear + 1e-9
+            sc = (bull - bear) / tot
+            scores[k] = scores.get(k, 0.0) + sc
+        if scores:
+            s = pd.Series(scores).sort_index().rolling(3, min_periods=1).mean().clip(-1, 1)
+            if getattr(s.index, "tz", None) is not None:
+                s.index = s.index.tz_localize(None)
+            return s
+    return None
+
+def simulate_news(index: pd.DatetimeIndex, state: dict | None = None) -> pd.Series:
+    state = {} if state is None else state
     n = len(index)
-    t = np.arange(n)
+    start = state.get("start", 0)
+    t = np.arange(start, start + n)
+    state["start"] = start + n
     sim = 0.2 * np.sin(t / 64.0) + 0.1 * np.cos(t / 37.0)
     return pd.Series(np.clip(sim, -1, 1), index=index)
 
+def align_sentiment(s: pd.Series, index: pd.DatetimeIndex, head: float | None = None) -> pd.Series:
+    """Forward-fill a provider series onto the bar index (back-filling the head).
+
+    ``head`` fills bars left empty because the whole index precedes the series.
+    """
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    out = s.reindex(index, method="ffill").ffill().bfill()
+    if head is not None:
+        out = out.fillna(head)
+    return out.clip(-1, 1)
+
+PARSERS = {"fear_greed": parse_fear_greed, "funding": parse_funding, "news": parse_news}
+SIMULATORS = {"fear_greed": simulate_fear_greed, "funding": simulate_funding, "news": simulate_news}
+
+def source_key(name: str, symbol: str) -> str:
+    return f"funding_{symbol.replace('/', '').replace(':', '_')}" if name == "funding" else name
+
+def pending_request(name: str, symbol: str, mode: str = "live",
+                    cache: SentimentCache | None = None) -> dict | None:
+    """Request params for a source, or None when it needs no request (offline, fresh cache, no token)."""
+    if mode != "live":
+        return None
+    since = None
+    if cache is not None:
+        key = source_key(name, symbol)
+        if cache.is_fresh(key, name):
+            return None
+        since = cache.last_timestamp(key)
+    if name == "fear_greed":
+        return fear_greed_params(since)
+    if name == "funding":
+        return funding_params(symbol, since)
+    token = get_api_keys().get("cryptopanic", "")
+    return news_params(token) if token else None
+
+def resolve_series(name: str, symbol: str, mode: str, raw, cache: SentimentCache | None = None,
+                   report: dict | None = None) -> pd.Series | None:
+    """Provider series for a source from its raw response, or None when it must be simulated.
+
+    ``report[name]`` is set to where the data came from: network, cache, stale, fallback or simulated.
+    """
+    s, origin = None, "simulated"
+    if mode == "live":
+        if cache is not None:
+            s, origin = cache.resolve(source_key(name, symbol), name, raw, PARSERS[name])
+        else:
+            s = PARSERS[name](raw)
+            origin = "network" if s is not None else "fallback"
+    if report is not None:
+        report[name] = origin
+    return s
+
+def resolve_source(name: str, symbol: str, index: pd.DatetimeIndex, mode: str, raw,
+                   cache: SentimentCache | None = None, report: dict | None = None) -> pd.Series:
+    """Aligned series for a source from its raw response (None if not requested or failed)."""
+    s = resolve_series(name, symbol, mode, raw, cache, report)
+    return align_sentiment(s, index) if s is not None else SIMULATORS[name](index)
+
+def _fetch_raw(name: str, symbol: str, mode: str, cache: SentimentCache | None):
+    params = pending_request(name, symbol, mode, cache)
+    return _safe_get_json(URLS[name], params=params) if params is not None else None
+
+def _get_source(name: str, symbol: str, index: pd.DatetimeIndex, mode: str,
+                cache: SentimentCache | None, report: dict | None) -> pd.Series:
+    raw = _fetch_raw(name, symbol, mode, cache)
+    return resolve_source(name, symbol, index, mode, raw, cache, report)
+
+def get_fear_greed(index: pd.DatetimeIndex, mode: str = "live", *,
+                   cache: SentimentCache | None = None, report: dict | None = None) -> pd.Series:
+    return _get_source("fear_greed", "", index, mode, cache, report)
+
+def get_funding_sentiment(symbol: str, index: pd.DatetimeIndex, mode: str = "live", *,
+                          cache: SentimentCache | None = None, report: dict | None = None) -> pd.Series:
+    return _get_source("funding", symbol, index, mode, cache, report)
+
+def get_news_sentiment(index: pd.DatetimeIndex, mode: str = "live", *,
+                       cache: SentimentCache | None = None, report: dict | None = None) -> pd.Series:
+    return _get_source("news", "", index, mode, cache, report)
+
+def combine_sentiment(components: list[tuple[str, pd.Series]], index: pd.DatetimeIndex,
+                      seed: float | None = None) -> pd.Series:
+    """Average the sources and smooth; ``seed`` resumes the smoothing from the previous block's last value."""
+    if not components:
+        return pd.Series(0.0, index=index, dtype=float)
+
+    cols, series = zip(*components)
+    combo = pd.concat(series, axis=1).fillna(0.0)
+    combo.columns = list(cols)
+    out = combo.mean(axis=1).clip(-1, 1)
+    return ewm_mean(out, seed, span=10).clip(-1, 1)
+
 def get_combined_sentiment(
     symbol: str,
     index: pd.DatetimeIndex,
@@ -101,20 +217,47 @@ def get_combined_sentiment(
     use_fear_greed: bool = True,
     use_funding: bool = True,
     use_news: bool = True,
+    cache: SentimentCache | None = None,
+    report: dict | None = None,
 ) -> pd.Series:
     components: list[tuple[str, pd.Series]] = []
     if use_fear_greed:
-        components.append(("fear_greed", get_fear_greed(index, mode)))
+        components.append(("fear_greed", get_fear_greed(index, mode, cache=cache, report=report)))
     if use_funding:
-        components.append(("funding", get_funding_sentiment(symbol, index, mode)))
+        components.append(("funding", get_funding_sentiment(symbol, index, mode, cache=cache, report=report)))
     if use_news:
-        components.append(("news", get_news_sentiment(index, mode)))
+        components.append(("news", get_news_sentiment(index, mode, cache=cache, report=report)))
+    return combine_sentiment(components, index)
 
-    if not components:
-        return pd.Series(0.0, index=index, dtype=float)
 
-    cols, series = zip(*components)
-    combo = pd.concat(series, axis=1).fillna(0.0)
-    combo.columns = list(cols)
-    out = combo.mean(axis=1).clip(-1, 1)
-    return out.ewm(span=10, adjust=False).mean().clip(-1, 1)
+class SentimentStream:
+    """``get_combined_sentiment`` over consecutive, non-overlapping blocks of one bar index.
+
+    Provider series are requested once; simulated sources continue their bar count and random
+    streams and the smoothing resumes from the previous block, so concatenating the blocks gives
+    the same series as one call over the whole index. The one exception is a block lying
+    entirely before a provider's first point, which takes that point instead of back-filling.
+    """
+
+    def __init__(self, symbol: str, mode: str = "live", *, use_fear_greed: bool = True,
+                 use_funding: bool = True, use_news: bool = True,
+                 cache: SentimentCache | None = None, report: dict | None = None):
+        enabled = {"fear_greed": use_fear_greed, "funding": use_funding, "news": use_news}
+        self.sources: dict[str, pd.Series | None] = {}
+        for name in (n for n, on in enabled.items() if on):
+            sym = symbol if name == "funding" else ""
+            self.sources[name] = resolve_series(name, sym, mode, _fetch_raw(name, sym, mode, cache), cache, report)
+        self.sim_state: dict[str, dict] = {name: {} for name in self.sources}
+        self.last: float | None = None
+
+    def block(self, index: pd.DatetimeIndex) -> pd.Series:
+        components = []
+        for name, s in self.sources.items():
+            if s is None:
+                components.append((name, SIMULATORS[name](index, self.sim_state[name])))
+            else:
+                components.append((name, align_sentiment(s, index, head=float(s.iloc[0]))))
+        out = combine_sentiment(components, index, self.last)
+        if len(out):
+            self.last = float(out.iloc[-1])
+        return out
@@ -0,0 +1,246 @@
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from functools import cache
+from itertools import product
+from pathlib import Path
+from typing import Callable
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.analytics.metrics import summary as metrics_summary, summary_batch
+from src.analytics.threshold_tuner import evaluate_thresholds
+from src.analytics.trade_report import generate_trade_log
+from src.adapters.sentiment_providers import simulate_fear_greed
+from src.backtest.engine_sl_tp import bt_long_sl_tp_batch
+from src.core.backtest_runner import (StrategyInputs, build_engine, compact_dtype, gate_signals, run_backtest,
+                                     tech_subscore, to_compact)
+from src.indicators.trend import supertrend
+from src.indicators.volatility import atr
+from src.signals.risk import RiskModel
+
+STAGES = ["supertrend", "tech_subscore", "signals", "backtest", "metrics", "metrics_batch", "tuner"]
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+TUNER_GRID = list(product([0.2, 0.3, 0.4], [-0.2, -0.3, -0.4]))
+
+
+def parse_size(text: str) -> int:
+    """``"10k"`` -> 10_000, ``"1M"`` -> 1_000_000; plain integers pass through."""
+    text = str(text).strip()
+    mult = {"k": 1_000, "K": 1_000, "m": 1_000_000, "M": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if mult > 1 else text) * mult)
+
+
+def synthetic_candles(n: int, seed: int = 7) -> pd.DataFrame:
+    """Deterministic 1-minute OHLCV random walk with alternating trending regimes."""
+    rng = np.random.default_rng(seed)
+    drift = np.where((np.arange(n) // 5_000) % 2 == 0, 2e-5, -2e-5)
+    close = 30_000.0 * np.exp(np.cumsum(drift + rng.normal(0, 1.5e-3, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    wick = np.abs(rng.normal(0, 1e-3, (2, n))) * close
+    high = np.maximum(open_, close) + wick[0]
+    low = np.minimum(open_, close) - wick[1]
+    volume = rng.gamma(2.0, 50.0, n)
+    index = pd.date_range("2000-01-01", periods=n, freq="min", name="timestamp")
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume}, index=index)
+
+
+def synthetic_inputs(cfg: dict, df: pd.DataFrame) -> StrategyInputs:
+    """Strategy inputs on synthetic candles, combined like ``prepare_inputs`` (trend score plus the
+    simulated sentiment); smoothed copies stand in for the higher timeframes."""
+    engine = build_engine(cfg)
+    dtype = compact_dtype(cfg)
+    sentiment = to_compact(simulate_fear_greed(df.index), dtype)
+    total_low = tech_subscore(df, cfg) * engine.w.trend + sentiment * engine.w.sentiment_macro
+    return StrategyInputs(
+        symbol="SYN/USDT",
+        tf_entry="1m",
+        df_low=df,
+        total_low=total_low,
+        total_high_on_low=total_low.rolling(1440, min_periods=1).mean(),
+        total_mid_on_low=total_low.rolling(240, min_periods=1).mean(),
+        atr_series=to_compact(atr(df, cfg['features']['atr']['period']), dtype),
+    )
+
+
+def _stage_callables(cfg: dict, df: pd.DataFrame) -> dict[str, tuple[Callable, int]]:
+    """Each stage as ``(fn, work_bars)``; inputs of later stages are precomputed so a stage only times itself."""
+    st_cfg = cfg['features']['supertrend']
+    inputs = synthetic_inputs(cfg, df)
+    engine = build_engine(cfg)
+    entries, exits = gate_signals(engine, inputs)
+    curve, trade_records = run_backtest(cfg, inputs, entries, exits)
+    trades_df = generate_trade_log(trade_records)
+    equity = cfg['backtest']['initial_equity']
+    n = len(df)
+
+    @cache
+    def tuner_grid_curves():
+        signals = [gate_signals(build_engine(cfg, buy=b, sell=s), inputs) for b, s in TUNER_GRID]
+        return bt_long_sl_tp_batch(df, np.stack([e.to_numpy() for e, _ in signals]),
+                                   np.stack([x.to_numpy() for _, x in signals]), inputs.atr_series,
+                                   RiskModel(**cfg['risk']), cfg['backtest']['fees_bps'],
+                                   cfg['backtest']['slippage_bps'], equity)
+
+    def metrics_batch():
+        curves, ledger = tuner_grid_curves()
+        return summary_batch(curves, ledger["variant"], ledger["pnl"], equity)
+
+    return {
+        "supertrend": (lambda: supertrend(df, st_cfg['period'], st_cfg['multiplier']), n),
+        "tech_subscore": (lambda: tech_subscore(df, cfg), n),
+        "signals": (lambda: gate_signals(engine, inputs), n),
+        "backtest": (lambda: run_backtest(cfg, inputs, entries, exits), n),
+        "metrics": (lambda: metrics_summary(curve, trades_df, equity), n),
+        "metrics_batch": (metrics_batch, n * len(TUNER_GRID)),
+        "tuner": (lambda: [evaluate_thresholds(cfg, inputs, b, s) for b, s in TUNER_GRID], n * len(TUNER_GRID)),
+    }
+
+
+def _best_time(fn: Callable, repeat: int, min_seconds: float = 0.5) -> float:
+    """Best of at least ``repeat`` runs, repeating fast stages until ``min_seconds`` have elapsed."""
+    best, elapsed, runs = float("inf"), 0.0, 0
+    while runs < max(repeat, 1) or elapsed < min_seconds:
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best, elapsed, runs = min(best, dt), elapsed + dt, runs + 1
+    return best
+
+
+def _peak_bytes(fn: Callable) -> int:
+    # Separate pass: tracemalloc slows allocation-heavy code, so it never overlaps the timed runs.
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(cfg: dict, sizes: list[int] = DEFAULT_SIZES, stages: list[str] = STAGES,
+                   repeat: int = 3, memory: bool = True, seed: int = 7) -> pd.DataFrame:
+    """Time every stage on synthetic candles of each size. One row per (stage, bars).
+
+    ``peak_mb_per_m`` scales each peak to a per-million-bars budget; with ``memory.compact`` set in
+    ``cfg`` the candles are float32, as ``load_market_data`` would produce them.
+    """
+    rows = []
+    compact = compact_dtype(cfg) == np.float32
+    for n in sizes:
+        df = synthetic_candles(n, seed)
+        if compact:
+            df = to_compact(df)
+        calls = _stage_callables(cfg, df)
+        for stage in stages:
+            fn, work = calls[stage]
+            seconds = _best_time(fn, repeat)
+            peak = _peak_bytes(fn) if memory else None
+            rows.append({
+                "stage": stage,
+                "bars": n,
+                "seconds": seconds,
+                "bars_per_s": work / seconds if seconds > 0 else float("inf"),
+                "peak_mb": peak / 2**20 if peak is not None else None,
+                "peak_mb_per_m": peak / 2**20 / (n / 1e6) if peak is not None else None,
+            })
+            print(f"{stage:>14} {n:>11,} bars  {seconds:9.4f}s  {rows[-1]['bars_per_s']:>14,.0f} bars/s"
+                  + (f"  {rows[-1]['peak_mb']:9.1f} MB  {rows[-1]['peak_mb_per_m']:7.1f} MB/1M bars"
+                     if peak is not None else ""))
+    return pd.DataFrame(rows)
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def append_history(results: pd.DataFrame, path: Path | str, compact: bool = False) -> dict:
+    """Append one run (results + environment) as a JSON line and return the record."""
+    record = {
+        "run_at": pd.Timestamp.now(tz="UTC").isoformat(),
+        **_environment(),
+        "compact": compact,
+        "results": results.to_dict(orient="records"),
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    return record
+
+
+def save_baseline(record: dict, path: Path | str):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(record, indent=2))
+
+
+def compare_to_baseline(results: pd.DataFrame, baseline_path: Path | str, tolerance: float = 0.15) -> pd.DataFrame:
+    """Join results with the saved baseline on (stage, bars) and flag regressions.
+
+    A stage regresses when its throughput drops, or its peak memory grows, by more than ``tolerance``.
+    """
+    baseline = pd.DataFrame(json.loads(Path(baseline_path).read_text())["results"])
+    cmp = results.merge(baseline[["stage", "bars", "bars_per_s", "peak_mb"]], on=["stage", "bars"],
+                        suffixes=("", "_base"))
+    cmp["speedup"] = cmp["bars_per_s"] / cmp["bars_per_s_base"]
+    slower = cmp["speedup"] < 1.0 - tolerance
+    mem_ratio = cmp["peak_mb"].astype(float) / cmp["peak_mb_base"].astype(float)
+    # Ignore memory noise below 1 MB; missing measurements never count as regressions.
+    heavier = (mem_ratio > 1.0 + tolerance) & ((cmp["peak_mb"] - cmp["peak_mb_base"]).astype(float) > 1.0)
+    cmp["regression"] = slower | heavier.fillna(False)
+    return cmp
+
+
+def benchmark(cfg_path: str = "config/settings.yaml", sizes: list[int] = DEFAULT_SIZES, stages: list[str] = STAGES,
+              repeat: int = 3, memory: bool = True, out_dir: str | Path = "data/benchmarks",
+              baseline: bool = False, compare: bool = False, tolerance: float = 0.15,
+              compact: bool | None = None) -> bool:
+    """Run the suite, append it to ``<out_dir>/history.jsonl`` and optionally save/compare a baseline.
+
+    ``compact`` overrides ``memory.compact`` from the config. Returns False when ``compare`` found a regression.
+    """
+    cfg = yaml.safe_load(Path(cfg_path).read_text())
+    if compact is not None:
+        cfg.setdefault('memory', {})['compact'] = compact
+    compact = compact_dtype(cfg) == np.float32
+    out_dir = Path(out_dir)
+    results = run_benchmarks(cfg, sizes, stages, repeat, memory)
+    record = append_history(results, out_dir / "history.jsonl", compact)
+    print(f"Results appended to {out_dir / 'history.jsonl'}")
+
+    ok = True
+    baseline_path = out_dir / "baseline.json"
+    if compare:
+        if not baseline_path.exists():
+            print(f"No baseline at {baseline_path}; run with --save-baseline first.")
+        else:
+            if json.loads(baseline_path.read_text()).get("compact", False) != compact:
+                print(f"Warning: baseline was recorded with compact={not compact}, this run has compact={compact}.")
+            cmp = compare_to_baseline(results, baseline_path, tolerance)
+            print(cmp[["stage", "bars", "bars_per_s", "bars_per_s_base", "speedup", "peak_mb", "peak_mb_base",
+                       "regression"]].to_string(index=False))
+            flagged = cmp[cmp["regression"]]
+            for row in flagged.itertuples():
+                print(f"REGRESSION: {row.stage} @ {row.bars:,} bars ({row.speedup:.2f}x baseline throughput)")
+            ok = flagged.empty
+    if baseline:
+        save_baseline(record, baseline_path)
+        print(f"Baseline saved to {baseline_path}")
+    return ok
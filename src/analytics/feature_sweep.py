@@ -0,0 +1,178 @@
+from itertools import product
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.analytics.metrics import summary_batch
+from src.analytics.walk_forward import OBJECTIVES
+from src.backtest.engine_sl_tp import bt_long_sl_tp_batch
+from src.core.backtest_runner import (TF_HIGH, TF_MID, StrategyInputs, _ema_cross_term, _finish_score, _macd_term,
+                                      _rsi_term, _shifted, _supertrend_term, _trend_term, build_engine, gate_signals,
+                                      load_market_data, log)
+from src.env import get_api_mode
+from src.indicators.families import IndicatorFamilies
+from src.indicators.volatility import atr
+from src.signals.risk import RiskModel
+from src.utils.mtf import align_to_lower_tf, closed_bar_positions
+
+# Nested like ``cfg['features']``; every leaf lists the values to try.
+DEFAULT_GRID = {
+    "ema": {"windows": [[20, 50, 200], [10, 30, 100], [12, 26, 150]]},
+    "rsi": {"period": [7, 14, 21]},
+    "macd": {"fast": [8, 12], "slow": [21, 26], "signal": [9]},
+    "supertrend": {"period": [7, 10, 14], "multiplier": [2.0, 3.0, 4.0]},
+}
+
+
+def _leaves(grid: dict, prefix: tuple = ()) -> list[tuple[tuple, list]]:
+    out = []
+    for key, value in grid.items():
+        if isinstance(value, dict):
+            out += _leaves(value, prefix + (key,))
+        else:
+            out.append((prefix + (key,), list(value)))
+    return out
+
+
+def feature_combinations(features_cfg: dict, grid: dict) -> list[dict]:
+    """Every ``features`` config of the grid's Cartesian product; keys the grid leaves out keep
+    their configured value, and MACDs whose fast leg is not faster than the slow one are skipped."""
+    leaves = _leaves(grid)
+    combos = []
+    for values in product(*(v for _, v in leaves)):
+        feats = {k: dict(v) if isinstance(v, dict) else v for k, v in features_cfg.items()}
+        for (path, _), value in zip(leaves, values):
+            node = feats
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = value
+        if feats['macd']['fast'] < feats['macd']['slow']:
+            combos.append(feats)
+    return combos
+
+
+class TechScorer:
+    """``tech_subscore`` of one frame for any ``features`` config, built from shared pieces.
+
+    Each score term (trend, EMA cross, RSI, MACD, Supertrend) depends on a few parameters only;
+    its signed contribution is computed once per distinct parameter set from ``IndicatorFamilies``
+    and the score of a config is the sum of its five cached terms, equal to ``tech_subscore``.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.families = IndicatorFamilies(df)
+        self.close = df['close'].to_numpy(dtype=np.float64)
+        self.terms: dict[tuple, np.ndarray] = {}
+
+    def _term(self, key: tuple, build) -> np.ndarray:
+        if key not in self.terms:
+            term = np.zeros(len(self.close))
+            build(term)
+            self.terms[key] = term
+        return self.terms[key]
+
+    def _add_macd(self, term: np.ndarray, fast: int, slow: int, signal: int):
+        line, sig, hist = self.families.macd(fast, slow, signal)
+        _macd_term(term, line, sig, hist, _shifted(hist))
+
+    def score(self, feats: dict) -> np.ndarray:
+        f = self.families
+        e_fast, e_mid, e_slow = feats['ema']['windows']
+        macd = (feats['macd']['fast'], feats['macd']['slow'], feats['macd']['signal'])
+        st = (feats['supertrend']['period'], feats['supertrend']['multiplier'])
+        terms = (
+            self._term(("trend", e_slow), lambda t: _trend_term(t, self.close, f.ema(e_slow))),
+            self._term(("cross", e_fast, e_mid), lambda t: _ema_cross_term(t, f.ema(e_fast), f.ema(e_mid))),
+            self._term(("rsi", feats['rsi']['period']), lambda t: _rsi_term(t, f.rsi(feats['rsi']['period']))),
+            self._term(("macd", macd), lambda t: self._add_macd(t, *macd)),
+            self._term(("supertrend", st), lambda t: _supertrend_term(t, self.close, f.supertrend(*st))),
+        )
+        score = np.zeros(len(self.close))
+        for term in terms:
+            score += term
+        return _finish_score(score)
+
+
+def sweep_features(cfg_path: str = "config/settings.yaml", grid: dict | None = None, objective: str | None = None,
+                   batch_size: int | None = None, out_path: str | Path = "data/features/feature_sweep.csv") -> pd.DataFrame:
+    """Backtest every indicator-parameter combination of ``grid`` over one data load.
+
+    Candles and sentiment are loaded once; indicators come from ``IndicatorFamilies`` per
+    timeframe, so a grid of hundreds of combinations costs a handful of EMA/RSI/ATR passes and
+    one Supertrend recurrence per (period, multiplier). Each combination is then scored, gated
+    and backtested like ``run_strategy`` would with those ``features``, ``batch_size`` at a time
+    through ``bt_long_sl_tp_batch``. Settings default to the ``feature_sweep`` config section;
+    always float64 (``memory.compact`` does not apply).
+
+    Writes one row per combination, best ``objective`` first, to ``out_path`` and returns it.
+    """
+    cfg = yaml.safe_load(Path(cfg_path).read_text())
+    cfg['memory'] = {**cfg.get('memory', {}), 'compact': False}
+    fs = cfg.get('feature_sweep', {})
+    grid = grid or fs.get('grid') or DEFAULT_GRID
+    objective = objective or fs.get('objective', 'sharpe_ratio')
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; expected one of {', '.join(OBJECTIVES)}")
+    batch_size = batch_size or fs.get('batch_size', 64)
+
+    api_mode = cfg.get('api_mode') or get_api_mode()
+    symbol, tf_entry = cfg['symbols'][0], cfg['timeframes'][0]
+    combos = feature_combinations(cfg['features'], grid)
+    df_high, df_mid, df_low, sent_entry = load_market_data(cfg, symbol, tf_entry, api_mode)
+    engine = build_engine(cfg)
+    factor = 0.5 if api_mode == "offline" else 1.0
+    scorers = [TechScorer(df) for df in (df_high, df_mid, df_low)]
+    # The sentiment half of each timeframe's total, as prepare_inputs computes it.
+    sent_parts = [(sent_entry.reindex(df.index, method='ffill') * engine.w.sentiment_macro * factor).to_numpy()
+                  for df in (df_high, df_mid)] + [(sent_entry * engine.w.sentiment_macro * factor).to_numpy()]
+    positions = [closed_bar_positions(df_high.index, TF_HIGH, df_low.index, tf_entry),
+                 closed_bar_positions(df_mid.index, TF_MID, df_low.index, tf_entry)]
+    atr_series = atr(df_low, cfg['features']['atr']['period'])
+    for scorer in scorers:
+        scorer.families.add_spans({w for f in combos for w in (*f['ema']['windows'], f['macd']['fast'], f['macd']['slow'])})
+    log.info(f"Sweeping {len(combos)} feature combinations over {len(df_low):,} {tf_entry} bars "
+             f"({len(scorers[-1].families.spans)} EMA spans per timeframe)...")
+
+    def inputs_for(feats: dict) -> StrategyInputs:
+        totals = [scorer.score(feats) * engine.w.trend + part for scorer, part in zip(scorers, sent_parts)]
+        high, mid = (align_to_lower_tf(pd.Series(t, index=df.index), pos, df_low.index)
+                     for t, df, pos in zip(totals, (df_high, df_mid), positions))
+        return StrategyInputs(symbol=symbol, tf_entry=tf_entry, df_low=df_low,
+                              total_low=pd.Series(totals[2], index=df_low.index), total_high_on_low=high,
+                              total_mid_on_low=mid, atr_series=atr_series)
+
+    rm = RiskModel(**cfg['risk'])
+    metrics = []
+    for start in range(0, len(combos), batch_size):
+        signals = [gate_signals(engine, inputs_for(f)) for f in combos[start:start + batch_size]]
+        equity, ledger, recorded = bt_long_sl_tp_batch(
+            df_low, np.stack([e.to_numpy() for e, _ in signals]), np.stack([x.to_numpy() for _, x in signals]),
+            atr_series, rm, cfg['backtest']['fees_bps'], cfg['backtest']['slippage_bps'],
+            cfg['backtest']['initial_equity'], with_recorded=True)
+        metrics.append(summary_batch(equity, ledger["variant"], ledger["pnl"], cfg['backtest']['initial_equity'],
+                                     recorded))
+        log.info(f"{min(start + batch_size, len(combos))}/{len(combos)} combinations done")
+
+    counts = scorers[-1].families.counts
+    log.info("Distinct computations per timeframe: " + ", ".join(f"{v} {k}" for k, v in counts.items())
+             + f"; {len(scorers[-1].terms)} score terms")
+
+    params = pd.DataFrame([{".".join(path): (value if not isinstance(value, list) else "/".join(map(str, value)))
+                            for path, value in _combo_values(f, grid)} for f in combos])
+    df = pd.concat([params, pd.concat(metrics, ignore_index=True)[[*OBJECTIVES, "num_trades"]]], axis=1)
+    df = df.sort_values(objective, ascending=False, kind="stable").reset_index(drop=True)
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out, index=False)
+    print(df.head(10).to_string(index=False))
+    print(f"Feature sweep → {out}")
+    return df
+
+
+def _combo_values(feats: dict, grid: dict):
+    for path, _ in _leaves(grid):
+        node = feats
+        for key in path:
+            node = node[key]
+        yield path, node
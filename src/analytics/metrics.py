@@ -53,3 +53,192 @@ def summary(curve_df: pd.DataFrame, trades_df: pd.DataFrame, start_equity: float
         "drawdown_series": dd_series,
     }
     return out
+
+
+class RunningSummary:
+    """``summary`` accumulated over consecutive blocks of one equity curve and their closed trades.
+
+    ``update`` returns the block's drawdown series so it can be written out as it goes. Drawdown,
+    total return, win rate and trade count match ``summary`` exactly; the Sharpe ratio and profit
+    factor are merged from per-block sums, so they agree to floating-point rounding.
+    """
+
+    def __init__(self):
+        self.bars = 0
+        self.first = self.last = None
+        self.peak = -np.inf
+        self.mdd = np.inf
+        self.n_returns, self.mean, self.m2 = 0, 0.0, 0.0
+        self.n_trades, self.wins, self.gains, self.losses = 0, 0, 0.0, 0.0
+
+    def update(self, curve_df: pd.DataFrame, trades_df: pd.DataFrame | None = None) -> pd.Series:
+        eq = curve_df['equity']
+        values = eq.to_numpy(dtype=np.float64)
+        if len(values):
+            prev = np.concatenate(([np.nan if self.last is None else self.last], values[:-1]))
+            rets = values / prev - 1.0
+            rets = rets[~np.isnan(rets)]
+            if len(rets):
+                n, mean = len(rets), rets.mean()
+                m2 = ((rets - mean) ** 2).sum()
+                total = self.n_returns + n
+                delta = mean - self.mean
+                self.m2 += m2 + delta * delta * self.n_returns * n / total
+                self.mean += delta * n / total
+                self.n_returns = total
+            if self.first is None:
+                self.first = values[0]
+            self.last = values[-1]
+            self.bars += len(values)
+        roll_max = np.maximum(np.maximum.accumulate(values), self.peak) if len(values) else values
+        drawdown = pd.Series(values / roll_max - 1.0, index=eq.index, name=eq.name)
+        if len(values):
+            self.peak = roll_max[-1]
+            self.mdd = min(self.mdd, float(drawdown.min()))
+        if trades_df is not None and not trades_df.empty:
+            pnl = trades_df['pnl']
+            self.n_trades += len(trades_df)
+            self.wins += int((pnl > 0).sum())
+            self.gains += pnl[pnl > 0].sum()
+            self.losses += -pnl[pnl < 0].sum()
+        return drawdown
+
+    def result(self, start_equity: float, periods_per_year: int = 365*24) -> dict:
+        std = np.sqrt(self.m2 / self.n_returns) if self.n_returns else 0.0
+        sharpe = 0.0 if std == 0 else float(np.sqrt(periods_per_year) * self.mean / (std + 1e-12))
+        tret = (self.last / self.first - 1.0) * 100.0 if self.bars >= 2 else 0.0
+        pf = 0.0 if not self.n_trades else (float(self.gains / self.losses) if self.losses > 0 else float('inf'))
+        return {
+            "start_equity": float(start_equity),
+            "end_equity": float(self.last),
+            "total_return": float(tret),
+            "sharpe_ratio": sharpe,
+            "max_drawdown": float(self.mdd*100.0),
+            "win_rate": float(self.wins / self.n_trades * 100.0) if self.n_trades else 0.0,
+            "profit_factor": pf,
+            "num_trades": int(self.n_trades),
+        }
+
+
+def _ffill_recorded(equity: np.ndarray, recorded: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Carry each variant's last recorded equity over unrecorded bars (the first recorded value
+    over leading ones); also return the index of each variant's first recorded bar."""
+    pos = np.arange(equity.shape[1])
+    first = np.where(recorded.any(axis=1), recorded.argmax(axis=1), 0)
+    src = np.maximum.accumulate(np.where(recorded, pos, -1), axis=1)
+    src = np.where(src < 0, first[:, None], src)
+    return np.take_along_axis(equity, src, axis=1), first
+
+
+def summary_batch(equity: np.ndarray, trade_variant: np.ndarray, trade_pnl: np.ndarray, start_equity,
+                  recorded: np.ndarray | None = None, periods_per_year: int = 365*24) -> pd.DataFrame:
+    """``summary`` for many equity curves at once: one row per variant, same keys (without the
+    drawdown series).
+
+    ``equity`` is ``(variants, bars)`` as returned by ``bt_long_sl_tp_batch``; trades are given as
+    a grouped ledger, the producing variant and pnl of each closed trade. ``recorded`` masks out
+    bars a single-curve run leaves off its curve (rejected entries).
+
+    Each statistic equals ``summary`` on the same curve and trades exactly, except that the
+    profit factor's per-variant sums (and, with ``recorded``, the Sharpe sums) are grouped
+    differently and can differ in the last bit.
+    """
+    equity = np.atleast_2d(np.asarray(equity, dtype=np.float64))
+    n_variants, n = equity.shape
+    if recorded is None:
+        curve, first, last = equity, np.zeros(n_variants, dtype=np.int64), np.full(n_variants, n - 1)
+        rets = curve[:, 1:] / curve[:, :-1] - 1.0
+        mean = rets.mean(axis=1)
+        std = rets.std(axis=1)
+        n_kept = np.full(n_variants, n)
+    else:
+        recorded = np.atleast_2d(recorded)
+        curve, first = _ffill_recorded(equity, recorded)
+        last = n - 1 - recorded[:, ::-1].argmax(axis=1)
+        n_kept = recorded.sum(axis=1)
+        valid = recorded[:, 1:] & (np.arange(1, n) > first[:, None])
+        rets = np.where(valid, equity[:, 1:] / curve[:, :-1] - 1.0, 0.0)
+        count = np.maximum(valid.sum(axis=1), 1)
+        mean = rets.sum(axis=1) / count
+        std = np.sqrt(np.where(valid, (rets - mean[:, None]) ** 2, 0.0).sum(axis=1) / count)
+    rows = np.arange(n_variants)
+    end = equity[rows, last]
+    start = equity[rows, first]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where((n_kept < 2) | (std == 0), 0.0, np.sqrt(periods_per_year) * mean / (std + 1e-12))
+        mdd = (curve / np.maximum.accumulate(curve, axis=1) - 1.0).min(axis=1)
+        tret = np.where(n_kept < 2, 0.0, (end / start - 1.0) * 100.0)
+
+        trade_variant = np.asarray(trade_variant, dtype=np.int64)
+        trade_pnl = np.asarray(trade_pnl, dtype=np.float64)
+        n_trades = np.bincount(trade_variant, minlength=n_variants)
+        wins = np.bincount(trade_variant, weights=trade_pnl > 0, minlength=n_variants)
+        gains = np.bincount(trade_variant, weights=np.where(trade_pnl > 0, trade_pnl, 0.0), minlength=n_variants)
+        losses = -np.bincount(trade_variant, weights=np.where(trade_pnl < 0, trade_pnl, 0.0), minlength=n_variants)
+        win_rate_ = np.where(n_trades > 0, wins / n_trades, 0.0)
+        pf = np.where(n_trades == 0, 0.0, np.where(losses > 0, gains / losses, np.inf))
+
+    return pd.DataFrame({
+        "start_equity": np.broadcast_to(np.asarray(start_equity, dtype=np.float64), (n_variants,)),
+        "end_equity": end,
+        "total_return": tret,
+        "sharpe_ratio": sharpe,
+        "max_drawdown": mdd * 100.0,
+        "win_rate": win_rate_ * 100.0,
+        "profit_factor": pf,
+        "num_trades": n_trades,
+    })
+
+
+def rolling_sharpe(equity: np.ndarray, window: int, periods_per_year: int = 365*24) -> np.ndarray:
+    """Sharpe ratio of the last ``window`` bar returns at every bar, per curve (rows of a 2-D
+    array or a single 1-D curve); NaN until ``window`` returns exist.
+
+    Windowed sums come from running prefix sums, so the cost is linear in bars whatever the
+    window. Returns are centred on each curve's mean first to keep the variance well conditioned.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    curves = np.atleast_2d(equity)
+    out = np.full(curves.shape, np.nan)
+    if curves.shape[1] <= window:
+        return out.reshape(equity.shape)
+    rets = curves[:, 1:] / curves[:, :-1] - 1.0
+    centred = rets - rets.mean(axis=1, keepdims=True)
+    zero = np.zeros((len(curves), 1))
+    s1 = np.concatenate((zero, np.cumsum(centred, axis=1)), axis=1)
+    s2 = np.concatenate((zero, np.cumsum(centred * centred, axis=1)), axis=1)
+    win1 = s1[:, window:] - s1[:, :-window]
+    mean = win1 / window
+    var = np.maximum((s2[:, window:] - s2[:, :-window]) / window - mean * mean, 0.0)
+    # Prefix sums leave rounding residue where every return in the window is the same (flat
+    # stretches while out of the market); like pandas, count value changes to zero those exactly.
+    changes = np.concatenate((zero, np.cumsum(rets[:, 1:] != rets[:, :-1], axis=1)), axis=1)
+    var[changes[:, window - 1:] == changes[:, :rets.shape[1] - window + 1]] = 0.0
+    std = np.sqrt(var)
+    mean += rets.mean(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[:, window:] = np.where(std == 0, 0.0, np.sqrt(periods_per_year) * mean / (std + 1e-12))
+    return out.reshape(equity.shape)
+
+
+def rolling_drawdown(equity: np.ndarray, window: int) -> np.ndarray:
+    """Drawdown from the highest equity of the last ``window`` bars (fewer at the start), per
+    curve (rows of a 2-D array or a single 1-D curve).
+
+    The windowed maximum uses the van Herk/Gil-Werman block scheme: a forward and a backward
+    running max per block of ``window`` bars, so each bar costs O(1) for any window.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    curves = np.atleast_2d(equity)
+    n_curves, n = curves.shape
+    pad = window - 1
+    n_blocks = -(-(n + pad) // window)
+    padded = np.full((n_curves, n_blocks * window), -np.inf)
+    padded[:, pad:pad + n] = curves
+    blocks = padded.reshape(n_curves, n_blocks, window)
+    forward = np.maximum.accumulate(blocks, axis=2).reshape(n_curves, -1)
+    backward = np.maximum.accumulate(blocks[:, :, ::-1], axis=2)[:, :, ::-1].reshape(n_curves, -1)
+    # The window ending at padded position j spans [j - pad, j]: the backward max from its start
+    # to its block's end and the forward max from the next block's start to j.
+    peak = np.maximum(backward[:, :n], forward[:, pad:pad + n])
+    return (curves / peak - 1.0).reshape(equity.shape)
@@ -0,0 +1,186 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.analytics.metrics import compute_returns
+from src.analytics.trade_report import generate_trade_log
+from src.core.backtest_runner import build_engine, gate_signals, prepare_inputs, run_backtest
+
+METHODS = ("trade_shuffle", "cost_noise", "bar_bootstrap")
+# Each batch holds at most this many path x step cells per array, so memory stays bounded
+# (~32 MB per float64 array) whatever the number of paths or the length of the history.
+BATCH_CELLS = 4_000_000
+
+# Set once per worker process by the pool initializer.
+_WORKER_STATE: dict | None = None
+
+
+def trade_returns(trades_df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Per-trade return and fees+slippage paid, both as fractions of the equity at entry.
+
+    Positions never overlap and are sized off equity, so compounding ``1 + r`` in order
+    reproduces the closed-trade equity curve exactly.
+    """
+    if trades_df is None or trades_df.empty:
+        return np.empty(0), np.empty(0)
+    equity = trades_df['equity_at_entry'].to_numpy(dtype=np.float64)
+    ret = trades_df['pnl'].to_numpy(dtype=np.float64) / equity
+    cost = (trades_df['entry_fee'].to_numpy(dtype=np.float64) + trades_df['exit_fee'].to_numpy(dtype=np.float64)) / equity
+    return ret, cost
+
+
+def _path_stats(log_eq: np.ndarray, ruin_log: float) -> dict[str, np.ndarray]:
+    """Total return, max drawdown (both %) and ruin flag for each row of a log-equity matrix
+    that starts from 0 (the starting equity) before its first column."""
+    peak = np.maximum(np.maximum.accumulate(log_eq, axis=1), 0.0)
+    return {
+        "total_return": np.expm1(log_eq[:, -1]) * 100.0,
+        "max_drawdown": np.minimum(np.expm1((log_eq - peak).min(axis=1)), 0.0) * 100.0,
+        "ruined": log_eq.min(axis=1) <= ruin_log,
+    }
+
+
+def _batch(method: str, data: dict, params: dict, rows: int, seed: np.random.SeedSequence) -> dict:
+    rng = np.random.default_rng(seed)
+    ruin_log = np.log(params["ruin_level"])
+    if method == "bar_bootstrap":
+        log_rets, sum1, sum2 = data["bar_log_returns"], data["bar_sum1"], data["bar_sum2"]
+        n, block = len(log_rets), min(params["block_bars"], len(log_rets))
+        n_blocks = -(-n // block)
+        starts = rng.integers(0, n - block + 1, size=(rows, n_blocks))
+        log_eq = log_rets[(starts[:, :, None] + np.arange(block)).reshape(rows, -1)[:, :n]]
+        out = _path_stats(np.cumsum(log_eq, axis=1, out=log_eq), ruin_log)
+        # Sharpe from per-block sums of r and r^2 (prefix-sum differences); the last block is cut short.
+        ends = starts + block
+        ends[:, -1] = starts[:, -1] + n - (n_blocks - 1) * block
+        mean = (sum1[ends] - sum1[starts]).sum(axis=1) / n
+        std = np.sqrt(np.maximum((sum2[ends] - sum2[starts]).sum(axis=1) / n - mean * mean, 0.0))
+        sharpe = np.sqrt(params["periods_per_year"]) * mean / (std + 1e-12)
+        out["sharpe_ratio"] = np.where(std == 0, 0.0, sharpe)
+        return out
+
+    ret = data["trade_returns"]
+    if method == "trade_shuffle":
+        sampled = rng.permuted(np.broadcast_to(ret, (rows, len(ret))), axis=1)
+    else:
+        # Re-price each trade's costs: fees drawn uniformly within +/- fee_jitter of the
+        # configured rate, slippage exponential with the configured rate as its mean.
+        fees, slip = params["fees_bps"], params["slippage_bps"]
+        jitter = params["fee_jitter"]
+        drawn = fees * rng.uniform(1 - jitter, 1 + jitter, (rows, len(ret))) + rng.exponential(slip, (rows, len(ret)))
+        sampled = ret + data["trade_costs"] * (1 - drawn / max(fees + slip, 1e-12))
+    return _path_stats(np.cumsum(np.log1p(sampled), axis=1), ruin_log)
+
+
+def _init_worker(data: dict, params: dict):
+    global _WORKER_STATE
+    _WORKER_STATE = {"data": data, "params": params}
+
+
+def _batch_in_worker(task: tuple) -> dict:
+    return _batch(task[0], _WORKER_STATE["data"], _WORKER_STATE["params"], *task[1:])
+
+
+def _interval(values: np.ndarray, percentiles) -> dict:
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {f"p{p:g}": None for p in percentiles} | {"mean": None}
+    return {f"p{p:g}": float(v) for p, v in zip(percentiles, np.percentile(values, percentiles))} | \
+        {"mean": float(values.mean())}
+
+
+def monte_carlo(curve_df: pd.DataFrame, trades_df: pd.DataFrame, fees_bps: float, slippage_bps: float,
+                paths: int = 100_000, block_bars: int = 24, fee_jitter: float = 0.25, ruin_level: float = 0.5,
+                percentiles=(5, 50, 95), seed: int | None = None, workers: int = 1,
+                methods=METHODS, periods_per_year: int = 365*24) -> dict:
+    """Confidence intervals for return, drawdown and risk of ruin from one backtest.
+
+    - ``trade_shuffle``: the closed trades compounded in random order. The final return is the
+      same on every path; the spread is in the drawdown and ruin.
+    - ``cost_noise``: the trades in their original order with each one's fees and slippage
+      re-drawn (see ``_batch``).
+    - ``bar_bootstrap``: moving-block bootstrap of the equity curve's bar returns in blocks of
+      ``block_bars``, which keeps volatility clustering within a block; also reports Sharpe.
+
+    Trade methods see closed-trade equity only, so their drawdowns ignore open-position swings.
+    Ruin is equity at or below ``ruin_level`` x the starting equity at any point. Paths are
+    simulated as ``(paths, steps)`` matrices in fixed-size batches, each with its own child seed,
+    so the result for a given ``seed`` is the same for any number of ``workers``.
+    """
+    trade_ret, trade_cost = trade_returns(trades_df)
+    bar_ret = compute_returns(curve_df['equity']).to_numpy(dtype=np.float64)
+    data = {"trade_returns": trade_ret, "trade_costs": trade_cost, "bar_log_returns": np.log1p(bar_ret),
+            "bar_sum1": np.concatenate(([0.0], np.cumsum(bar_ret))),
+            "bar_sum2": np.concatenate(([0.0], np.cumsum(bar_ret * bar_ret)))}
+    params = {"block_bars": max(int(block_bars), 1), "fees_bps": fees_bps, "slippage_bps": slippage_bps,
+              "fee_jitter": fee_jitter, "ruin_level": ruin_level, "periods_per_year": periods_per_year}
+
+    tasks = []
+    for method, method_seed in zip(methods, np.random.SeedSequence(seed).spawn(len(methods))):
+        steps = len(data["bar_log_returns" if method == "bar_bootstrap" else "trade_returns"])
+        if not steps:
+            continue
+        rows = max(1, min(paths, BATCH_CELLS // steps))
+        sizes = [min(rows, paths - start) for start in range(0, paths, rows)]
+        tasks += [(method, size, s) for size, s in zip(sizes, method_seed.spawn(len(sizes)))]
+
+    workers = max(1, min(workers or 1, len(tasks)))
+    if workers == 1:
+        results = [_batch(method, data, params, rows, s) for method, rows, s in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data, params)) as pool:
+            results = list(pool.map(_batch_in_worker, tasks))
+
+    out = {}
+    for method in methods:
+        batches = [r for (m, _, _), r in zip(tasks, results) if m == method]
+        if not batches:
+            out[method] = None
+            continue
+        stats = {k: np.concatenate([b[k] for b in batches]) for k in batches[0]}
+        ruined = stats.pop("ruined")
+        out[method] = {k: _interval(v, percentiles) for k, v in stats.items()} | \
+            {"risk_of_ruin": float(ruined.mean()), "paths": int(len(ruined))}
+    return out
+
+
+def run_robustness(cfg_path: str = "config/settings.yaml", paths: int | None = None, workers: int | None = None,
+                   seed: int | None = None, out_path: str | Path = "data/features/robustness.json") -> dict:
+    """Backtest the configured strategy once and write ``monte_carlo`` intervals for it to
+    ``out_path``. Settings default to the ``robustness`` config section."""
+    cfg = yaml.safe_load(Path(cfg_path).read_text())
+    rb = cfg.get('robustness', {})
+    paths = paths or rb.get('paths', 100_000)
+    workers = workers or rb.get('workers') or 1
+    seed = rb.get('seed') if seed is None else seed
+    percentiles = rb.get('percentiles', [5, 50, 95])
+
+    inputs = prepare_inputs(cfg)
+    entries, exits = gate_signals(build_engine(cfg), inputs)
+    curve, records = run_backtest(cfg, inputs, entries, exits)
+    trades_df = generate_trade_log(records)
+
+    print(f"Simulating {paths:,} paths per method over {len(trades_df)} trades / {len(curve):,} bars "
+          f"on {workers} worker(s)...")
+    result = monte_carlo(curve, trades_df, cfg['backtest']['fees_bps'], cfg['backtest']['slippage_bps'],
+                         paths=paths, block_bars=rb.get('block_bars', 24), fee_jitter=rb.get('fee_jitter', 0.25),
+                         ruin_level=rb.get('ruin_level', 0.5), percentiles=percentiles,
+                         seed=seed, workers=workers)
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump({"symbol": inputs.symbol, "tf_entry": inputs.tf_entry, "seed": seed, **result}, f, indent=2)
+    lo, hi = f"p{min(percentiles):g}", f"p{max(percentiles):g}"
+    for method, r in result.items():
+        if r is None:
+            print(f"{method}: skipped (no trades)")
+            continue
+        ret, dd = r["total_return"], r["max_drawdown"]
+        print(f"{method}: return {ret[lo]:.2f}%..{ret[hi]:.2f}% | max drawdown {dd[lo]:.2f}%..{dd[hi]:.2f}% "
+              f"| risk of ruin {r['risk_of_ruin']:.2%}")
+    print(f"Robustness → {out_path}")
+    return result
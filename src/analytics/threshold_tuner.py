@@ -1,25 +1,66 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
 from pathlib import Path
 import pandas as pd
 import yaml
-from src.core.backtest_runner import run_strategy
+from src.backtest.intrabar import IntrabarResolver
+from src.core.backtest_runner import (StrategyInputs, build_engine, gate_signals, intrabar_resolver, prepare_inputs,
+                                      run_backtest)
+from src.analytics.metrics import summary as metrics_summary
+from src.analytics.trade_report import generate_trade_log
 
+# Set once per worker process by the pool initializer so the prepared series are pickled
+# once per worker instead of once per grid cell, and the intrabar resolver's fine candles
+# are loaded once per worker.
+_WORKER_STATE: tuple[dict, StrategyInputs, IntrabarResolver | None] | None = None
 
-def scan_thresholds(buy_values=[0.2, 0.3, 0.4, 0.5], sell_values=[-0.2, -0.3, -0.4, -0.5]):
-    results = []
-    cfg_path = Path("config/settings.yaml")
-    base_cfg = yaml.safe_load(cfg_path.read_text())
 
-    for b in buy_values:
-        for s in sell_values:
-            base_cfg['confluence']['thresholds']['buy'] = b
-            base_cfg['confluence']['thresholds']['sell'] = s
-            cfg_path.write_text(yaml.dump(base_cfg))
-            print(f"Testing buy={b}, sell={s}...")
-            run_strategy()  # your backtest run
-            # read latest metrics
-            m = yaml.safe_load(Path("data/features/metrics_summary.json").read_text())
-            results.append({"buy": b, "sell": s, **m})
+def _init_worker(cfg: dict, inputs: StrategyInputs):
+    global _WORKER_STATE
+    _WORKER_STATE = (cfg, inputs, intrabar_resolver(cfg, inputs))
+
+
+def evaluate_thresholds(cfg: dict, inputs: StrategyInputs, buy: float, sell: float,
+                        intrabar: IntrabarResolver | None = None) -> dict:
+    engine = build_engine(cfg, buy=buy, sell=sell)
+    entries, exits = gate_signals(engine, inputs)
+    curve, trade_records = run_backtest(cfg, inputs, entries, exits, intrabar)
+    m = metrics_summary(curve, generate_trade_log(trade_records), cfg['backtest']['initial_equity'])
+    m.pop("drawdown_series")
+    return {"buy": buy, "sell": sell, **m}
+
+
+def _evaluate_in_worker(pair: tuple[float, float]) -> dict:
+    cfg, inputs, intrabar = _WORKER_STATE
+    return evaluate_thresholds(cfg, inputs, *pair, intrabar=intrabar)
+
+
+def scan_thresholds(buy_values=[0.2, 0.3, 0.4, 0.5], sell_values=[-0.2, -0.3, -0.4, -0.5],
+                    cfg_path: str = "config/settings.yaml", workers: int | None = None,
+                    out_path: str = "data/features/threshold_scan.csv") -> pd.DataFrame:
+    """Evaluate every buy/sell threshold pair against one shared data load.
+
+    OHLCV, indicators and sentiment are built once, and so is the intrabar resolver (per worker);
+    each grid cell only re-runs gating, the backtest and metrics. Neither ``settings.yaml`` nor the single-run report files are touched.
+    """
+    cfg = yaml.safe_load(Path(cfg_path).read_text())
+    inputs = prepare_inputs(cfg)
+    pairs = list(product(buy_values, sell_values))
+
+    workers = min(workers or os.cpu_count() or 1, len(pairs))
+    print(f"Evaluating {len(pairs)} threshold pairs on {workers} worker(s)...")
+    if workers <= 1:
+        intrabar = intrabar_resolver(cfg, inputs)
+        results = [evaluate_thresholds(cfg, inputs, b, s, intrabar) for b, s in pairs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(cfg, inputs)) as pool:
+            results = list(pool.map(_evaluate_in_worker, pairs))
 
     df = pd.DataFrame(results)
-    df.to_csv("data/features/threshold_scan.csv", index=False)
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out, index=False)
     print(df)
+    return df
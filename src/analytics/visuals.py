@@ -1,11 +1,78 @@
+import json
+from pathlib import Path
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
 
+from src.utils.profiling import span
 
-def plot_equity_curve_matplotlib(curve_df: pd.DataFrame, drawdown: pd.Series, save_path: str | None = None):
+DEFAULT_MAX_POINTS = 5_000
+WEBGL_MIN_POINTS = 1_000
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Positions of the first, lowest, highest and last point of each of ``max_points // 4``
+    equal buckets, in order, so every peak and trough of the series survives."""
+    n = len(y)
+    n_buckets = max_points // 4
+    if n <= max_points or n_buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    starts, width = edges[:-1], int(np.diff(edges).max())
+    # Every bucket is either width or width - 1 long; pad the short ones with their last point.
+    cols = np.minimum(starts[:, None] + np.arange(width), edges[1:, None] - 1)
+    vals = y[cols]
+    picks = np.stack([starts, cols[np.arange(n_buckets), np.nanargmin(vals, axis=1)],
+                      cols[np.arange(n_buckets), np.nanargmax(vals, axis=1)], edges[1:] - 1], axis=1)
+    return np.unique(picks)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: positions of ``max_points`` points that keep the visual
+    shape of the line, always including the first and last."""
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    out = np.empty(max_points, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample(series: pd.Series, max_points: int = DEFAULT_MAX_POINTS, method: str = "minmax") -> pd.Series:
+    """``series`` reduced to about ``max_points`` points by ``minmax`` bucketing or ``lttb``."""
+    if len(series) <= max_points:
+        return series
+    y = series.to_numpy(dtype=np.float64)
+    if method == "lttb":
+        idx = lttb_indices(np.arange(len(y)), y, max_points)
+    elif method == "minmax":
+        idx = minmax_indices(y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method {method!r}; expected 'minmax' or 'lttb'")
+    return series.iloc[idx]
+
+
+def _scatter(n_points: int, webgl_min_points: int):
+    import plotly.graph_objects as go
+    return go.Scattergl if n_points >= webgl_min_points else go.Scatter
+
+
+def plot_equity_curve_matplotlib(curve_df: pd.DataFrame, drawdown: pd.Series, save_path: str | None = None,
+                                 max_points: int = DEFAULT_MAX_POINTS, method: str = "minmax"):
     import matplotlib.pyplot as plt
+    equity = downsample(curve_df['equity'], max_points, method)
     fig, ax1 = plt.subplots(figsize=(10, 5))
-    ax1.plot(curve_df.index, curve_df['equity'], label='Equity', lw=2)
+    ax1.plot(equity.index, equity, label='Equity', lw=2)
     ax1.set_title('Equity Curve')
     ax1.set_ylabel('Equity')
     ax1.grid(True)
@@ -15,17 +82,32 @@ def plot_equity_curve_matplotlib(curve_df: pd.DataFrame, drawdown: pd.Series, sa
 
 
 def create_html_dashboard(curve_df: pd.DataFrame, drawdown: pd.Series, trades_df: pd.DataFrame, metrics: dict,
-                          save_path: str):
+                          save_path: str, max_points: int = DEFAULT_MAX_POINTS, method: str = "minmax",
+                          webgl_min_points: int = WEBGL_MIN_POINTS):
+    """Plotly dashboard of equity, drawdown and trades. Both curves are downsampled to
+    ``max_points``; traces of ``webgl_min_points`` or more are drawn with WebGL."""
+    import plotly.graph_objects as go
+    equity = downsample(curve_df['equity'], max_points, method)
+    dd = downsample(drawdown, max_points, method)
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=curve_df.index, y=curve_df['equity'], mode='lines', name='Equity Curve'))
-    fig.add_trace(go.Scatter(x=drawdown.index, y=drawdown.values, fill='tozeroy', mode='lines', name='Drawdown',
-                             opacity=0.2))
+    fig.add_trace(_scatter(len(equity), webgl_min_points)(x=equity.index, y=equity.to_numpy(), mode='lines',
+                                                           name='Equity Curve'))
+    fig.add_trace(_scatter(len(dd), webgl_min_points)(x=dd.index, y=dd.to_numpy() * 100.0, fill='tozeroy',
+                                                       mode='lines', name='Drawdown (%)', opacity=0.2, yaxis='y2'))
     if trades_df is not None and len(trades_df) > 0:
-        fig.add_trace(go.Scatter(x=trades_df['entry_time'], y=trades_df['entry'], mode='markers', name='BUY',
-                                 marker=dict(symbol='triangle-up', size=10)))
-        fig.add_trace(go.Scatter(x=trades_df['exit_time'], y=trades_df['exit'], mode='markers', name='SELL',
-                                 marker=dict(symbol='triangle-down', size=10)))
-    fig.update_layout(title='Equity Dashboard', xaxis_title='Time', yaxis_title='Value',
+        # Markers sit on the equity curve (equity at entry, and after the trade's pnl at exit);
+        # the hover shows the fill price.
+        marker = _scatter(len(trades_df), webgl_min_points)
+        entry_equity = trades_df['equity_at_entry']
+        fig.add_trace(marker(x=trades_df['entry_time'], y=entry_equity, customdata=trades_df['entry_price'],
+                             mode='markers', name='BUY', marker=dict(symbol='triangle-up', size=10),
+                             hovertemplate='%{x}<br>entry %{customdata:,.2f}<extra>BUY</extra>'))
+        fig.add_trace(marker(x=trades_df['exit_time'], y=entry_equity + trades_df['pnl'],
+                             customdata=trades_df['exit_price'], mode='markers', name='SELL',
+                             marker=dict(symbol='triangle-down', size=10),
+                             hovertemplate='%{x}<br>exit %{customdata:,.2f}<extra>SELL</extra>'))
+    fig.update_layout(title='Equity Dashboard', xaxis_title='Time', yaxis_title='Equity',
+                      yaxis2=dict(title='Drawdown (%)', overlaying='y', side='right', showgrid=False),
                       legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1))
     kpis = {
         "Total Return (%)": f"{metrics.get('total_return', 0):.2f}",
@@ -42,3 +124,51 @@ def create_html_dashboard(curve_df: pd.DataFrame, drawdown: pd.Series, trades_df
                        text=kpi_text, showarrow=False, align="right",
                        bordercolor="black", borderwidth=1, bgcolor="white", opacity=0.9)
     fig.write_html(save_path, include_plotlyjs="cdn")
+
+
+def write_charts(curve_df: pd.DataFrame, drawdown: pd.Series, trades_df: pd.DataFrame, metrics: dict,
+                 out_dir: Path, reports: dict | None = None):
+    """``equity_plot.png`` and ``equity_dashboard.html`` in ``out_dir``, per the ``reports`` config;
+    each render is its own profiling span."""
+    reports = reports or {}
+    max_points = reports.get('max_points', DEFAULT_MAX_POINTS)
+    method = reports.get('downsample', 'minmax')
+    out_dir = Path(out_dir)
+    with span("chart_png", rows=len(curve_df)):
+        plot_equity_curve_matplotlib(curve_df, drawdown, str(out_dir / "equity_plot.png"), max_points, method)
+    with span("chart_html", rows=len(curve_df)):
+        create_html_dashboard(curve_df, drawdown, trades_df, metrics, str(out_dir / "equity_dashboard.html"),
+                              max_points, method, reports.get('webgl_min_points', WEBGL_MIN_POINTS))
+
+
+def render_reports(out_dir: Path | str, reports: dict | None = None):
+    """Draw the charts of a finished run from the files it wrote (``equity.parquet``,
+    ``trades_summary.csv``, ``metrics_summary.json``); works for chunked runs too."""
+    out_dir = Path(out_dir)
+    curve = pd.read_parquet(out_dir / "equity.parquet")
+    equity = curve['equity']
+    drawdown = equity / equity.cummax() - 1.0
+    trades_path = out_dir / "trades_summary.csv"
+    try:
+        trades_df = pd.read_csv(trades_path, parse_dates=["entry_time", "exit_time"])
+    except (FileNotFoundError, pd.errors.EmptyDataError):  # a run without trades writes an empty file
+        trades_df = pd.DataFrame()
+    metrics = json.loads((out_dir / "metrics_summary.json").read_text())
+    write_charts(curve, drawdown, trades_df, metrics, out_dir, reports)
+
+
+def render_reports_in_background(out_dir: Path | str, reports: dict | None = None):
+    """Start ``manage.py dashboard`` for ``out_dir`` in a detached process and return at once; its
+    output goes to ``out_dir/report.log``. A separate interpreter rather than ``multiprocessing``,
+    so it also works from pool workers."""
+    import subprocess
+    import sys
+    reports = reports or {}
+    out_dir = Path(out_dir)
+    manage = Path(__file__).resolve().parents[2] / "manage.py"
+    args = [sys.executable, str(manage), "dashboard", "--dir", str(out_dir),
+            "--max-points", str(reports.get('max_points', DEFAULT_MAX_POINTS)),
+            "--downsample", reports.get('downsample', 'minmax'),
+            "--webgl-min-points", str(reports.get('webgl_min_points', WEBGL_MIN_POINTS))]
+    with open(out_dir / "report.log", "w") as log_file:
+        subprocess.Popen(args, stdout=log_file, stderr=subprocess.STDOUT, start_new_session=True)
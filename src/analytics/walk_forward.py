@@ -0,0 +1,215 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.analytics.metrics import summary as metrics_summary, summary_batch
+from src.analytics.trade_report import generate_trade_log
+from src.backtest.engine_sl_tp import bt_long_sl_tp_batch
+from src.core.backtest_runner import StrategyInputs, build_engine, gate_signals, prepare_inputs, run_backtest
+from src.signals.risk import RiskModel
+from src.utils.shared_arrays import SharedArrays
+
+OBJECTIVES = ("sharpe_ratio", "total_return", "max_drawdown", "profit_factor", "win_rate")
+DEFAULT_GRID = {
+    "buy": [0.2, 0.3, 0.4],
+    "sell": [-0.2, -0.3, -0.4],
+    "sl_atr_mult": [1.5, 2.0, 3.0],
+    "tp_rr": [1.5, 2.0, 3.0],
+}
+_SERIES = ("open", "high", "low", "close", "total_low", "total_high_on_low", "total_mid_on_low", "atr")
+
+# Set once per worker process by the pool initializer: the config and read-only views of the
+# prepared series in shared memory.
+_WORKER_STATE: tuple[dict, StrategyInputs, SharedArrays] | None = None
+
+
+def make_folds(n_bars: int, train_bars: int, test_bars: int, anchored: bool = False) -> list[tuple[int, int, int, int]]:
+    """``(train_start, train_end, test_start, test_end)`` bar ranges; consecutive test windows tile the
+    history after the first training window. Rolling windows keep ``train_bars``; anchored ones
+    always start at bar 0."""
+    folds = []
+    train_end = train_bars
+    while train_end < n_bars:
+        test_end = min(train_end + test_bars, n_bars)
+        folds.append((0 if anchored else train_end - train_bars, train_end, train_end, test_end))
+        train_end = test_end
+    return folds
+
+
+def slice_inputs(inputs: StrategyInputs, start: int, stop: int) -> StrategyInputs:
+    return StrategyInputs(
+        symbol=inputs.symbol,
+        tf_entry=inputs.tf_entry,
+        df_low=inputs.df_low.iloc[start:stop],
+        total_low=inputs.total_low.iloc[start:stop],
+        total_high_on_low=inputs.total_high_on_low.iloc[start:stop],
+        total_mid_on_low=inputs.total_mid_on_low.iloc[start:stop],
+        atr_series=inputs.atr_series.iloc[start:stop],
+    )
+
+
+def share_inputs(inputs: StrategyInputs) -> SharedArrays:
+    df = inputs.df_low
+    arrays = {"timestamp": df.index.as_unit("ns").asi8}
+    arrays.update({c: df[c].to_numpy() for c in ("open", "high", "low", "close")})
+    arrays.update(total_low=inputs.total_low.to_numpy(), total_high_on_low=inputs.total_high_on_low.to_numpy(),
+                  total_mid_on_low=inputs.total_mid_on_low.to_numpy(), atr=inputs.atr_series.to_numpy())
+    return SharedArrays.create(arrays)
+
+
+def inputs_from_shared(shared: SharedArrays, symbol: str, tf_entry: str) -> StrategyInputs:
+    """``StrategyInputs`` whose frames are zero-copy views of the shared arrays."""
+    index = pd.DatetimeIndex(shared["timestamp"].view("M8[ns]"), name="timestamp")
+    series = {name: pd.Series(shared[name], index=index, copy=False) for name in _SERIES}
+    df = pd.DataFrame({c: series[c] for c in ("open", "high", "low", "close")}, copy=False)
+    return StrategyInputs(symbol=symbol, tf_entry=tf_entry, df_low=df, total_low=series["total_low"],
+                          total_high_on_low=series["total_high_on_low"],
+                          total_mid_on_low=series["total_mid_on_low"], atr_series=series["atr"])
+
+
+def optimise_window(cfg: dict, inputs: StrategyInputs, grid: dict = DEFAULT_GRID, objective: str = "sharpe_ratio",
+                    min_trades: int = 1) -> dict:
+    """Best grid cell on one window: every threshold pair is gated once and all (thresholds x risk)
+    variants are backtested together with ``bt_long_sl_tp_batch``.
+
+    Cells with fewer than ``min_trades`` trades are only chosen when no cell has enough.
+    """
+    pairs = list(product(grid["buy"], grid["sell"]))
+    risks = list(product(grid["sl_atr_mult"], grid["tp_rr"]))
+    signals = [gate_signals(build_engine(cfg, buy=b, sell=s), inputs) for b, s in pairs]
+    entries = np.repeat(np.stack([e.to_numpy() for e, _ in signals]), len(risks), axis=0)
+    exits = np.repeat(np.stack([x.to_numpy() for _, x in signals]), len(risks), axis=0)
+    models = [RiskModel(cfg['risk']['risk_per_trade'], sl, tp) for sl, tp in risks] * len(pairs)
+    equity, ledger, recorded = bt_long_sl_tp_batch(inputs.df_low, entries, exits, inputs.atr_series, models,
+                                                   cfg['backtest']['fees_bps'], cfg['backtest']['slippage_bps'],
+                                                   cfg['backtest']['initial_equity'], with_recorded=True)
+
+    cells = pd.DataFrame([{"buy": b, "sell": s, "sl_atr_mult": sl, "tp_rr": tp}
+                          for (b, s), (sl, tp) in product(pairs, risks)])
+    m = summary_batch(equity, ledger["variant"], ledger["pnl"], cfg['backtest']['initial_equity'], recorded)
+    cells = pd.concat([cells, m[[*OBJECTIVES, "num_trades"]]], axis=1)
+    eligible = cells[cells["num_trades"] >= min_trades]
+    if eligible.empty:
+        eligible = cells
+    return eligible.loc[[eligible[objective].idxmax()]].to_dict("records")[0]
+
+
+def _init_worker(cfg: dict, spec: dict, symbol: str, tf_entry: str):
+    global _WORKER_STATE
+    shared = SharedArrays.attach(spec)
+    _WORKER_STATE = (cfg, inputs_from_shared(shared, symbol, tf_entry), shared)
+
+
+def _optimise_fold_in_worker(task: tuple) -> dict:
+    cfg, inputs, _ = _WORKER_STATE
+    return _optimise_fold(cfg, inputs, *task)
+
+
+def _optimise_fold(cfg: dict, inputs: StrategyInputs, fold: tuple[int, int, int, int], grid: dict,
+                   objective: str, min_trades: int) -> dict:
+    train_start, train_end, _, _ = fold
+    best = optimise_window(cfg, slice_inputs(inputs, train_start, train_end), grid, objective, min_trades)
+    return {f"train_{k}" if k in OBJECTIVES or k == "num_trades" else k: v for k, v in best.items()}
+
+
+def _evaluate_params(cfg: dict, inputs: StrategyInputs, params: dict, initial_equity: float):
+    cfg = {
+        **cfg,
+        'risk': {**cfg['risk'], 'sl_atr_mult': params['sl_atr_mult'], 'tp_rr': params['tp_rr']},
+        'backtest': {**cfg['backtest'], 'initial_equity': initial_equity},
+    }
+    entries, exits = gate_signals(build_engine(cfg, buy=params['buy'], sell=params['sell']), inputs)
+    return run_backtest(cfg, inputs, entries, exits)
+
+
+def walk_forward(cfg_path: str = "config/settings.yaml", train_bars: int | None = None, test_bars: int | None = None,
+                 anchored: bool | None = None, objective: str | None = None, workers: int | None = None,
+                 out_dir: str | Path = "data/walk_forward") -> pd.DataFrame:
+    """Walk-forward optimisation of the confluence thresholds and SL/TP multiples.
+
+    Each fold picks the best grid cell on its training window by ``objective`` and trades it
+    out of sample on the following test window. Training runs in parallel across worker
+    processes that read the prepared candles and scores from shared memory. Test windows are then
+    run in order, each starting from the equity the previous one ended with, and stitched into one
+    out-of-sample curve. Settings default to the ``walk_forward`` config section.
+
+    Writes ``folds.csv`` (per-fold parameters and train/test metrics), ``oos_equity.csv``,
+    ``oos_trades.csv`` and ``oos_summary.json`` to ``out_dir``; returns the fold table.
+    """
+    cfg = yaml.safe_load(Path(cfg_path).read_text())
+    wf = cfg.get('walk_forward', {})
+    train_bars = train_bars or wf.get('train_bars', 600)
+    test_bars = test_bars or wf.get('test_bars', 200)
+    anchored = wf.get('anchored', False) if anchored is None else anchored
+    objective = objective or wf.get('objective', 'sharpe_ratio')
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; expected one of {', '.join(OBJECTIVES)}")
+    grid = {**DEFAULT_GRID, **wf.get('grid', {})}
+    min_trades = wf.get('min_trades', 3)
+
+    inputs = prepare_inputs(cfg)
+    folds = make_folds(len(inputs.df_low), train_bars, test_bars, anchored)
+    if not folds:
+        raise ValueError(f"{len(inputs.df_low)} bars is not enough for a {train_bars}-bar training window")
+    tasks = [(fold, grid, objective, min_trades) for fold in folds]
+    workers = max(1, min(workers or wf.get('workers') or os.cpu_count() or 1, len(folds)))
+    n_cells = np.prod([len(v) for v in grid.values()])
+    print(f"Walk-forward: {len(folds)} {'anchored' if anchored else 'rolling'} folds x {n_cells} cells "
+          f"on {workers} worker(s), objective {objective}...")
+
+    if workers == 1:
+        best = [_optimise_fold(cfg, inputs, *task) for task in tasks]
+    else:
+        shared = share_inputs(inputs)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(cfg, shared.spec, inputs.symbol, inputs.tf_entry)) as pool:
+                best = list(pool.map(_optimise_fold_in_worker, tasks))
+        finally:
+            shared.unlink()
+
+    equity = cfg['backtest']['initial_equity']
+    rows, curves, trades = [], [], []
+    for i, (fold, params) in enumerate(zip(folds, best)):
+        train_start, train_end, test_start, test_end = fold
+        curve, records = _evaluate_params(cfg, slice_inputs(inputs, test_start, test_end), params, equity)
+        fold_trades = generate_trade_log(records)
+        m = metrics_summary(curve, fold_trades, equity)
+        m.pop("drawdown_series")
+        index = inputs.df_low.index
+        rows.append({
+            "fold": i,
+            "train_start": index[train_start], "train_end": index[train_end - 1],
+            "test_start": index[test_start], "test_end": index[test_end - 1],
+            **params,
+            **{f"test_{k}": m[k] for k in (*OBJECTIVES, "num_trades")},
+        })
+        print(f"fold {i}: buy={params['buy']} sell={params['sell']} sl={params['sl_atr_mult']} "
+              f"tp={params['tp_rr']} | train {objective}={params[f'train_{objective}']:.3f} "
+              f"test {objective}={m[objective]:.3f}, {m['num_trades']} trades")
+        curves.append(curve)
+        trades.append(fold_trades.assign(fold=i))
+        equity = m["end_equity"]
+
+    folds_df = pd.DataFrame(rows)
+    oos_curve = pd.concat(curves)
+    oos_trades = pd.concat(trades, ignore_index=True)
+    summary = metrics_summary(oos_curve, oos_trades, cfg['backtest']['initial_equity'])
+    summary.pop("drawdown_series")
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    folds_df.to_csv(out_dir / "folds.csv", index=False)
+    oos_curve.to_csv(out_dir / "oos_equity.csv")
+    oos_trades.to_csv(out_dir / "oos_trades.csv", index=False)
+    with open(out_dir / "oos_summary.json", "w") as f:
+        json.dump({"folds": len(folds), "objective": objective, "anchored": anchored,
+                   "train_bars": train_bars, "test_bars": test_bars, **summary}, f, indent=2)
+    print(f"Out-of-sample: {summary['total_return']:.2f}% return, Sharpe {summary['sharpe_ratio']:.2f}, "
+          f"max drawdown {summary['max_drawdown']:.2f}%, {summary['num_trades']} trades → {out_dir}")
+    return folds_df
@@ -1,118 +1,435 @@
+from dataclasses import dataclass, field
+from typing import Sequence
+import numpy as np
 import pandas as pd
 
+EXIT_REASONS = ("stop_loss", "take_profit", "signal_exit")
+STOP_LOSS, TAKE_PROFIT, SIGNAL_EXIT = range(len(EXIT_REASONS))
 
-def bt_long_sl_tp(df: pd.DataFrame, entries: pd.Series, exits: pd.Series, atr_series: pd.Series,
-                  risk_model, fees_bps: int = 7, slippage_bps: int = 5,
-                  initial_equity: float = 10_000.0):
-    price = df['close']
-    high = df['high']
-    low = df['low']
-    open_ = df.get('open', price)
+_LEDGER_FLOAT_COLS = (
+    "entry_price", "exit_price", "qty", "stop_loss", "take_profit", "entry_fee", "exit_fee",
+    "capital_risked", "entry_cost", "equity_at_entry", "pnl",
+)
+
+
+@dataclass
+class TradeLedger:
+    """Columnar record of closed trades, one row per trade.
+
+    Bars are stored as integer positions into the candle index so a ledger can be shared by
+    many variants over the same candles; ``variant`` says which one produced each row.
+    """
+
+    capacity: int = 64
+    size: int = 0
+    cols: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        capacity = max(int(self.capacity), 1)
+        self.capacity = capacity
+        self.cols = {
+            "variant": np.empty(capacity, dtype=np.int32),
+            "entry_idx": np.empty(capacity, dtype=np.int64),
+            "exit_idx": np.empty(capacity, dtype=np.int64),
+            "exit_reason": np.empty(capacity, dtype=np.int8),
+            **{c: np.empty(capacity, dtype=np.float64) for c in _LEDGER_FLOAT_COLS},
+        }
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, col: str) -> np.ndarray:
+        return self.cols[col][:self.size]
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, arr in self.cols.items():
+            grown = np.empty(self.capacity, dtype=arr.dtype)
+            grown[:self.size] = arr[:self.size]
+            self.cols[name] = grown
+
+    def append(self, **row):
+        if self.size == self.capacity:
+            self._grow()
+        i = self.size
+        for name, value in row.items():
+            self.cols[name][i] = value
+        self.size += 1
+
+    def to_frame(self, index: pd.Index | None = None) -> pd.DataFrame:
+        df = pd.DataFrame({name: self[name] for name in self.cols})
+        df["exit_reason"] = np.asarray(EXIT_REASONS, dtype=object)[df["exit_reason"].to_numpy()]
+        if index is not None:
+            df.insert(1, "entry_time", index[df["entry_idx"].to_numpy()])
+            df.insert(2, "exit_time", index[df["exit_idx"].to_numpy()])
+        return df
+
+    def to_records(self, index: pd.Index, variant: int | None = None) -> list[dict]:
+        """Return the legacy list-of-dicts trade format for one variant (or all rows)."""
+        rows = slice(None) if variant is None else np.flatnonzero(self["variant"] == variant)
+        c = {name: arr[:self.size][rows].tolist() for name, arr in self.cols.items()}
+        # One vectorised lookup per column instead of a scalar index lookup per trade.
+        entry_times = index[self["entry_idx"][rows]].tolist()
+        exit_times = index[self["exit_idx"][rows]].tolist()
+        records = []
+        for i, (entry_time, exit_time) in enumerate(zip(entry_times, exit_times)):
+            pnl = c["pnl"][i]
+            records.append({
+                "entry_time": entry_time,
+                "entry_price": c["entry_price"][i],
+                "qty": c["qty"][i],
+                "entry_fee": c["entry_fee"][i],
+                "stop_loss": c["stop_loss"][i],
+                "take_profit": c["take_profit"][i],
+                "capital_risked": c["capital_risked"][i],
+                "entry_cost": c["entry_cost"][i],
+                "equity_at_entry": c["equity_at_entry"][i],
+                "exit_time": exit_time,
+                "exit_price": c["exit_price"][i],
+                "exit_fee": c["exit_fee"][i],
+                "pnl": pnl,
+                "pnl_pct": float(pnl / c["equity_at_entry"][i]),
+                "return_on_risk": float(pnl / max(c["capital_risked"][i], 1e-9)),
+                "holding_period": exit_time - entry_time,
+                "exit_reason": EXIT_REASONS[c["exit_reason"][i]],
+            })
+        return records
+
+
+def _first_exit_bar(low: np.ndarray, high: np.ndarray, exits: np.ndarray, sl: float, tp: float,
+                    start: int) -> int:
+    """Index of the first bar at or after ``start`` that touches SL/TP or carries an exit signal."""
+    n = len(low)
+    step = 64
+    # float64 levels so float32 prices are compared as the float64 values they stand for.
+    sl, tp = np.float64(sl), np.float64(tp)
+    while start < n:
+        stop = min(n, start + step)
+        hit = (low[start:stop] <= sl) | (high[start:stop] >= tp) | exits[start:stop]
+        if hit.any():
+            return start + int(hit.argmax())
+        start = stop
+        step = min(step * 2, 1 << 16)
+    return -1
 
-    fee_rate = (fees_bps + slippage_bps) / 10_000
 
-    cash = initial_equity
+def _size_long(risk_model, equity_now: float, cash: float, entry_price: float, atr: float, fee_rate: float,
+               max_notional: float | None = None):
+    """Size a long entry off ``equity_now``, capped by the cash available (and ``max_notional``).
+
+    Returns ``(qty, legs, entry_fee, total_cost)``, or None when the entry must be rejected.
+    """
+    legs = risk_model.construct(equity_now, entry_price, atr, "LONG")
+    qty = max(0.0, float(legs.get("qty", 0.0)))
+    if qty <= 0:
+        return None
+    max_affordable_qty = (
+        cash / (entry_price * (1 + fee_rate)) if entry_price > 0 else 0.0
+    )
+    if max_affordable_qty > 0 and qty > max_affordable_qty:
+        qty = max_affordable_qty
+    if max_notional is not None and qty * entry_price > max_notional:
+        qty = max(max_notional, 0.0) / entry_price
+    gross_cost = qty * entry_price
+    entry_fee = gross_cost * fee_rate
+    total_cost = gross_cost + entry_fee
+    if total_cost > cash or qty <= 0:
+        return None
+    return qty, legs, entry_fee, total_cost
+
+
+def nearer_level(bar_open: float, sl: float, tp: float) -> int:
+    """``STOP_LOSS`` or ``TAKE_PROFIT``, whichever level is nearer the bar open (SL on ties)."""
+    if max(bar_open - sl, 0.0) <= max(tp - bar_open, 0.0):
+        return STOP_LOSS
+    return TAKE_PROFIT
+
+
+def _exit_fill(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, sl: float, tp: float,
+               j: int, resolve=None) -> tuple[float, int]:
+    """Exit price and reason on bar ``j``, found by ``_first_exit_bar``. When a bar touches both
+    levels, ``resolve(j, sl, tp)`` (e.g. an ``IntrabarResolver``) may say which came first;
+    otherwise the one nearer the open is assumed to have been hit first."""
+    hit_sl = low[j].item() <= sl
+    hit_tp = high[j].item() >= tp
+    if hit_sl and hit_tp:
+        reason = resolve(j, sl, tp) if resolve is not None else None
+        if reason is None:
+            reason = nearer_level(open_[j].item(), sl, tp)
+        return (sl, STOP_LOSS) if reason == STOP_LOSS else (tp, TAKE_PROFIT)
+    if hit_sl:
+        return sl, STOP_LOSS
+    if hit_tp:
+        return tp, TAKE_PROFIT
+    return close[j].item(), SIGNAL_EXIT
+
+
+def _simulate_long_sl_tp(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                         entries: np.ndarray, exits: np.ndarray, atr: np.ndarray, risk_model,
+                         fee_rate: float, initial_equity: float, ledger: TradeLedger, variant: int = 0,
+                         carry: dict | None = None, offset: int = 0, resolve=None):
+    """Event-driven long-only SL/TP simulation over contiguous arrays.
+
+    Instead of visiting every bar, the kernel jumps from one entry signal to the next while
+    flat and from entry to the first SL/TP/exit touch while in a position, filling the
+    equity curve for the bars in between with a single vector operation. Arithmetic and the
+    order of checks on each visited bar mirror the original per-bar loop exactly.
+
+    Returns ``(equity, recorded)``; ``recorded`` is False on bars where an entry was attempted
+    but rejected, which the legacy loop left out of its curve.
+
+    ``carry`` (a dict, updated in place) holds cash and any open position between calls over
+    consecutive blocks of bars; ``offset`` is the position of the block's first bar, so ledger
+    rows index the whole history. ``resolve`` settles bars touching both SL and TP (see
+    ``_exit_fill``).
+
+    Prices and ATR may be float32 (compact mode): they are read as float64 per visited bar and
+    per filled span, so the arithmetic is that of float64 arrays without copying the history.
+    """
+    n = len(close)
+    equity = np.empty(n, dtype=np.float64)
+    recorded = np.ones(n, dtype=bool)
+    entry_bars = np.flatnonzero(entries)
+
+    cash = float(initial_equity)
     position_qty = 0.0
-    entry_price = None
-    entry_time = None
-    sl = None
-    tp = None
-    active_trade = None
+    sl = tp = None
+    trade = None
+    if carry:
+        cash, position_qty, sl, tp, trade = (carry[k] for k in ("cash", "position_qty", "sl", "tp", "trade"))
 
-    curve = []
-    trades: list[dict] = []
+    def try_entry(k: int, equity_now: float) -> bool:
+        nonlocal cash, position_qty, sl, tp, trade
+        entry_price = close[k].item()
+        sized = _size_long(risk_model, equity_now, cash, entry_price, float(atr[k]), fee_rate)
+        if sized is None:
+            return False
+        qty, legs, entry_fee, total_cost = sized
+        cash -= total_cost
+        position_qty = qty
+        sl, tp = legs["sl"], legs["tp"]
+        trade = {
+            "entry_idx": k + offset,
+            "entry_price": float(entry_price),
+            "qty": float(qty),
+            "entry_fee": float(entry_fee),
+            "stop_loss": float(sl),
+            "take_profit": float(tp),
+            "capital_risked": float(abs(entry_price - sl) * qty),
+            "entry_cost": float(total_cost),
+            "equity_at_entry": float(equity_now),
+        }
+        return True
 
-    for ts in df.index:
-        mark_price = price.loc[ts]
-        equity = cash + position_qty * mark_price
+    def enter_at(k: int, equity_now: float):
+        if entries[k] and not try_entry(k, equity_now):
+            recorded[k] = False
+        equity[k] = cash + position_qty * close[k].item()
 
+    def mark_to_market(a: int, b: int):
+        # equity = cash + qty * close over bars [a, b), computed in place in float64.
+        out = equity[a:b]
+        np.multiply(close[a:b], position_qty, out=out, dtype=np.float64)
+        out += cash
+
+    i = 0
+    while i < n:
         if position_qty > 0:
-            hit_sl = (low.loc[ts] <= sl) if sl is not None else False
-            hit_tp = (high.loc[ts] >= tp) if tp is not None else False
-            exit_px = None
-            exit_reason = None
-            if hit_sl and hit_tp:
-                bar_open = open_.loc[ts]
-                dist_sl = max(bar_open - sl, 0.0)
-                dist_tp = max(tp - bar_open, 0.0)
-                if dist_sl <= dist_tp:
-                    exit_px = sl
-                    exit_reason = "stop_loss"
-                else:
-                    exit_px = tp
-                    exit_reason = "take_profit"
-            elif hit_sl:
-                exit_px = sl
-                exit_reason = "stop_loss"
-            elif hit_tp:
-                exit_px = tp
-                exit_reason = "take_profit"
-            elif bool(exits.get(ts, False)):
-                exit_px = mark_price
-                exit_reason = "signal_exit"
-
-            if exit_px is not None:
-                gross_proceeds = position_qty * exit_px
-                exit_fee = gross_proceeds * fee_rate
-                cash += gross_proceeds - exit_fee
-                realized_pnl = gross_proceeds - exit_fee - active_trade["entry_cost"]
-                active_trade.update({
-                    "exit_time": ts,
-                    "exit_price": float(exit_px),
-                    "exit_fee": float(exit_fee),
-                    "pnl": float(realized_pnl),
-                    "pnl_pct": float(realized_pnl / active_trade["equity_at_entry"]),
-                    "return_on_risk": float(
-                        realized_pnl / max(active_trade["capital_risked"], 1e-9)
-                    ),
-                    "holding_period": ts - active_trade["entry_time"],
-                    "exit_reason": exit_reason,
-                })
-                trades.append(active_trade)
-
-                position_qty = 0.0
-                entry_price = None
-                entry_time = None
-                sl = None
-                tp = None
-                active_trade = None
-                equity = cash
-
-        if position_qty == 0 and bool(entries.get(ts, False)):
-            entry_price = mark_price
-            atr_val = float(atr_series.loc[ts])
-            legs = risk_model.construct(equity, entry_price, atr_val, "LONG")
-            sl, tp = legs["sl"], legs["tp"]
-            qty = max(0.0, float(legs.get("qty", 0.0)))
-            if qty <= 0:
-                continue
-            max_affordable_qty = (
-                cash / (entry_price * (1 + fee_rate)) if entry_price > 0 else 0.0
-            )
-            if max_affordable_qty > 0 and qty > max_affordable_qty:
-                qty = max_affordable_qty
-            gross_cost = qty * entry_price
-            entry_fee = gross_cost * fee_rate
-            total_cost = gross_cost + entry_fee
-            if total_cost > cash or qty <= 0:
-                continue
-            cash -= total_cost
-            position_qty = qty
-            entry_time = ts
-            active_trade = {
-                "entry_time": ts,
-                "entry_price": float(entry_price),
-                "qty": float(qty),
-                "entry_fee": float(entry_fee),
-                "stop_loss": float(sl),
-                "take_profit": float(tp),
-                "capital_risked": float(abs(entry_price - sl) * qty),
-                "entry_cost": float(total_cost),
-                "equity_at_entry": float(equity),
-            }
-
-        equity = cash + position_qty * mark_price
-        curve.append((ts, equity))
-
-    curve_df = pd.DataFrame(curve, columns=['timestamp', 'equity']).set_index('timestamp')
-    return curve_df, trades
+            j = _first_exit_bar(low, high, exits, sl, tp, i)
+            if j < 0:
+                mark_to_market(i, n)
+                break
+            mark_to_market(i, j)
+
+            exit_px, reason = _exit_fill(open_, high, low, close, sl, tp, j, resolve)
+            gross_proceeds = position_qty * exit_px
+            exit_fee = gross_proceeds * fee_rate
+            cash += gross_proceeds - exit_fee
+            realized_pnl = gross_proceeds - exit_fee - trade["entry_cost"]
+            ledger.append(variant=variant, exit_idx=j + offset, exit_reason=reason,
+                          exit_price=float(exit_px), exit_fee=float(exit_fee),
+                          pnl=float(realized_pnl), **trade)
+            position_qty = 0.0
+            sl = tp = None
+            trade = None
+            enter_at(j, cash)
+            i = j + 1
+        else:
+            pos = int(np.searchsorted(entry_bars, i))
+            if pos == len(entry_bars):
+                mark_to_market(i, n)
+                break
+            k = int(entry_bars[pos])
+            mark_to_market(i, k)
+            enter_at(k, cash + position_qty * close[k].item())
+            i = k + 1
+
+    if carry is not None:
+        carry.update(cash=cash, position_qty=position_qty, sl=sl, tp=tp, trade=trade)
+    return equity, recorded
+
+
+def _float_array(values) -> np.ndarray:
+    """``values`` as a float array, a view when already float32/float64 (compact frames are not upcast)."""
+    arr = np.asarray(values)
+    return arr if arr.dtype.kind == "f" else arr.astype(np.float64)
+
+
+def _market_arrays(df: pd.DataFrame):
+    price = _float_array(df['close'])
+    high = _float_array(df['high'])
+    low = _float_array(df['low'])
+    open_ = _float_array(df['open']) if 'open' in df else price
+    return open_, high, low, price
+
+
+def _bar_array(values, index: pd.Index, dtype=None, fill=None) -> np.ndarray:
+    """``values`` per bar of ``index`` as ``dtype``; with ``dtype`` None any float dtype is kept."""
+    if isinstance(values, pd.Series) and not values.index.equals(index):
+        values = values.reindex(index, fill_value=fill) if fill is not None else values.reindex(index)
+    if dtype is None:
+        return _float_array(values)
+    return np.asarray(values, dtype=dtype)
+
+
+def _curve_frame(equity: np.ndarray, recorded: np.ndarray, index: pd.Index) -> pd.DataFrame:
+    """The equity curve over the recorded bars, wrapping the masked array without another copy."""
+    if not recorded.all():
+        equity, index = equity[recorded], index[recorded]
+    # rename() gives a new Index over the same values, so the caller's index keeps its name.
+    return pd.DataFrame({'equity': equity}, index=index.rename('timestamp'), copy=False)
+
+
+def bt_long_sl_tp(df: pd.DataFrame, entries: pd.Series, exits: pd.Series, atr_series: pd.Series,
+                  risk_model, fees_bps: int = 7, slippage_bps: int = 5,
+                  initial_equity: float = 10_000.0, intrabar=None):
+    """Long-only ATR SL/TP backtest. With ``intrabar`` (an ``IntrabarResolver``), bars touching
+    both SL and TP are settled from finer candles: the run is repeated while it meets ambiguous
+    bars not yet loaded, each time loading them in one batch."""
+    open_, high, low, price = _market_arrays(df)
+    entries_a = _bar_array(entries, df.index, bool, fill=False)
+    exits_a = _bar_array(exits, df.index, bool, fill=False)
+    atr_a = _bar_array(atr_series, df.index)
+    while True:
+        ledger = TradeLedger(capacity=int(entries_a.sum()))
+        if intrabar is not None:
+            intrabar.start_run()
+        equity, recorded = _simulate_long_sl_tp(
+            open_, high, low, price, entries_a, exits_a, atr_a,
+            risk_model, (fees_bps + slippage_bps) / 10_000, initial_equity, ledger, resolve=intrabar,
+        )
+        if intrabar is None or not intrabar.load_pending():
+            break
+
+    return _curve_frame(equity, recorded, df.index), ledger.to_records(df.index)
+
+
+class ChunkedLongSlTp:
+    """``bt_long_sl_tp`` fed one block of consecutive bars at a time.
+
+    Cash and any open position carry across blocks, so the concatenated curves and trades equal
+    one ``bt_long_sl_tp`` call over all the bars while only a block is ever held in memory.
+    """
+
+    def __init__(self, risk_model, fees_bps: int = 7, slippage_bps: int = 5, initial_equity: float = 10_000.0):
+        self.risk_model = risk_model
+        self.fee_rate = (fees_bps + slippage_bps) / 10_000
+        self.initial_equity = initial_equity
+        self.carry: dict = {}
+        self.offset = 0
+        self.open_entry: tuple[int, pd.Timestamp] | None = None  # (position, time) of a carried trade
+
+    def run_block(self, df: pd.DataFrame, entries: pd.Series, exits: pd.Series, atr_series: pd.Series):
+        """Advance over ``df``; returns its ``(curve_df, trade_records)`` like ``bt_long_sl_tp``."""
+        open_, high, low, price = _market_arrays(df)
+        entries_a = _bar_array(entries, df.index, bool, fill=False)
+        ledger = TradeLedger(capacity=int(entries_a.sum()))
+        equity, recorded = _simulate_long_sl_tp(
+            open_, high, low, price,
+            entries_a,
+            _bar_array(exits, df.index, bool, fill=False),
+            _bar_array(atr_series, df.index),
+            self.risk_model, self.fee_rate, self.initial_equity, ledger,
+            carry=self.carry, offset=self.offset,
+        )
+
+        # Ledger rows hold positions in the whole history: map them to times through this block's
+        # index plus the entry time of a position opened in an earlier block.
+        times = pd.Series(df.index, index=pd.RangeIndex(self.offset, self.offset + len(df)))
+        if self.open_entry is not None:
+            times = pd.concat([pd.Series([self.open_entry[1]], index=[self.open_entry[0]]), times])
+        records = ledger.to_records(times)
+        trade = self.carry.get("trade")
+        if trade is None:
+            self.open_entry = None
+        elif trade["entry_idx"] >= self.offset:
+            self.open_entry = (trade["entry_idx"], df.index[trade["entry_idx"] - self.offset])
+        self.offset += len(df)
+
+        return _curve_frame(equity, recorded, df.index), records
+
+
+def _per_variant(value, n_variants: int) -> list:
+    if isinstance(value, (list, tuple, np.ndarray, pd.Series)):
+        values = list(value)
+        if len(values) != n_variants:
+            raise ValueError(f"Expected {n_variants} per-variant values, got {len(values)}")
+        return values
+    return [value] * n_variants
+
+
+def bt_long_sl_tp_batch(df: pd.DataFrame, entries, exits, atr_series, risk_models,
+                        fees_bps: int | Sequence[int] = 7, slippage_bps: int | Sequence[int] = 5,
+                        initial_equity: float | Sequence[float] = 10_000.0, with_recorded: bool = False):
+    """Backtest many variants over the same candles in one call.
+
+    ``entries``/``exits`` are ``(variants, bars)`` boolean arrays (a DataFrame is read column
+    per variant; a 1-D signal is shared by every variant). ``atr_series`` may be shared or
+    per variant. ``risk_models``, ``fees_bps``, ``slippage_bps`` and ``initial_equity`` are
+    either shared or given one per variant.
+
+    Returns ``(equity, ledger)``: a ``(variants, bars)`` equity matrix and a single
+    ``TradeLedger`` whose ``variant`` column identifies the producing variant. ``with_recorded``
+    adds the matching mask of bars a single ``bt_long_sl_tp`` curve keeps (see ``summary_batch``).
+    """
+    open_, high, low, price = _market_arrays(df)
+    n = len(price)
+
+    def as_matrix(values, dtype=None):
+        if isinstance(values, pd.DataFrame):
+            values = values.reindex(df.index, fill_value=False if dtype is bool else np.nan).to_numpy(dtype=dtype).T
+        elif isinstance(values, pd.Series):
+            values = _bar_array(values, df.index, dtype, fill=False if dtype is bool else None)
+        arr = np.asarray(values, dtype=dtype) if dtype is not None else _float_array(values)
+        if arr.ndim == 1:
+            arr = arr[None, :]
+        if arr.shape[1] != n:
+            raise ValueError(f"Signal length {arr.shape[1]} does not match {n} bars")
+        return arr
+
+    entries_m = as_matrix(entries, bool)
+    exits_m = as_matrix(exits, bool)
+    atr_m = as_matrix(atr_series)
+    sized = [len(risk_models)] if isinstance(risk_models, (list, tuple)) else []
+    sized += [len(v) for v in (fees_bps, slippage_bps, initial_equity)
+              if isinstance(v, (list, tuple, np.ndarray, pd.Series))]
+    n_variants = max([entries_m.shape[0], exits_m.shape[0], atr_m.shape[0], *sized])
+    entries_m = np.broadcast_to(entries_m, (n_variants, n))
+    exits_m = np.broadcast_to(exits_m, (n_variants, n))
+    atr_m = np.broadcast_to(atr_m, (n_variants, n))
+    models = _per_variant(risk_models, n_variants)
+    fees = _per_variant(fees_bps, n_variants)
+    slips = _per_variant(slippage_bps, n_variants)
+    start_eq = _per_variant(initial_equity, n_variants)
+
+    equity = np.empty((n_variants, n), dtype=np.float64)
+    recorded = np.empty((n_variants, n), dtype=bool)
+    ledger = TradeLedger(capacity=int(entries_m.sum()))
+    for v in range(n_variants):
+        equity[v], recorded[v] = _simulate_long_sl_tp(
+            open_, high, low, price, entries_m[v], exits_m[v], atr_m[v], models[v],
+            (fees[v] + slips[v]) / 10_000, start_eq[v], ledger, variant=v,
+        )
+    if with_recorded:
+        return equity, ledger, recorded
+    return equity, ledger
@@ -0,0 +1,66 @@
+from typing import Callable
+import numpy as np
+import pandas as pd
+
+from src.backtest.engine_sl_tp import STOP_LOSS, TAKE_PROFIT, nearer_level
+from src.utils.timeframes import timeframe_to_ms
+
+
+class IntrabarResolver:
+    """Which of SL and TP a bar touching both hit first, from finer candles loaded on demand.
+
+    The simulation calls it only for such ambiguous bars. A bar whose fine candles are cached is
+    settled by the first fine candle to touch a level (the open-distance rule only applies if
+    that candle touches both). Any other bar is noted in ``pending`` and falls back to the
+    open-distance rule for now; ``load_pending`` then loads all of them with one ``load_ranges``
+    call and the backtest is re-run, until a run needs no new bar (see ``bt_long_sl_tp``).
+    Only the few ambiguous bars are ever loaded, never the whole fine history.
+
+    ``load_ranges`` takes ``[start, end)`` millisecond ranges and returns the fine candles in them.
+    """
+
+    def __init__(self, index: pd.DatetimeIndex, timeframe: str,
+                 load_ranges: Callable[[list[tuple[int, int]]], pd.DataFrame]):
+        self.ts = index.as_unit("ms").asi8
+        self.bar_ms = timeframe_to_ms(timeframe)
+        self.load_ranges = load_ranges
+        # Bar open (ms) -> (open, high, low) of its fine candles; empty when none are available.
+        self.cache: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self.pending: set[int] = set()
+        self.resolved = self.fallback = 0
+
+    def start_run(self):
+        self.resolved = self.fallback = 0
+
+    def __call__(self, j: int, sl: float, tp: float) -> int | None:
+        """``STOP_LOSS``/``TAKE_PROFIT`` for bar ``j``, or None to use the open-distance rule."""
+        start = int(self.ts[j])
+        fine = self.cache.get(start)
+        if fine is None:
+            self.pending.add(start)
+            self.fallback += 1
+            return None
+        open_, high, low = fine
+        touched = np.flatnonzero((low <= sl) | (high >= tp))
+        if not len(touched):  # the fine candles disagree with the bar: keep the coarse rule
+            self.fallback += 1
+            return None
+        m = touched[0]
+        self.resolved += 1
+        if low[m] <= sl and high[m] >= tp:
+            return nearer_level(open_[m], sl, tp)
+        return STOP_LOSS if low[m] <= sl else TAKE_PROFIT
+
+    def load_pending(self) -> bool:
+        """Load the fine candles of every pending bar in one batch; False if there were none."""
+        if not self.pending:
+            return False
+        starts = np.array(sorted(self.pending), dtype=np.int64)
+        self.pending.clear()
+        fine = self.load_ranges([(int(s), int(s) + self.bar_ms) for s in starts]).sort_index()
+        ts = fine.index.as_unit("ms").asi8
+        lo, hi = ts.searchsorted(starts), ts.searchsorted(starts + self.bar_ms)
+        cols = [fine[c].to_numpy(dtype=np.float64) for c in ("open", "high", "low")]
+        for s, a, b in zip(starts.tolist(), lo.tolist(), hi.tolist()):
+            self.cache[s] = tuple(c[a:b] for c in cols)
+        return True
@@ -0,0 +1,218 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+from src.backtest.engine_sl_tp import (TradeLedger, _bar_array, _exit_fill, _first_exit_bar, _market_arrays,
+                                       _size_long)
+
+# Event kinds, in processing order within one timestamp: exits free cash before entries use it.
+_EXIT, _ENTRY = 0, 1
+
+
+class _Book:
+    """One symbol's bars and signals as contiguous arrays, plus its position state."""
+
+    def __init__(self, df: pd.DataFrame, entries, exits, atr_series):
+        self.index = df.index
+        self.ts = df.index.as_unit("ns").asi8
+        self.open, self.high, self.low, self.close = _market_arrays(df)
+        self.entries = _bar_array(entries, df.index, bool, fill=False)
+        self.exits = _bar_array(exits, df.index, bool, fill=False)
+        self.atr = _bar_array(atr_series, df.index)
+        self.entry_bars = np.flatnonzero(self.entries)
+        self.step = None  # timeline position of every bar, set once the timeline is known
+        self.aligned = False  # True when the symbol has a bar at every timeline position
+        self.qty = 0.0
+        self.sl = self.tp = None
+        self.trade = None
+        self.rejected = 0
+
+    def mark(self, step: int) -> float:
+        """Last close at or before timeline position ``step``."""
+        return self.close[step if self.aligned else self.step.searchsorted(step, side="right") - 1].item()
+
+
+def bt_portfolio_long_sl_tp(streams: dict, risk_model, fees_bps: int = 7, slippage_bps: int = 5,
+                            initial_equity: float = 10_000.0, max_symbol_exposure: float | None = None,
+                            max_total_exposure: float | None = None):
+    """Long-only ATR SL/TP backtest of many symbols against one shared cash pool.
+
+    ``streams`` maps each symbol to ``(df, entries, exits, atr_series)`` as for ``bt_long_sl_tp``.
+    The symbols' bars are merged into one timeline and events are taken from a heap holding each
+    symbol's next one: its next entry signal while flat, else the first bar that touches its
+    SL/TP or carries an exit signal. Bars in between are never visited. At one timestamp exits go
+    first, then entries, each in symbol order.
+
+    Entries are sized by ``risk_model`` off the portfolio equity (cash plus open positions at
+    their last close), then capped by the cash available, by ``max_symbol_exposure`` x equity for
+    the new position and by ``max_total_exposure`` x equity for all open positions together.
+    Per symbol the rules are those of ``bt_long_sl_tp``, so one symbol without caps gives the same
+    trades and equity (this curve also keeps the bars of rejected entries).
+
+    Returns ``(curve_df, trade_records, attribution)``: the portfolio curve over the merged
+    timeline (equity, cash, gross exposure, utilisation, open positions), the closed trades with a
+    ``symbol`` field, and one attribution row per symbol.
+    """
+    symbols = list(streams)
+    books = [_Book(*streams[s]) for s in symbols]
+    fee_rate = (fees_bps + slippage_bps) / 10_000
+    timeline = np.unique(np.concatenate([b.ts for b in books])) if books else np.empty(0, dtype=np.int64)
+    for b in books:
+        b.step = np.searchsorted(timeline, b.ts)
+        b.aligned = len(b.ts) == len(timeline)
+
+    ledger = TradeLedger(capacity=max(sum(len(b.entry_bars) for b in books), 1))
+    heap: list[tuple[int, int, int, int]] = []
+    opened: dict[int, _Book] = {}  # open positions by symbol number
+    cash = float(initial_equity)
+    cash_steps, cash_values = [], []
+    # Symbols whose entry found no cash, by the bar it was rejected at. Only an exit adds cash, so
+    # each waits for the next one instead of retrying (and failing) at every entry signal.
+    waiting: dict[int, int] = {}
+
+    def schedule_entry(s: int, start: int):
+        b = books[s]
+        pos = b.entry_bars.searchsorted(start)
+        if pos < len(b.entry_bars):
+            k = int(b.entry_bars[pos])
+            heapq.heappush(heap, (int(b.step[k]), _ENTRY, s, k))
+
+    for s in range(len(books)):
+        schedule_entry(s, 0)
+
+    while heap:
+        step, kind, s, k = heapq.heappop(heap)
+        b = books[s]
+        if kind == _EXIT:
+            exit_px, reason = _exit_fill(b.open, b.high, b.low, b.close, b.sl, b.tp, k)
+            gross_proceeds = b.qty * exit_px
+            exit_fee = gross_proceeds * fee_rate
+            cash += gross_proceeds - exit_fee
+            ledger.append(variant=s, exit_idx=k, exit_reason=reason, exit_price=float(exit_px),
+                          exit_fee=float(exit_fee), pnl=float(gross_proceeds - exit_fee - b.trade["entry_cost"]),
+                          **b.trade)
+            b.qty, b.sl, b.tp, b.trade = 0.0, None, None, None
+            del opened[s]
+            cash_steps.append(step)
+            cash_values.append(cash)
+            if b.entries[k]:  # the exit bar's own entry signal, after the other exits at this time
+                heapq.heappush(heap, (step, _ENTRY, s, k))
+            else:
+                schedule_entry(s, k + 1)
+            for w, since in waiting.items():
+                # Resume at the first bar at or after this time; the signals skipped meanwhile
+                # would all have been rejected.
+                wb = books[w]
+                resume = int(wb.step.searchsorted(step))
+                wb.rejected += int(wb.entry_bars.searchsorted(resume) - wb.entry_bars.searchsorted(since, "right"))
+                schedule_entry(w, resume)
+            waiting.clear()
+            continue
+
+        if cash <= 0:  # no size fits: _size_long would reject
+            b.rejected += 1
+            waiting[s] = k
+            continue
+        exposure = 0.0
+        for o in opened.values():
+            exposure += o.qty * o.mark(step)
+        equity_now = cash + exposure
+        caps = []
+        if max_symbol_exposure is not None:
+            caps.append(max_symbol_exposure * equity_now)
+        if max_total_exposure is not None:
+            caps.append(max_total_exposure * equity_now - exposure)
+        entry_price = b.close[k].item()
+        sized = _size_long(risk_model, equity_now, cash, entry_price, float(b.atr[k]), fee_rate,
+                           min(caps) if caps else None)
+        if sized is None:
+            b.rejected += 1
+            schedule_entry(s, k + 1)
+            continue
+        qty, legs, entry_fee, total_cost = sized
+        cash -= total_cost
+        cash_steps.append(step)
+        cash_values.append(cash)
+        b.qty, b.sl, b.tp = qty, legs["sl"], legs["tp"]
+        b.trade = {
+            "entry_idx": k,
+            "entry_price": float(entry_price),
+            "qty": float(qty),
+            "entry_fee": float(entry_fee),
+            "stop_loss": float(b.sl),
+            "take_profit": float(b.tp),
+            "capital_risked": float(abs(entry_price - b.sl) * qty),
+            "entry_cost": float(total_cost),
+            "equity_at_entry": float(equity_now),
+        }
+        opened[s] = b
+        j = _first_exit_bar(b.low, b.high, b.exits, b.sl, b.tp, k + 1)
+        if j >= 0:
+            heapq.heappush(heap, (int(b.step[j]), _EXIT, s, j))
+
+    for w, since in waiting.items():  # no exit came: every later signal found no cash either
+        wb = books[w]
+        wb.rejected += int(len(wb.entry_bars) - wb.entry_bars.searchsorted(since, "right"))
+    return _portfolio_curve(symbols, books, timeline, ledger, cash_steps, cash_values, initial_equity)
+
+
+def _portfolio_curve(symbols, books, timeline, ledger, cash_steps, cash_values, initial_equity):
+    n_steps = len(timeline)
+    idx = np.searchsorted(np.asarray(cash_steps, dtype=np.int64), np.arange(n_steps), side="right") - 1
+    cash = np.where(idx >= 0, np.asarray(cash_values + [0.0])[idx], float(initial_equity))
+    exposure = np.zeros(n_steps)
+    n_open = np.zeros(n_steps, dtype=np.int64)
+    values = []
+    variant = ledger["variant"]
+    for s, b in enumerate(books):
+        # Quantity held at the close of each of the symbol's bars: from the entry bar up to (not
+        # including) the exit bar, or to the end for a position still open. A symbol's trades
+        # never overlap, so a bar can only be inside the last trade entered at or before it.
+        rows = np.flatnonzero(variant == s)
+        starts = np.append(ledger["entry_idx"][rows], [b.trade["entry_idx"]] if b.trade else [])
+        stops = np.append(ledger["exit_idx"][rows], [len(b.ts)] if b.trade else [])
+        qtys = np.append(ledger["qty"][rows], [b.qty] if b.trade else [])
+        bars = np.arange(len(b.ts))
+        held = np.zeros(len(b.ts))
+        if len(starts):
+            trade = np.maximum(np.searchsorted(starts, bars, side="right") - 1, 0)
+            held = np.where((bars >= starts[trade]) & (bars < stops[trade]), qtys[trade], 0.0)
+        pos = np.searchsorted(b.ts, timeline, side="right") - 1
+        valid = pos >= 0
+        value = np.where(valid, held[np.maximum(pos, 0)] * b.close[np.maximum(pos, 0)], 0.0)
+        exposure += value
+        n_open += value > 0
+        values.append(value)
+
+    equity = cash + exposure
+    index = pd.DatetimeIndex(timeline.view("M8[ns]"), name="timestamp")
+    if books and books[0].index.tz is not None:
+        index = index.tz_localize("UTC").tz_convert(books[0].index.tz)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        curve_df = pd.DataFrame({"equity": equity, "cash": cash, "exposure": exposure,
+                                 "utilisation": exposure / equity, "open_positions": n_open}, index=index)
+
+    records, rows = [], []
+    pnl, fees = ledger["pnl"], ledger["entry_fee"] + ledger["exit_fee"]
+    for s, (symbol, b) in enumerate(zip(symbols, books)):
+        mine = variant == s
+        for rec in ledger.to_records(b.index, variant=s):
+            records.append({"symbol": symbol, **rec})
+        n_trades = int(mine.sum())
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(equity > 0, values[s] / equity, 0.0)
+        rows.append({
+            "symbol": symbol,
+            "bars": len(b.ts),
+            "trades": n_trades,
+            "win_rate": float((pnl[mine] > 0).mean() * 100.0) if n_trades else 0.0,
+            "pnl": float(pnl[mine].sum()),
+            "fees": float(fees[mine].sum()),
+            "return_contribution": float(pnl[mine].sum() / initial_equity * 100.0),
+            "time_in_market": float((values[s] > 0).mean() * 100.0) if n_steps else 0.0,
+            "avg_equity_share": float(share.mean() * 100.0) if n_steps else 0.0,
+            "rejected_entries": b.rejected,
+            "open_at_end": b.trade is not None,
+        })
+    records.sort(key=lambda r: (r["entry_time"], r["symbol"]))
+    return curve_df, records, pd.DataFrame(rows)
@@ -0,0 +1,32 @@
+import sys
+
+from commands.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Benchmark indicators, signals, the backtest engine, metrics and the tuner on synthetic candles."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--config", default="config/settings.yaml")
+        parser.add_argument("--sizes", nargs="+", default=["10k", "100k", "1M"],
+                            help="Bar counts, e.g. 10k 100k 1M 10M")
+        parser.add_argument("--stages", nargs="+", default=None,
+                            help="Subset of: supertrend tech_subscore signals backtest metrics metrics_batch tuner")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is kept)")
+        parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc peak-memory pass")
+        parser.add_argument("--compact", action="store_true",
+                            help="Benchmark the float32 compact memory mode (memory.compact)")
+        parser.add_argument("--out", default="data/benchmarks", help="Directory for history.jsonl / baseline.json")
+        parser.add_argument("--save-baseline", action="store_true", help="Save this run as the comparison baseline")
+        parser.add_argument("--compare", action="store_true", help="Flag regressions against the saved baseline")
+        parser.add_argument("--tolerance", type=float, default=0.15,
+                            help="Allowed relative throughput drop / memory growth before flagging")
+
+    def handle(self, config, sizes, stages, repeat, no_memory, compact, out, save_baseline, compare, tolerance,
+               **kwargs):
+        from analytics.benchmark import STAGES, benchmark, parse_size
+        ok = benchmark(config, [parse_size(s) for s in sizes], stages or STAGES, repeat, not no_memory, out,
+                       baseline=save_baseline, compare=compare, tolerance=tolerance,
+                       compact=compact or None)
+        if not ok:
+            sys.exit(1)
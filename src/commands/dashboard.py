@@ -0,0 +1,26 @@
+from commands.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Draw the equity chart and HTML dashboard of a finished run from its report files."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default="data/features",
+                            help="Run output directory (equity.parquet, trades_summary.csv, metrics_summary.json)")
+        parser.add_argument("--config", default="config/settings.yaml", help="Read the reports section from here")
+        parser.add_argument("--max-points", type=int, default=None, help="Point budget per curve (default: reports.max_points)")
+        parser.add_argument("--downsample", choices=["minmax", "lttb"], default=None,
+                            help="Downsampling method (default: reports.downsample)")
+        parser.add_argument("--webgl-min-points", type=int, default=None,
+                            help="Use WebGL for traces with at least this many points (default: reports.webgl_min_points)")
+
+    def handle(self, dir, config, max_points, downsample, webgl_min_points, **kwargs):
+        from pathlib import Path
+        import yaml
+        from analytics.visuals import render_reports
+        path = Path(config)
+        reports = (yaml.safe_load(path.read_text()) or {}).get('reports', {}) if path.exists() else {}
+        overrides = {'max_points': max_points, 'downsample': downsample, 'webgl_min_points': webgl_min_points}
+        reports = {**reports, **{k: v for k, v in overrides.items() if v is not None}}
+        render_reports(dir, reports)
+        print(f"Dashboard → {Path(dir) / 'equity_dashboard.html'}")
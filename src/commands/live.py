@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from commands.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Emit BUY/SELL decisions as closed candles arrive."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--config", default="config/settings.yaml")
+        parser.add_argument("--replay", default=None, help="Replay candles from a CSV/Parquet file instead of the exchange")
+        parser.add_argument("--poll", type=float, default=2.0, help="Exchange poll interval in seconds")
+        parser.add_argument("--no-warmup", action="store_true", help="Skip seeding indicators from history")
+        parser.add_argument("--out", default="data/features/live_signals.jsonl")
+
+    def handle(self, config, replay, poll, no_warmup, out, **kwargs):
+        import yaml
+        from src.adapters.candle_store import CandleStore
+        from src.adapters.exchange_ccxt import CCXTClient
+        from src.adapters.sentiment_cache import SentimentCache
+        from src.core.backtest_runner import build_engine
+        from src.core.live_runner import (LiveSentiment, LiveSignalRunner, PollingCandleSource, ReplayCandleSource,
+                                          TF_HIGH, TF_MID, append_decision)
+        from src.env import get_api_mode
+
+        cfg = yaml.safe_load(Path(config).read_text())
+        api_mode = cfg.get('api_mode') or get_api_mode()
+        symbols = cfg['symbols']
+        timeframes = [TF_HIGH, TF_MID, cfg['timeframes'][0]]
+
+        store_cfg = cfg.get('candle_store', {})
+        store = CandleStore(store_cfg.get('root', 'data/candles')) if store_cfg.get('enabled', True) else None
+        client = None
+        if replay is None or not no_warmup:
+            client = CCXTClient(cfg['exchange'], market_type=cfg['market_type'], store=store,
+                                offline=store_cfg.get('offline', False))
+
+        sc_cfg = cfg.get('sentiment_cache', {})
+        sent_cache = None
+        if sc_cfg.get('enabled', True):
+            sent_cache = SentimentCache(sc_cfg.get('root', 'data/cache/sentiment'), sc_cfg.get('ttl_hours'))
+        sentiment = LiveSentiment(api_mode, cfg.get('sentiment', {}), sent_cache, cfg['lookback_bars'])
+        runner = LiveSignalRunner(cfg, build_engine(cfg), sentiment=sentiment,
+                                  sentiment_weight_factor=0.5 if api_mode == "offline" else 1.0)
+        if not no_warmup:
+            for symbol in symbols:
+                for tf in (timeframes[-1], *timeframes[:-1]):
+                    df = client.fetch_ohlcv_df(symbol, tf, lookback_bars=cfg['lookback_bars'])
+                    df.columns = ['open', 'high', 'low', 'close', 'volume']
+                    if tf == timeframes[-1]:
+                        sentiment.warm_up(symbol, df.index)
+                    # Replayed candles continue from here, so seed only up to the last closed bar.
+                    runner.warm_up(symbol, tf, df.iloc[:-1])
+
+        source = ReplayCandleSource(replay) if replay else PollingCandleSource(client, symbols, timeframes, poll)
+        print(f"Listening for closed candles on {symbols} {timeframes}...")
+        for decision in runner.run(source):
+            append_decision(Path(out), decision)
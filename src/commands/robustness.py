@@ -0,0 +1,17 @@
+from commands.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Monte Carlo / bootstrap confidence intervals for return, drawdown and risk of ruin."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--config", default="config/settings.yaml")
+        parser.add_argument("--paths", type=int, default=None, help="Paths per method (default: robustness.paths)")
+        parser.add_argument("--seed", type=int, default=None, help="Random seed (default: robustness.seed)")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Worker processes for the path batches (default: robustness.workers, 1 runs inline)")
+        parser.add_argument("--out", default="data/features/robustness.json")
+
+    def handle(self, config, paths, seed, workers, out, **kwargs):
+        from analytics.robustness import run_robustness
+        run_robustness(config, paths, workers, seed, out)
@@ -1,14 +1,47 @@
 from commands.base import BaseCommand
-from core.backtest_runner import run_strategy
 
 
 class Command(BaseCommand):
-    """Run a single backtest."""
+    """Run a single backtest, every configured symbol/timeframe pair with --all, or all symbols
+    against one cash pool with --portfolio."""
 
     def add_arguments(self, parser):
-        parser.add_argument("--symbol", default="BTC/USDT")
-        parser.add_argument("--tf", default="1h")
+        parser.add_argument("--config", default="config/settings.yaml")
+        parser.add_argument("--symbol", default=None, help="Defaults to the first configured symbol")
+        parser.add_argument("--tf", default=None, help="Defaults to the first configured timeframe")
+        parser.add_argument("--all", dest="run_all", action="store_true", help="Run every symbol x timeframe in the config")
+        parser.add_argument("--portfolio", action="store_true",
+                            help="Trade every configured symbol (or --symbols) from one shared cash pool")
+        parser.add_argument("--symbols", nargs="+", default=None, help="Symbols for --portfolio")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Max concurrent pairs with --all (default: batch.max_workers or CPU count)")
+        parser.add_argument("--cprofile", action="store_true",
+                            help="Also capture the run with cProfile (run_profile.prof next to run_profile.json)")
+        parser.add_argument("--chunked", action="store_true",
+                            help="Stream the whole stored history in blocks instead of loading it (single pair only)")
+        parser.add_argument("--block-bars", type=int, default=None,
+                            help="Bars per block with --chunked (default: memory.block_bars)")
 
-    def handle(self, symbol, tf, **kwargs):
-        print(f"Running backtest for {symbol} on {tf} timeframe...")
-        run_strategy()
+    def handle(self, config, symbol, tf, run_all, portfolio, symbols, workers, cprofile, chunked, block_bars,
+               **kwargs):
+        if chunked:
+            from core.chunked_runner import run_strategy_chunked
+            print(f"Running chunked backtest for {symbol or 'default symbol'} on {tf or 'default'} timeframe...")
+            run_strategy_chunked(config, symbol, tf, block_bars=block_bars)
+            return
+        if portfolio:
+            from core.portfolio_runner import run_portfolio
+            print(f"Running portfolio backtest on {tf or 'default'} timeframe...")
+            run_portfolio(config, symbols, tf, cprofile=cprofile)
+            return
+        if run_all:
+            from core.batch_runner import run_universe
+            summary = run_universe(config, workers, cprofile=cprofile)
+            print(summary)
+            return
+        from core.backtest_runner import run_strategy
+        print(f"Running backtest for {symbol or 'default symbol'} on {tf or 'default'} timeframe...")
+        run_strategy(config, symbol, tf, cprofile=cprofile)
+        if cprofile:
+            import pstats
+            pstats.Stats("data/features/run_profile.prof").sort_stats("cumulative").print_stats(25)
@@ -1,15 +1,40 @@
 from commands.base import BaseCommand
-from analytics.threshold_tuner import scan_thresholds
 
 
 class Command(BaseCommand):
-    """Run threshold tuning across multiple buy/sell values."""
+    """Run threshold tuning across multiple buy/sell values, sweep indicator parameters with --features,
+    or search thresholds, risk and weights by successive halving with --search."""
 
     def add_arguments(self, parser):
         parser.add_argument("--buy", nargs="+", type=float, default=[0.2, 0.3, 0.4, 0.5])
         parser.add_argument("--sell", nargs="+", type=float, default=[-0.2, -0.3, -0.4, -0.5])
+        parser.add_argument("--config", default="config/settings.yaml")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Worker processes for the grid (default: CPU count, 1 runs inline)")
+        parser.add_argument("--features", action="store_true",
+                            help="Sweep the indicator parameters in feature_sweep.grid instead of the thresholds")
+        parser.add_argument("--search", action="store_true",
+                            help="Successive-halving search over the tune.space ranges instead of the grid")
+        parser.add_argument("--candidates", type=int, default=None,
+                            help="Starting candidates for --search (default: tune.candidates)")
+        parser.add_argument("--time-budget", type=float, default=None,
+                            help="Soft limit in seconds for --search: checked between rungs, so the rung under way "
+                                 "always finishes before it stops promoting (default: tune.time_budget)")
+        parser.add_argument("--seed", type=int, default=None, help="Sampling seed for --search (default: tune.seed)")
+        parser.add_argument("--objective", default=None,
+                            help="Ranking metric for --features/--search (default: from their config section)")
 
-    def handle(self, buy, sell, **kwargs):
+    def handle(self, buy, sell, config, workers, features, search, candidates, time_budget, seed, objective, **kwargs):
+        if search:
+            from analytics.adaptive_tuner import successive_halving
+            successive_halving(config, candidates=candidates, objective=objective, time_budget=time_budget,
+                               seed=seed, workers=workers)
+            return
+        if features:
+            from analytics.feature_sweep import sweep_features
+            sweep_features(config, objective=objective)
+            return
+        from analytics.threshold_tuner import scan_thresholds
         print(f"Running threshold scan for {buy=} {sell=}...")
-        scan_thresholds(buy, sell)
+        scan_thresholds(buy, sell, cfg_path=config, workers=workers)
         print("Threshold tuning completed.")
@@ -0,0 +1,22 @@
+from commands.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Walk-forward optimisation of thresholds and SL/TP with a stitched out-of-sample equity curve."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--config", default="config/settings.yaml")
+        parser.add_argument("--train-bars", type=int, default=None, help="Training window (default: walk_forward.train_bars)")
+        parser.add_argument("--test-bars", type=int, default=None, help="Test window (default: walk_forward.test_bars)")
+        parser.add_argument("--anchored", action="store_true", default=None,
+                            help="Grow the training window from the first bar instead of rolling it")
+        parser.add_argument("--objective", default=None,
+                            help="sharpe_ratio, total_return, max_drawdown, profit_factor or win_rate")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Worker processes for the folds (default: CPU count, 1 runs inline)")
+        parser.add_argument("--out", default="data/walk_forward")
+
+    def handle(self, config, train_bars, test_bars, anchored, objective, workers, out, **kwargs):
+        from analytics.walk_forward import walk_forward
+        walk_forward(config, train_bars, test_bars, anchored, objective, workers, out)
+        print("Walk-forward completed.")
@@ -1,140 +1,462 @@
 import yaml
+from dataclasses import dataclass
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
 from src.adapters.exchange_ccxt import CCXTClient
+from src.adapters.candle_store import CandleStore
+from src.adapters.sentiment_cache import SentimentCache
 from src.adapters.sentiment_providers import get_combined_sentiment
-from src.env import API_MODE
-from src.indicators.trend import ema, supertrend
-from src.indicators.momentum import rsi, macd
+from src.env import get_api_mode
+from src.indicators.features import compute_features, iter_features
+from src.indicators.feature_cache import FeatureCache
 from src.indicators.volatility import atr
-from src.signals.confluence import ConfluenceEngine, Weights, Thresholds
+from src.signals.confluence import ConfluenceEngine, Weights, Thresholds, BUY, SELL
 from src.signals.risk import RiskModel
 from src.backtest.engine_sl_tp import bt_long_sl_tp
+from src.backtest.intrabar import IntrabarResolver
+from src.utils.io import save_parquet
 from src.utils.logging import setup_logging
-from src.utils.mtf import align_to_lower_tf
+from src.utils.mtf import align_to_lower_tf, can_resample, closed_bar_positions, resample_ohlcv
+from src.utils.profiling import profiled, span
+from src.utils.timeframes import timeframe_to_ms
 from src.analytics.metrics import summary as metrics_summary
 from src.analytics.trade_report import generate_trade_log
-from src.analytics.visuals import plot_equity_curve_matplotlib, create_html_dashboard
+from src.analytics.visuals import render_reports_in_background, write_charts
 
 log = setup_logging()
 
+# Higher timeframes that gate the entry-timeframe decisions.
+TF_MID = "4h"
+TF_HIGH = "1d"
+
 
 def load_yaml(path: Path):
     with open(path, 'r') as f:
         return yaml.safe_load(f)
 
 
-def tech_subscore(df: pd.DataFrame, cfg: dict) -> pd.Series:
-    e20, e50, e200 = [ema(df['close'], w) for w in cfg['features']['ema']['windows']]
-    r = rsi(df['close'], cfg['features']['rsi']['period'])
-    macd_line, macd_sig, macd_hist = macd(df['close'], **cfg['features']['macd'])
-    st = supertrend(df, **cfg['features']['supertrend'])
+def compact_dtype(cfg: dict):
+    """float32 when ``memory.compact`` is enabled, else float64.
 
-    score = pd.Series(0.0, index=df.index)
-    score += (df['close'] > e200).astype(float) * 1.0 + (df['close'] <= e200).astype(float) * -1.0
-    score += (e20 > e50).astype(float) * 0.5 + (e20 <= e50).astype(float) * -0.5
-    score += (r > 55).astype(float) * 0.25 + (r < 45).astype(float) * -0.25
-    score += (((macd_line > macd_sig) & (macd_hist > macd_hist.shift())).astype(float) * 0.25 +
-              ((macd_line < macd_sig) & (macd_hist < macd_hist.shift())).astype(float) * -0.25)
-    score += (df['close'] > st).astype(float) * 0.25 + (df['close'] <= st).astype(float) * -0.25
+    Compact mode keeps OHLCV, sentiment, indicators and scores in float32. Measured on 2M synthetic
+    1m bars against float64: score error <= 1e-7 except on bars where an indicator comparison is a
+    near-tie and one term flips (~7 per million bars, at most 0.09); gated entries/exits matched
+    exactly. SL/TP levels come from float32 prices, so fills can move by ~1e-7 relative.
+    """
+    return np.float32 if cfg.get('memory', {}).get('compact', False) else np.float64
 
-    score = score / 2.25
-    return score.clip(-1, 1)
 
+def to_compact(obj, dtype=np.float32):
+    """Downcast a float DataFrame/Series (OHLCV, sentiment) to ``dtype``; other columns are left alone."""
+    if isinstance(obj, pd.Series):
+        return obj if obj.dtype == dtype else obj.astype(dtype)
+    return obj.astype({c: dtype for c in obj.columns if obj[c].dtype.kind == "f" and obj[c].dtype != dtype})
+
+
+def _add_signed(score: np.ndarray, weight: float, up, down):
+    # In place, so no per-term float arrays are allocated; NaN comparisons are False (adds 0).
+    np.add(score, weight, out=score, where=up)
+    np.subtract(score, weight, out=score, where=down)
+
+
+def _trend_term(score, close, ema_slow):
+    _add_signed(score, 1.0, close > ema_slow, close <= ema_slow)
+
+
+def _ema_cross_term(score, ema_fast, ema_mid):
+    _add_signed(score, 0.5, ema_fast > ema_mid, ema_fast <= ema_mid)
+
+
+def _rsi_term(score, r):
+    _add_signed(score, 0.25, r > 55, r < 45)
+
+
+def _macd_term(score, macd_line, macd_sig, macd_hist, prev_hist):
+    _add_signed(score, 0.25, (macd_line > macd_sig) & (macd_hist > prev_hist),
+                (macd_line < macd_sig) & (macd_hist < prev_hist))
+
+
+def _supertrend_term(score, close, st):
+    _add_signed(score, 0.25, close > st, close <= st)
+
+
+def _finish_score(score: np.ndarray) -> np.ndarray:
+    score /= 2.25
+    return np.clip(score, -1, 1, out=score)
+
+
+def _shifted(values: np.ndarray, first: float = np.nan) -> np.ndarray:
+    prev = np.empty_like(values)
+    prev[:1] = first
+    prev[1:] = values[:-1]
+    return prev
+
+
+def tech_score_arrays(close, e20, e50, e200, r, macd_line, macd_sig, macd_hist, prev_hist, st,
+                      dtype=np.float64) -> np.ndarray:
+    """Technical score in [-1, 1] from indicator arrays (or 1-element arrays for a single bar)."""
+    score = np.zeros(np.shape(close), dtype=dtype)
+    _trend_term(score, close, e200)
+    _ema_cross_term(score, e20, e50)
+    _rsi_term(score, r)
+    _macd_term(score, macd_line, macd_sig, macd_hist, prev_hist)
+    _supertrend_term(score, close, st)
+    return _finish_score(score)
+
+
+def _tech_subscore_streamed(df: pd.DataFrame, cfg: dict, dtype) -> np.ndarray:
+    """Compact-mode ``tech_subscore``: fold each indicator into the score as soon as it is computed.
+
+    Only the columns a pending term still needs are kept, so the feature frame never exists.
+    """
+    close = df['close'].to_numpy()
+    e20, e50, e200 = (f"ema_{w}" for w in cfg['features']['ema']['windows'])
+    terms = [
+        ((e200,), lambda score, e: _trend_term(score, close, e)),
+        ((e20, e50), _ema_cross_term),
+        (("rsi",), _rsi_term),
+        (("macd_line", "macd_signal", "macd_hist"),
+         lambda score, line, sig, hist: _macd_term(score, line, sig, hist, _shifted(hist))),
+        (("supertrend",), lambda score, st: _supertrend_term(score, close, st)),
+    ]
+    needed = {c for cols, _ in terms for c in cols}
+    score = np.zeros(len(df), dtype=dtype)
+    pending: dict[str, np.ndarray] = {}
+    for name, s in iter_features(df, cfg['features']):
+        if name not in needed:
+            continue
+        pending[name] = s.to_numpy()
+        for cols, apply in [t for t in terms if all(c in pending for c in t[0])]:
+            apply(score, *(pending[c] for c in cols))
+            terms.remove((cols, apply))
+            for c in cols:
+                if not any(c in other for other, _ in terms):
+                    pending.pop(c, None)
+    return _finish_score(score)
+
+
+def tech_subscore(df: pd.DataFrame, cfg: dict, cache: FeatureCache | None = None) -> pd.Series:
+    dtype = compact_dtype(cfg)
+    if cache is None and dtype != np.float64:
+        return pd.Series(_tech_subscore_streamed(df, cfg, dtype), index=df.index)
+    feats = cache.get(df, cfg['features'], dtype) if cache is not None else compute_features(df, cfg['features'])
+    return pd.Series(tech_score_features(df, feats, cfg, dtype), index=df.index)
+
+
+def tech_score_features(df: pd.DataFrame, feats: pd.DataFrame, cfg: dict, dtype=np.float64,
+                        prev_hist: float = np.nan) -> np.ndarray:
+    """Technical score from a ``compute_features`` frame; ``prev_hist`` is the MACD histogram of the
+    bar before ``df`` when scoring one block of a longer history."""
+    e20, e50, e200 = [feats[f"ema_{w}"].to_numpy() for w in cfg['features']['ema']['windows']]
+    macd_hist = feats['macd_hist'].to_numpy()
+    return tech_score_arrays(
+        df['close'].to_numpy(dtype=dtype), e20, e50, e200, feats['rsi'].to_numpy(),
+        feats['macd_line'].to_numpy(), feats['macd_signal'].to_numpy(), macd_hist,
+        _shifted(macd_hist, prev_hist), feats['supertrend'].to_numpy(), dtype=dtype,
+    )
 
-def run_strategy(cfg: str = "config/settings.yaml"):
-    cfg = yaml.safe_load(Path(cfg).read_text())
-    api_mode = cfg.get('api_mode') or API_MODE
 
-    engine = ConfluenceEngine(Weights(**cfg['confluence']['weights']), Thresholds(**cfg['confluence']['thresholds']))
+@dataclass
+class StrategyInputs:
+    """Everything the gating and backtest stages need, built once per symbol/timeframe."""
+    symbol: str
+    tf_entry: str
+    df_low: pd.DataFrame
+    total_low: pd.Series
+    total_high_on_low: pd.Series
+    total_mid_on_low: pd.Series
+    atr_series: pd.Series
 
-    cc = CCXTClient(cfg['exchange'], market_type=cfg['market_type'])
-    symbol = cfg['symbols'][0]
 
-    tf_entry = cfg['timeframes'][0]
-    tf_mid = "4h"
-    tf_high = "1d"
+def build_engine(cfg: dict, **threshold_overrides) -> ConfluenceEngine:
+    thresholds = {**cfg['confluence']['thresholds'], **threshold_overrides}
+    return ConfluenceEngine(Weights(**cfg['confluence']['weights']), Thresholds(**thresholds))
 
-    log.info(f"Fetching OHLCV for {symbol} [{tf_high}, {tf_mid}, {tf_entry}]...")
-    df_high = cc.fetch_ohlcv_df(symbol, tf_high, lookback_bars=max(400, cfg['lookback_bars']//24))
-    df_mid = cc.fetch_ohlcv_df(symbol, tf_mid,  lookback_bars=max(800, cfg['lookback_bars']//6))
-    df_low = cc.fetch_ohlcv_df(symbol, tf_entry, lookback_bars=cfg['lookback_bars'])
-    for df in (df_high, df_mid, df_low):
+
+def load_market_data(cfg: dict, symbol: str, tf_entry: str, api_mode: str):
+    """Return (df_high, df_mid, df_low, sentiment on df_low) for one symbol/entry timeframe.
+
+    With ``acquisition.async`` enabled all OHLCV and sentiment requests are issued concurrently;
+    otherwise they run one after another as before. With ``acquisition.resample_higher`` the 4h
+    and 1d frames are resampled from one longer entry-timeframe download instead of being
+    fetched; the entry frame is then cut back to ``lookback_bars``.
+    """
+    lookbacks = {TF_HIGH: max(400, cfg['lookback_bars']//24), TF_MID: max(800, cfg['lookback_bars']//6)}
+    resample = cfg.get('acquisition', {}).get('resample_higher', False)
+    derived = [tf for tf in (TF_HIGH, TF_MID) if resample and can_resample(tf_entry, tf)]
+    # Enough entry bars to cover every derived timeframe's own lookback.
+    base_bars = max([cfg['lookback_bars']] + [-(-lookbacks[tf] * timeframe_to_ms(tf) // timeframe_to_ms(tf_entry))
+                                              for tf in derived])
+    requests = [(tf, lookbacks[tf]) for tf in (TF_HIGH, TF_MID) if tf not in derived] + [(tf_entry, base_bars)]
+
+    store_cfg = cfg.get('candle_store', {})
+    store = CandleStore(store_cfg.get('root', 'data/candles')) if store_cfg.get('enabled', True) else None
+    sent_cfg = cfg.get('sentiment', {})
+    sc_cfg = cfg.get('sentiment_cache', {})
+    sent_cache = None
+    if sc_cfg.get('enabled', True):
+        sent_cache = SentimentCache(sc_cfg.get('root', 'data/cache/sentiment'), sc_cfg.get('ttl_hours'))
+    sent_sources: dict = {}
+
+    log.info(f"Fetching OHLCV for {symbol} [{', '.join(tf for tf, _ in requests)}]"
+             + (f", resampling {', '.join(derived)} locally..." if derived else "..."))
+    # Fully offline runs (candles from the store, simulated sentiment) have nothing to overlap,
+    # so skip the async stack and never import ccxt/aiohttp.
+    offline_only = store is not None and store_cfg.get('offline', False) and api_mode != "live"
+    if cfg.get('acquisition', {}).get('async', False) and not offline_only:
+        from src.adapters.async_acquisition import acquire
+        log.info(f"[{api_mode.upper()}] Fetching sentiment concurrently...")
+        with span("fetch_ohlcv_and_sentiment") as rec:
+            # With resampling the entry frame is cut back to lookback_bars below; the sentiment
+            # is built on those bars only, as the sequential path does.
+            frames, sent_entry = acquire(cfg, symbol, requests, api_mode, store=store,
+                                         offline=store_cfg.get('offline', False),
+                                         sentiment_cache=sent_cache, report=sent_sources,
+                                         sentiment_bars=cfg['lookback_bars'] if derived else None)
+            rec["rows"] = sum(len(df) for df in frames)
+    else:
+        with span("fetch_ohlcv") as rec:
+            cc = CCXTClient(cfg['exchange'], market_type=cfg['market_type'], store=store,
+                            offline=store_cfg.get('offline', False))
+            frames = [cc.fetch_ohlcv_df(symbol, tf, lookback_bars=n) for tf, n in requests]
+            rec["rows"] = sum(len(df) for df in frames)
+        sent_entry = None
+    for df in frames:
         df.columns = ['open', 'high', 'low', 'close', 'volume']
+    if compact_dtype(cfg) == np.float32:
+        frames = [to_compact(df) for df in frames]
+    df_low = frames.pop()
+    by_tf = dict(zip((tf for tf, _ in requests), frames))
+    if derived:
+        with span("resample", rows=len(df_low)):
+            by_tf.update({tf: resample_ohlcv(df_low, tf) for tf in derived})
+        df_low = df_low.iloc[-cfg['lookback_bars']:]
+    df_high, df_mid = by_tf[TF_HIGH], by_tf[TF_MID]
+
+    if sent_entry is None:
+        log.info(f"[{api_mode.upper()}] Getting sentiment series...")
+        with span("sentiment", rows=len(df_low)):
+            sent_entry = get_combined_sentiment(
+                symbol,
+                df_low.index,
+                api_mode,
+                use_fear_greed=sent_cfg.get('use_fear_greed', True),
+                use_funding=sent_cfg.get('use_funding', True),
+                use_news=sent_cfg.get('use_news', True),
+                cache=sent_cache,
+                report=sent_sources,
+            )
+    if sent_sources:
+        log.info("Sentiment sources: " + ", ".join(f"{k}={v}" for k, v in sent_sources.items()))
+    if compact_dtype(cfg) == np.float32:
+        sent_entry = to_compact(sent_entry)
+    return df_high, df_mid, df_low, sent_entry
+
+
+@dataclass
+class ScoreComponents:
+    """The weight-free parts of ``StrategyInputs``: each timeframe's technical score and the
+    entry-timeframe sentiment sampled at its bars, plus the closed-bar positions that map the
+    higher timeframes onto the entry bars. ``combine_components`` weights them into totals, so
+    confluence weights can be varied without rebuilding indicators."""
+    symbol: str
+    tf_entry: str
+    df_low: pd.DataFrame
+    tech_high: pd.Series
+    tech_mid: pd.Series
+    tech_low: pd.Series
+    sent_high: pd.Series
+    sent_mid: pd.Series
+    sent_low: pd.Series
+    sentiment_weight_factor: float
+    high_pos: np.ndarray
+    mid_pos: np.ndarray
+    atr_series: pd.Series
+
+
+def prepare_components(cfg: dict, symbol: str | None = None, tf_entry: str | None = None) -> ScoreComponents:
+    api_mode = cfg.get('api_mode') or get_api_mode()
+
+    symbol = symbol or cfg['symbols'][0]
+    tf_entry = tf_entry or cfg['timeframes'][0]
+
+    df_high, df_mid, df_low, sent_entry = load_market_data(cfg, symbol, tf_entry, api_mode)
+
+    cache_cfg = cfg.get('feature_cache', {})
+    cache = None
+    if cache_cfg.get('enabled', True):
+        cache = FeatureCache(cache_cfg.get('root', 'data/cache/features'),
+                             max_bytes=int(cache_cfg.get('max_mb', 256) * 1024 * 1024))
 
     log.info("Building indicators across timeframes...")
-    tech_high = tech_subscore(df_high, cfg)
-    tech_mid = tech_subscore(df_mid, cfg)
-    tech_low = tech_subscore(df_low, cfg)
+    with span("indicators", rows=len(df_high) + len(df_mid) + len(df_low)):
+        tech_high = tech_subscore(df_high, cfg, cache)
+        tech_mid = tech_subscore(df_mid, cfg, cache)
+        tech_low = tech_subscore(df_low, cfg, cache)
+    if cache is not None:
+        st = cache.stats
+        log.info(f"Feature cache: {st['hits']} hit(s), {st['extended']} extended, {st['misses']} miss(es), "
+                 f"~{st['seconds_saved']:.3f}s saved")
 
-    sent_cfg = cfg.get('sentiment', {})
-    log.info(f"[{api_mode.upper()}] Getting sentiment series...")
-    sent_entry = get_combined_sentiment(
-        symbol,
-        df_low.index,
-        api_mode,
-        use_fear_greed=sent_cfg.get('use_fear_greed', True),
-        use_funding=sent_cfg.get('use_funding', True),
-        use_news=sent_cfg.get('use_news', True),
+    with span("align_timeframes", rows=len(df_low)):
+        return ScoreComponents(
+            symbol=symbol,
+            tf_entry=tf_entry,
+            df_low=df_low,
+            tech_high=tech_high,
+            tech_mid=tech_mid,
+            tech_low=tech_low,
+            sent_high=sent_entry.reindex(df_high.index, method='ffill'),
+            sent_mid=sent_entry.reindex(df_mid.index, method='ffill'),
+            sent_low=sent_entry,
+            sentiment_weight_factor=0.5 if api_mode == "offline" else 1.0,
+            # Each entry bar sees the last 1d/4h bar closed by its own close, never one still forming.
+            high_pos=closed_bar_positions(df_high.index, TF_HIGH, df_low.index, tf_entry),
+            mid_pos=closed_bar_positions(df_mid.index, TF_MID, df_low.index, tf_entry),
+            atr_series=to_compact(atr(df_low, cfg['features']['atr']['period']), compact_dtype(cfg)),
+        )
+
+
+def combine_components(c: ScoreComponents, w: Weights) -> StrategyInputs:
+    """Per-timeframe totals ``tech * trend + sentiment * sentiment_macro`` aligned to the entry bars."""
+    total_high = (c.tech_high * w.trend) + (c.sent_high * w.sentiment_macro * c.sentiment_weight_factor)
+    total_mid = (c.tech_mid * w.trend) + (c.sent_mid * w.sentiment_macro * c.sentiment_weight_factor)
+    total_low = (c.tech_low * w.trend) + (c.sent_low * w.sentiment_macro * c.sentiment_weight_factor)
+    return StrategyInputs(
+        symbol=c.symbol,
+        tf_entry=c.tf_entry,
+        df_low=c.df_low,
+        total_low=total_low,
+        total_high_on_low=align_to_lower_tf(total_high, c.high_pos, c.df_low.index),
+        total_mid_on_low=align_to_lower_tf(total_mid, c.mid_pos, c.df_low.index),
+        atr_series=c.atr_series,
     )
 
-    sentiment_weight_factor = 0.5 if api_mode == "offline" else 1.0
 
-    total_high = (tech_high * engine.w.trend) + (sent_entry.reindex(df_high.index, method='ffill') *
-                                                 engine.w.sentiment_macro * sentiment_weight_factor)
-    total_mid = (tech_mid * engine.w.trend) + (sent_entry.reindex(df_mid.index,  method='ffill') *
-                                               engine.w.sentiment_macro * sentiment_weight_factor)
-    total_low = (tech_low * engine.w.trend) + (sent_entry * engine.w.sentiment_macro * sentiment_weight_factor)
+def prepare_inputs(cfg: dict, symbol: str | None = None, tf_entry: str | None = None) -> StrategyInputs:
+    components = prepare_components(cfg, symbol, tf_entry)
+    with span("combine_scores", rows=len(components.df_low)):
+        return combine_components(components, build_engine(cfg).w)
+
+
+def gate_signals(engine: ConfluenceEngine, inputs: StrategyInputs) -> tuple[pd.Series, pd.Series]:
+    """Return the (entries, exits) masks of entry-timeframe decisions confirmed by 4h and 1d."""
+    decision_low = engine.decide_array(inputs.total_low.to_numpy())
+    gated = engine.gate_codes(decision_low, (inputs.total_high_on_low.to_numpy(), inputs.total_mid_on_low.to_numpy()))
 
-    total_high_on_low = align_to_lower_tf(total_high, df_low.index)
-    total_mid_on_low = align_to_lower_tf(total_mid, df_low.index)
+    index = inputs.df_low.index
+    return pd.Series(gated == BUY, index=index), pd.Series(gated == SELL, index=index)
 
-    decision_low = total_low.apply(engine.decide)
 
-    gated = pd.Series("HOLD", index=df_low.index, dtype=object)
-    buy_mask = (decision_low == "BUY") & (total_high_on_low >= 0) & (total_mid_on_low >= 0)
-    sell_mask = (decision_low == "SELL") & (total_high_on_low <= 0) & (total_mid_on_low <= 0)
-    gated[buy_mask] = "BUY"
-    gated[sell_mask] = "SELL"
+def intrabar_resolver(cfg: dict, inputs: StrategyInputs) -> IntrabarResolver | None:
+    """An ``IntrabarResolver`` on ``intrabar.timeframe`` candles when ``intrabar.enabled``, served
+    from the candle store and fetched from the exchange unless the store is offline."""
+    ib_cfg = cfg.get('intrabar', {})
+    tf = ib_cfg.get('timeframe', '1m')
+    if not ib_cfg.get('enabled', False) or not can_resample(tf, inputs.tf_entry):
+        return None
+    store_cfg = cfg.get('candle_store', {})
+    store = CandleStore(store_cfg.get('root', 'data/candles')) if store_cfg.get('enabled', True) else None
+    cc = CCXTClient(cfg['exchange'], market_type=cfg['market_type'], store=store,
+                    offline=store_cfg.get('offline', False))
+    return IntrabarResolver(inputs.df_low.index, inputs.tf_entry,
+                            lambda ranges: cc.fetch_ranges_df(inputs.symbol, tf, ranges))
+
+
+def run_backtest(cfg: dict, inputs: StrategyInputs, entries: pd.Series, exits: pd.Series,
+                 intrabar: IntrabarResolver | None = None):
+    """Backtest ``entries``/``exits`` on ``inputs``. Runs repeated on the same inputs should pass one
+    ``intrabar_resolver(cfg, inputs)`` so the fine candles it loads are reused; otherwise each call
+    builds its own."""
+    rm = RiskModel(**cfg['risk'])
+    if intrabar is None:
+        intrabar = intrabar_resolver(cfg, inputs)
+    result = bt_long_sl_tp(inputs.df_low, entries, exits, inputs.atr_series, rm,
+                           cfg['backtest']['fees_bps'],
+                           cfg['backtest']['slippage_bps'],
+                           cfg['backtest']['initial_equity'],
+                           intrabar=intrabar)
+    if intrabar is not None:
+        log.info(f"Intrabar fills: {intrabar.resolved} of {intrabar.resolved + intrabar.fallback} bars touching "
+                 f"both SL and TP settled from {cfg['intrabar'].get('timeframe', '1m')} candles "
+                 f"({len(intrabar.cache)} bars loaded)")
+    return result
 
-    atr_series = atr(df_low, cfg['features']['atr']['period'])
 
-    entries = (gated == "BUY")
-    exits = (gated == "SELL")
+def run_strategy(cfg: str = "config/settings.yaml", symbol: str | None = None, tf_entry: str | None = None,
+                 out_dir: str | Path = "data/features", cprofile: bool = False) -> dict:
+    """Run one symbol/timeframe end to end and write its reports to ``out_dir``.
+
+    Per-stage timings, row counts and memory go to ``run_profile.json``; with ``cprofile`` a
+    ``run_profile.prof`` (load with ``pstats``) is written alongside.
+    """
+    cfg = yaml.safe_load(Path(cfg).read_text())
+    out_dir = Path(out_dir)
+    with profiled(f"{symbol or cfg['symbols'][0]} {tf_entry or cfg['timeframes'][0]}", cprofile) as prof:
+        m = _run_strategy(cfg, symbol, tf_entry, out_dir)
+    report = prof.write(out_dir / "run_profile.json")
+    slowest = sorted((r for r in report["stages"] if r["parent"] is None), key=lambda r: -r["seconds"])
+    log.info(f"Run took {report['total_seconds']:.2f}s (peak RSS {report['peak_rss_mb'] or 0:.0f} MB): "
+             + ", ".join(f"{r['stage']} {r['seconds']:.2f}s" for r in slowest[:4])
+             + f" → {out_dir / 'run_profile.json'}")
+    return m
+
+
+def _run_strategy(cfg: dict, symbol: str | None, tf_entry: str | None, out_dir: Path) -> dict:
+    engine = build_engine(cfg)
+    with span("prepare_inputs", compact=compact_dtype(cfg) == np.float32) as rec:
+        inputs = prepare_inputs(cfg, symbol, tf_entry)
+        rec["rows"] = len(inputs.df_low)
+    df_low = inputs.df_low
+
+    with span("gating", rows=len(df_low)):
+        entries, exits = gate_signals(engine, inputs)
 
     n_buy = int(entries.sum())
     n_sell = int(exits.sum())
     log.info(
         f"<green>BUY signals:</green> {n_buy} | <red>SELL signals:</red> {n_sell} | <blue>HOLD bars:</blue> {len(df_low) - n_buy - n_sell}")
 
-    rm = RiskModel(**cfg['risk'])
     log.info("Running backtest with ATR SL/TP and position sizing...")
-    curve, trade_records = bt_long_sl_tp(df_low, entries, exits, atr_series, rm,
-                                         cfg['backtest']['fees_bps'],
-                                         cfg['backtest']['slippage_bps'],
-                                         cfg['backtest']['initial_equity'])
+    with span("backtest", rows=len(df_low)) as rec:
+        curve, trade_records = run_backtest(cfg, inputs, entries, exits)
+        rec["trades"] = len(trade_records)
 
     # ====== Performance Analytics ======
-    out_dir = Path("data/features")
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    trades_df = generate_trade_log(trade_records)
-    trades_df.to_csv(out_dir / "trades_summary.csv", index=False)
+    with span("analytics", rows=len(curve)):
+        trades_df = generate_trade_log(trade_records)
+        m = metrics_summary(curve, trades_df, cfg['backtest']['initial_equity'])
+        dd_series = m.pop("drawdown_series")
 
-    m = metrics_summary(curve, trades_df, cfg['backtest']['initial_equity'])
-    dd_series = m.pop("drawdown_series")
-    dd_series.to_csv(out_dir / "drawdown.csv")
+    with span("write_reports", rows=len(trades_df) + len(dd_series)):
+        trades_df.to_csv(out_dir / "trades_summary.csv", index=False)
+        dd_series.to_csv(out_dir / "drawdown.csv")
+        save_parquet(curve, out_dir / "equity.parquet")
 
-    import json
-    with open(out_dir / "metrics_summary.json", "w") as f:
-        json.dump(m, f, indent=2)
+        import json
+        with open(out_dir / "metrics_summary.json", "w") as f:
+            json.dump(m, f, indent=2)
 
-    plot_equity_curve_matplotlib(curve, dd_series, save_path=str(out_dir / "equity_plot.png"))
-    create_html_dashboard(curve, dd_series, trades_df, m, save_path=str(out_dir / "equity_dashboard.html"))
+    reports = cfg.get('reports', {})
+    charts = reports.get('charts', 'inline')
+    with span("charts", rows=len(curve), mode=charts):
+        if charts == "inline":
+            write_charts(curve, dd_series, trades_df, m, out_dir, reports)
+        elif charts == "background":
+            render_reports_in_background(out_dir, reports)
+        elif charts != "off":
+            raise ValueError(f"Unknown reports.charts {charts!r}; expected 'inline', 'background' or 'off'")
 
     log.info(f"Sharpe Ratio: {m['sharpe_ratio']:.2f}")
     log.info(f"Max Drawdown: {m['max_drawdown']:.2f}%")
     log.info(f"Win Rate: {m['win_rate']:.2f}% | Profit Factor: {m['profit_factor']:.2f} | Trades: {m['num_trades']}")
     log.info(f"Total Return: {m['total_return']:.2f}% | End Equity: {m['end_equity']:,.2f}")
-    log.info(f"Equity Dashboard → {out_dir / 'equity_dashboard.html'}")
+    if charts == "inline":
+        log.info(f"Equity Dashboard → {out_dir / 'equity_dashboard.html'}")
+    elif charts == "background":
+        log.info(f"Equity Dashboard rendering in the background → {out_dir / 'equity_dashboard.html'}")
+    return m
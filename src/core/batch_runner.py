@@ -0,0 +1,54 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from pathlib import Path
+import pandas as pd
+import yaml
+
+from src.core.backtest_runner import run_strategy, log
+
+
+def pair_dir(root: Path, symbol: str, tf_entry: str) -> Path:
+    return root / f"{symbol.replace('/', '-').replace(':', '_')}_{tf_entry}"
+
+
+def _run_pair(cfg_path: str, symbol: str, tf_entry: str, out_dir: str, cprofile: bool = False) -> dict:
+    try:
+        m = run_strategy(cfg_path, symbol, tf_entry, out_dir, cprofile)
+        return {"symbol": symbol, "timeframe": tf_entry, **m, "error": None}
+    except Exception as exc:  # one bad pair must not sink the whole universe
+        return {"symbol": symbol, "timeframe": tf_entry, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def run_universe(cfg_path: str = "config/settings.yaml", workers: int | None = None,
+                 out_root: str | Path = "data/features/universe", cprofile: bool = False) -> pd.DataFrame:
+    """Backtest every symbol x entry-timeframe pair from the config across a process pool.
+
+    Each pair writes its usual report files to ``<out_root>/<symbol>_<tf>/``; the per-pair
+    metrics are collected into ``<out_root>/universe_summary.csv``.
+    """
+    cfg = yaml.safe_load(Path(cfg_path).read_text())
+    out_root = Path(out_root)
+    pairs = list(product(cfg['symbols'], cfg['timeframes']))
+    workers = workers or cfg.get('batch', {}).get('max_workers') or os.cpu_count() or 1
+    workers = max(1, min(workers, len(pairs)))
+    log.info(f"Running {len(pairs)} symbol/timeframe pairs on {workers} worker(s)...")
+
+    results = []
+    if workers == 1:
+        for symbol, tf in pairs:
+            results.append(_run_pair(cfg_path, symbol, tf, str(pair_dir(out_root, symbol, tf)), cprofile))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_pair, cfg_path, symbol, tf, str(pair_dir(out_root, symbol, tf)), cprofile)
+                       for symbol, tf in pairs]
+            for fut in as_completed(futures):
+                res = fut.result()
+                status = "failed: " + res["error"] if res["error"] else "done"
+                log.info(f"{res['symbol']} [{res['timeframe']}] {status}")
+                results.append(res)
+
+    summary = pd.DataFrame(results).sort_values(["symbol", "timeframe"]).reset_index(drop=True)
+    out_root.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(out_root / "universe_summary.csv", index=False)
+    return summary
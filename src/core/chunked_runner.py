@@ -0,0 +1,180 @@
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import yaml
+
+from src.adapters.candle_store import CandleStore
+from src.adapters.sentiment_cache import SentimentCache
+from src.adapters.sentiment_providers import SentimentStream
+from src.analytics.metrics import RunningSummary
+from src.analytics.trade_report import generate_trade_log
+from src.backtest.engine_sl_tp import ChunkedLongSlTp
+from src.core.backtest_runner import (TF_HIGH, TF_MID, StrategyInputs, build_engine, gate_signals, log,
+                                      tech_score_features, tech_subscore)
+from src.env import get_api_mode
+from src.indicators.features import compute_features
+from src.indicators.volatility import atr
+from src.signals.risk import RiskModel
+from src.utils.io import ParquetAppender
+from src.utils.mtf import align_to_lower_tf, closed_bar_positions
+from src.utils.profiling import profiled, span
+
+DEFAULT_BLOCK_BARS = 262_144
+
+
+class _HigherTimeframe:
+    """A higher-timeframe total score, completed as entry-timeframe blocks stream past.
+
+    ``prepare_inputs`` samples the entry-timeframe sentiment at each higher bar by forward fill,
+    so a higher bar's total is known once the block holding its timestamp has been seen. Entry
+    bars are only aligned to higher bars closed by their own close, which opened before them.
+    """
+
+    def __init__(self, index: pd.DatetimeIndex, tf: str, tf_entry: str, tech: pd.Series, w_trend: float,
+                 w_sentiment: float, sentiment_factor: float):
+        self.index = index
+        self.tf, self.tf_entry = tf, tf_entry
+        self.ts = index.as_unit("ns").asi8
+        self.tech = tech.to_numpy(dtype=np.float64)
+        self.weights = (w_trend, w_sentiment, sentiment_factor)
+        self.total = np.full(len(index), np.nan)
+        self.done = 0
+        self.last_sentiment = np.nan
+
+    def advance(self, block_index: pd.DatetimeIndex, sentiment: np.ndarray) -> pd.Series:
+        """Complete the higher bars up to the block's end and return the score aligned to the block."""
+        bts = block_index.as_unit("ns").asi8
+        stop = int(np.searchsorted(self.ts, bts[-1], side="right"))
+        pos = np.searchsorted(bts, self.ts[self.done:stop], side="right") - 1
+        sent = np.where(pos >= 0, sentiment[np.maximum(pos, 0)], self.last_sentiment)
+        w_trend, w_sentiment, factor = self.weights
+        # Same operation order as prepare_inputs, so the totals match bit for bit.
+        self.total[self.done:stop] = self.tech[self.done:stop] * w_trend + sent * w_sentiment * factor
+        self.done = stop
+        self.last_sentiment = sentiment[-1]
+        positions = closed_bar_positions(self.index, self.tf, block_index, self.tf_entry)
+        return align_to_lower_tf(pd.Series(self.total, index=self.index), positions, block_index)
+
+
+def run_strategy_chunked(cfg: str = "config/settings.yaml", symbol: str | None = None, tf_entry: str | None = None,
+                         out_dir: str | Path = "data/features", block_bars: int | None = None) -> dict:
+    """Backtest the full stored history of one symbol/timeframe without loading it at once.
+
+    Entry-timeframe candles stream from the candle store in blocks of ``block_bars``
+    (``memory.block_bars`` by default). Indicator recurrences, the sentiment smoothing and the
+    open position carry over between blocks, and each block's equity, trades and drawdown are
+    appended to ``equity.parquet`` / ``trades_summary.csv`` / ``drawdown.csv`` before the next is
+    read, so the result equals an in-memory run over the same candles (metrics as noted on
+    ``RunningSummary``). Charts are skipped; ``manage.py dashboard --dir <out_dir>`` draws them
+    afterwards from these files. The 4h/1d frames are small and loaded whole. Always
+    float64: ``memory.compact`` does not apply.
+    """
+    cfg = yaml.safe_load(Path(cfg).read_text())
+    cfg['memory'] = {**cfg.get('memory', {}), 'compact': False}
+    block_bars = int(block_bars or cfg['memory'].get('block_bars', DEFAULT_BLOCK_BARS))
+    out_dir = Path(out_dir)
+    symbol = symbol or cfg['symbols'][0]
+    tf_entry = tf_entry or cfg['timeframes'][0]
+    with profiled(f"{symbol} {tf_entry} chunked") as prof:
+        m = _run_chunked(cfg, symbol, tf_entry, out_dir, block_bars)
+    report = prof.write(out_dir / "run_profile.json")
+    log.info(f"Chunked run took {report['total_seconds']:.2f}s (peak RSS {report['peak_rss_mb'] or 0:.0f} MB)"
+             f" → {out_dir / 'run_profile.json'}")
+    return m
+
+
+def _run_chunked(cfg: dict, symbol: str, tf_entry: str, out_dir: Path, block_bars: int) -> dict:
+    api_mode = cfg.get('api_mode') or get_api_mode()
+    engine = build_engine(cfg)
+    store = CandleStore(cfg.get('candle_store', {}).get('root', 'data/candles'))
+    market = (cfg['exchange'], cfg['market_type'], symbol)
+    if not store.path_for(*market, tf_entry).exists():
+        raise FileNotFoundError(f"No stored {tf_entry} candles for {symbol} at {store.path_for(*market, tf_entry)}; "
+                                f"chunked runs read the candle store only")
+
+    sentiment_weight_factor = 0.5 if api_mode == "offline" else 1.0
+    with span("higher_timeframes") as rec:
+        higher = []
+        for tf in (TF_HIGH, TF_MID):
+            df = store.load(*market, tf)
+            higher.append(_HigherTimeframe(df.index, tf, tf_entry, tech_subscore(df, cfg), engine.w.trend,
+                                           engine.w.sentiment_macro, sentiment_weight_factor))
+        rec["rows"] = sum(len(h.index) for h in higher)
+
+    sent_cfg = cfg.get('sentiment', {})
+    sc_cfg = cfg.get('sentiment_cache', {})
+    sent_cache = None
+    if sc_cfg.get('enabled', True):
+        sent_cache = SentimentCache(sc_cfg.get('root', 'data/cache/sentiment'), sc_cfg.get('ttl_hours'))
+    sent_sources: dict = {}
+    sentiment = SentimentStream(symbol, api_mode, use_fear_greed=sent_cfg.get('use_fear_greed', True),
+                                use_funding=sent_cfg.get('use_funding', True),
+                                use_news=sent_cfg.get('use_news', True), cache=sent_cache, report=sent_sources)
+    if sent_sources:
+        log.info("Sentiment sources: " + ", ".join(f"{k}={v}" for k, v in sent_sources.items()))
+
+    backtest = ChunkedLongSlTp(RiskModel(**cfg['risk']), cfg['backtest']['fees_bps'],
+                               cfg['backtest']['slippage_bps'], cfg['backtest']['initial_equity'])
+    atr_period = cfg['features']['atr']['period']
+    out_dir.mkdir(parents=True, exist_ok=True)
+    equity_out = ParquetAppender(out_dir / "equity.parquet")
+    trades_path = out_dir / "trades_summary.csv"
+    dd_path = out_dir / "drawdown.csv"
+    for path in (trades_path, dd_path):
+        path.unlink(missing_ok=True)
+    summary = RunningSummary()
+    feat_seed = atr_seed = None
+    prev_hist = np.nan
+    n_bars = n_trades = n_buy = n_sell = 0
+
+    for i, df in enumerate(store.iter_blocks(*market, tf_entry, block_bars)):
+        with span("block", block=i, rows=len(df)) as rec:
+            sent = sentiment.block(df.index)
+            feats = compute_features(df, cfg['features'], seed=feat_seed)
+            tech = pd.Series(tech_score_features(df, feats, cfg, prev_hist=prev_hist), index=df.index)
+            sent_values = sent.to_numpy()
+            inputs = StrategyInputs(
+                symbol=symbol,
+                tf_entry=tf_entry,
+                df_low=df,
+                total_low=(tech * engine.w.trend) + (sent * engine.w.sentiment_macro * sentiment_weight_factor),
+                total_high_on_low=higher[0].advance(df.index, sent_values),
+                total_mid_on_low=higher[1].advance(df.index, sent_values),
+                atr_series=atr(df, atr_period, atr_seed),
+            )
+            entries, exits = gate_signals(engine, inputs)
+            curve, records = backtest.run_block(df, entries, exits, inputs.atr_series)
+
+            trades_df = generate_trade_log(records)
+            equity_out.append(curve)
+            summary.update(curve, trades_df).to_csv(dd_path, mode="a", header=i == 0)
+            if records:
+                trades_df.to_csv(trades_path, mode="a", header=n_trades == 0, index=False)
+            feat_seed = (feats.iloc[-1], df['close'].iloc[-1])
+            atr_seed = (df['close'].iloc[-1], inputs.atr_series.iloc[-1])
+            prev_hist = float(feats['macd_hist'].iloc[-1])
+            n_bars += len(df)
+            n_trades += len(records)
+            n_buy += int(entries.sum())
+            n_sell += int(exits.sum())
+            rec["trades"] = len(records)
+        log.info(f"Block {i}: {len(df):,} bars up to {df.index[-1]} | {n_trades} trades so far")
+    equity_out.close()
+    if n_bars == 0:
+        raise ValueError(f"Stored {tf_entry} candles for {symbol} are empty")
+
+    log.info(f"<green>BUY signals:</green> {n_buy} | <red>SELL signals:</red> {n_sell} | "
+             f"<blue>HOLD bars:</blue> {n_bars - n_buy - n_sell}")
+    m = summary.result(cfg['backtest']['initial_equity'])
+    if not n_trades:
+        generate_trade_log([]).to_csv(trades_path, index=False)
+    with open(out_dir / "metrics_summary.json", "w") as f:
+        json.dump(m, f, indent=2)
+
+    log.info(f"Sharpe Ratio: {m['sharpe_ratio']:.2f}")
+    log.info(f"Max Drawdown: {m['max_drawdown']:.2f}%")
+    log.info(f"Win Rate: {m['win_rate']:.2f}% | Profit Factor: {m['profit_factor']:.2f} | Trades: {m['num_trades']}")
+    log.info(f"Total Return: {m['total_return']:.2f}% | End Equity: {m['end_equity']:,.2f}")
+    log.info(f"Equity → {out_dir / 'equity.parquet'}, trades → {trades_path}, drawdown → {dd_path}")
+    return m
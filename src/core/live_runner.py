@@ -0,0 +1,222 @@
+import json
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+import numpy as np
+import pandas as pd
+
+from src.adapters.sentiment_cache import SentimentCache
+from src.adapters.sentiment_providers import get_combined_sentiment, pending_request
+from src.core.backtest_runner import TF_HIGH, TF_MID, tech_score_arrays, log
+from src.indicators.features import compute_features
+from src.indicators.streaming import FeatureState
+from src.signals.confluence import ConfluenceEngine, BUY, SELL, DECISION_LABELS
+from src.utils.timeframes import timeframe_to_ms
+
+
+@dataclass
+class Candle:
+    """A closed candle; ``timestamp`` is the bar open time, as everywhere else in the repo."""
+    symbol: str
+    timeframe: str
+    timestamp: pd.Timestamp
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+
+
+@dataclass
+class Decision:
+    symbol: str
+    timeframe: str
+    bar_time: pd.Timestamp
+    decision: str
+    score: float
+    latency_us: float
+
+
+class ReplayCandleSource:
+    """Replay closed candles from a CSV/Parquet file with symbol, timeframe, timestamp and OHLCV columns.
+
+    Rows are emitted in bar *close* order, so a higher-timeframe bar is delivered before the
+    entry bars that follow its close, just as a live feed would.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+
+    def __iter__(self) -> Iterator[Candle]:
+        df = pd.read_parquet(self.path) if self.path.suffix == ".parquet" else pd.read_csv(self.path)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        tf_ms = df["timeframe"].map(timeframe_to_ms)
+        df["_close_time"] = df["timestamp"] + pd.to_timedelta(tf_ms, unit="ms")
+        df = df.sort_values(["_close_time", "timestamp"], kind="stable")
+        for row in df.itertuples(index=False):
+            yield Candle(row.symbol, row.timeframe, row.timestamp, float(row.open), float(row.high),
+                         float(row.low), float(row.close), float(getattr(row, "volume", 0.0)))
+
+
+class PollingCandleSource:
+    """Poll an exchange through ``CCXTClient`` and emit each candle once it has closed."""
+
+    def __init__(self, client, symbols: list[str], timeframes: list[str], poll_seconds: float = 2.0):
+        self.client = client
+        self.keys = [(s, tf) for s in symbols for tf in timeframes]
+        self.poll_seconds = poll_seconds
+        self.last_emitted: dict[tuple[str, str], int] = {}
+
+    def __iter__(self) -> Iterator[Candle]:
+        while True:
+            now = self.client.ex.milliseconds()
+            for symbol, tf in self.keys:
+                tf_ms = timeframe_to_ms(tf)
+                rows = self.client.ex.fetch_ohlcv(symbol, timeframe=tf, limit=3)
+                closed = [r for r in rows if r[0] + tf_ms <= now]
+                last = self.last_emitted.get((symbol, tf))
+                if last is None:
+                    # Start from the newest closed bar; history comes from warm-up.
+                    closed = closed[-1:]
+                for ts, o, h, l, c, v in closed:
+                    if last is not None and ts <= last:
+                        continue
+                    self.last_emitted[(symbol, tf)] = ts
+                    yield Candle(symbol, tf, pd.Timestamp(ts, unit="ms"), o, h, l, c, v)
+            time.sleep(self.poll_seconds)
+
+
+class _TimeframeState:
+    def __init__(self, features: FeatureState):
+        self.features = features
+        self.last_ts: pd.Timestamp | None = None
+        self.prev_hist = np.nan
+        self.total = np.nan
+
+
+class LiveSentiment:
+    """Combined sentiment per symbol for ``LiveSignalRunner``, kept current over a long session.
+
+    ``warm_up`` builds a symbol's series over its entry-timeframe history. A later bar past the
+    end of the series rebuilds it with that bar appended once a provider request is due again,
+    i.e. once a source's ``SentimentCache`` entry has expired (every such bar without a cache);
+    only the data after the cached tail is then requested. Until then the last value stands.
+    Offline, sources are simulated and never re-queried.
+    """
+
+    def __init__(self, api_mode: str, sent_cfg: dict, cache: SentimentCache | None = None, max_bars: int = 1500):
+        self.api_mode = api_mode
+        self.cache = cache
+        self.max_bars = max_bars
+        self.flags = dict(
+            use_fear_greed=sent_cfg.get('use_fear_greed', True),
+            use_funding=sent_cfg.get('use_funding', True),
+            use_news=sent_cfg.get('use_news', True),
+        )
+        self.series: dict[str, pd.Series] = {}
+
+    def _build(self, symbol: str, index: pd.DatetimeIndex) -> pd.Series:
+        sources = {}
+        self.series[symbol] = get_combined_sentiment(symbol, index[-self.max_bars:], self.api_mode, cache=self.cache,
+                                                     report=sources, **self.flags)
+        log.info(f"{symbol} sentiment sources: " + ", ".join(f"{k}={v}" for k, v in sources.items()))
+        return self.series[symbol]
+
+    def warm_up(self, symbol: str, index: pd.DatetimeIndex):
+        self._build(symbol, index)
+
+    def _refresh_due(self, symbol: str) -> bool:
+        names = [name for name, flag in (("fear_greed", "use_fear_greed"), ("funding", "use_funding"),
+                                          ("news", "use_news")) if self.flags[flag]]
+        return any(pending_request(name, symbol, self.api_mode, self.cache) is not None for name in names)
+
+    def __call__(self, symbol: str, ts: pd.Timestamp) -> float:
+        s = self.series.get(symbol)
+        if s is None or s.empty:
+            return 0.0
+        if ts > s.index[-1] and self._refresh_due(symbol):
+            s = self._build(symbol, s.index.append(pd.DatetimeIndex([ts])))
+        return float(s.asof(ts))
+
+
+class LiveSignalRunner:
+    """Event-driven confluence signals over a stream of closed candles.
+
+    Each candle only advances the streaming indicators of its own symbol/timeframe. Candles on
+    the entry timeframe then re-run the decision and the 4h/1d gate against the latest *closed*
+    higher-timeframe scores and emit a ``Decision`` for BUY/SELL.
+    """
+
+    def __init__(self, cfg: dict, engine: ConfluenceEngine,
+                 sentiment: Callable[[str, pd.Timestamp], float] | None = None,
+                 sentiment_weight_factor: float = 1.0):
+        self.cfg = cfg
+        self.engine = engine
+        self.tf_entry = cfg['timeframes'][0]
+        self.sentiment = sentiment or (lambda symbol, ts: 0.0)
+        self.sentiment_weight_factor = sentiment_weight_factor
+        self.states: dict[tuple[str, str], _TimeframeState] = {}
+
+    def _state(self, symbol: str, timeframe: str) -> _TimeframeState:
+        key = (symbol, timeframe)
+        if key not in self.states:
+            self.states[key] = _TimeframeState(FeatureState(self.cfg['features']))
+        return self.states[key]
+
+    def _total(self, symbol: str, ts: pd.Timestamp, close: float, row: dict, prev_hist: float) -> float:
+        windows = self.cfg['features']['ema']['windows']
+        e20, e50, e200 = (row[f"ema_{w}"] for w in windows)
+        tech = tech_score_arrays(
+            np.array([close]), e20, e50, e200, row["rsi"], row["macd_line"], row["macd_signal"],
+            row["macd_hist"], prev_hist, row["supertrend"],
+        )[0]
+        return (tech * self.engine.w.trend +
+                self.sentiment(symbol, ts) * self.engine.w.sentiment_macro * self.sentiment_weight_factor)
+
+    def warm_up(self, symbol: str, timeframe: str, df: pd.DataFrame):
+        """Seed one symbol/timeframe from historical candles (batch-computed, then resumed)."""
+        if df.empty:
+            return
+        feats = compute_features(df, self.cfg['features'])
+        last = feats.iloc[-1]
+        state = self._state(symbol, timeframe)
+        state.features = FeatureState.from_row(self.cfg['features'], last, float(df['close'].iloc[-1]))
+        prev_hist = float(feats['macd_hist'].iloc[-2]) if len(feats) > 1 else np.nan
+        state.total = self._total(symbol, df.index[-1], float(df['close'].iloc[-1]), last, prev_hist)
+        state.prev_hist = float(last["macd_hist"])
+        state.last_ts = df.index[-1]
+
+    def on_candle(self, candle: Candle) -> Decision | None:
+        t0 = time.perf_counter()
+        state = self._state(candle.symbol, candle.timeframe)
+        if state.last_ts is not None and candle.timestamp <= state.last_ts:
+            return None
+        row = state.features.update(candle.high, candle.low, candle.close)
+        state.total = self._total(candle.symbol, candle.timestamp, candle.close, row, state.prev_hist)
+        state.prev_hist = row["macd_hist"]
+        state.last_ts = candle.timestamp
+        if candle.timeframe != self.tf_entry:
+            return None
+
+        higher = [self.states.get((candle.symbol, tf)) for tf in (TF_HIGH, TF_MID)]
+        higher_totals = [[s.total if s is not None else np.nan] for s in higher]
+        code = self.engine.gate_codes(self.engine.decide_array([state.total]), higher_totals)[0]
+        if code not in (BUY, SELL):
+            return None
+        return Decision(candle.symbol, candle.timeframe, candle.timestamp, DECISION_LABELS[int(code)],
+                        float(state.total), (time.perf_counter() - t0) * 1e6)
+
+    def run(self, source: Iterable[Candle]) -> Iterator[Decision]:
+        for candle in source:
+            decision = self.on_candle(candle)
+            if decision is not None:
+                yield decision
+
+
+def append_decision(path: Path, decision: Decision):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps({**asdict(decision), "bar_time": decision.bar_time.isoformat()}) + "\n")
+    log.info(f"{decision.bar_time} {decision.symbol} [{decision.timeframe}] {decision.decision} "
+             f"score={decision.score:.3f} ({decision.latency_us:.0f}us)")
@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+import yaml
+
+from src.analytics.metrics import summary as metrics_summary
+from src.analytics.trade_report import generate_trade_log
+from src.analytics.visuals import render_reports_in_background, write_charts
+from src.backtest.portfolio import bt_portfolio_long_sl_tp
+from src.core.backtest_runner import build_engine, gate_signals, log, prepare_inputs
+from src.signals.risk import RiskModel
+from src.utils.io import save_parquet
+from src.utils.profiling import profiled, span
+
+
+def run_portfolio(cfg: str = "config/settings.yaml", symbols: list[str] | None = None, tf_entry: str | None = None,
+                  out_dir: str | Path = "data/features/portfolio", cprofile: bool = False) -> dict:
+    """Backtest several symbols on one entry timeframe against a shared cash pool.
+
+    Signals are built per symbol exactly as in ``run_strategy``; the trades are then simulated
+    together by ``bt_portfolio_long_sl_tp`` with the caps from the ``portfolio`` config section.
+    Writes the usual report files for the combined curve plus ``attribution.csv`` (one row per
+    symbol) to ``out_dir``.
+    """
+    cfg = yaml.safe_load(Path(cfg).read_text())
+    symbols = symbols or cfg['symbols']
+    tf_entry = tf_entry or cfg['timeframes'][0]
+    out_dir = Path(out_dir)
+    with profiled(f"portfolio {len(symbols)} symbols {tf_entry}", cprofile) as prof:
+        m = _run_portfolio(cfg, symbols, tf_entry, out_dir)
+    report = prof.write(out_dir / "run_profile.json")
+    log.info(f"Portfolio run took {report['total_seconds']:.2f}s (peak RSS {report['peak_rss_mb'] or 0:.0f} MB) "
+             f"→ {out_dir / 'run_profile.json'}")
+    return m
+
+
+def _run_portfolio(cfg: dict, symbols: list[str], tf_entry: str, out_dir: Path) -> dict:
+    engine = build_engine(cfg)
+    streams = {}
+    for symbol in symbols:
+        with span("prepare_inputs", symbol=symbol) as rec:
+            inputs = prepare_inputs(cfg, symbol, tf_entry)
+            rec["rows"] = len(inputs.df_low)
+        with span("gating", symbol=symbol, rows=len(inputs.df_low)):
+            entries, exits = gate_signals(engine, inputs)
+        log.info(f"{symbol}: {int(entries.sum())} BUY / {int(exits.sum())} SELL signals over {len(inputs.df_low)} bars")
+        streams[symbol] = (inputs.df_low, entries, exits, inputs.atr_series)
+
+    pf = cfg.get('portfolio', {})
+    log.info(f"Running portfolio backtest over {len(symbols)} symbols with a shared cash pool...")
+    with span("backtest", rows=sum(len(s[0]) for s in streams.values())) as rec:
+        curve, trade_records, attribution = bt_portfolio_long_sl_tp(
+            streams, RiskModel(**cfg['risk']), cfg['backtest']['fees_bps'], cfg['backtest']['slippage_bps'],
+            cfg['backtest']['initial_equity'], pf.get('max_symbol_exposure'), pf.get('max_total_exposure'))
+        rec["trades"] = len(trade_records)
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    with span("analytics", rows=len(curve)):
+        trades_df = generate_trade_log(trade_records)
+        m = metrics_summary(curve, trades_df, cfg['backtest']['initial_equity'])
+        dd_series = m.pop("drawdown_series")
+
+    with span("write_reports", rows=len(trades_df) + len(dd_series)):
+        trades_df.to_csv(out_dir / "trades_summary.csv", index=False)
+        attribution.to_csv(out_dir / "attribution.csv", index=False)
+        dd_series.to_csv(out_dir / "drawdown.csv")
+        save_parquet(curve, out_dir / "equity.parquet")
+        with open(out_dir / "metrics_summary.json", "w") as f:
+            json.dump({"symbols": symbols, "tf_entry": tf_entry, **m}, f, indent=2)
+
+    reports = cfg.get('reports', {})
+    charts = reports.get('charts', 'inline')
+    with span("charts", rows=len(curve), mode=charts):
+        if charts == "inline":
+            write_charts(curve, dd_series, trades_df, m, out_dir, reports)
+        elif charts == "background":
+            render_reports_in_background(out_dir, reports)
+        elif charts != "off":
+            raise ValueError(f"Unknown reports.charts {charts!r}; expected 'inline', 'background' or 'off'")
+
+    for row in attribution.itertuples():
+        log.info(f"{row.symbol}: {row.trades} trades, pnl {row.pnl:,.2f} ({row.return_contribution:.2f}%), "
+                 f"in market {row.time_in_market:.1f}%, {row.rejected_entries} entries rejected")
+    log.info(f"Total Return: {m['total_return']:.2f}% | Sharpe {m['sharpe_ratio']:.2f} | "
+             f"Max Drawdown {m['max_drawdown']:.2f}% | Trades {m['num_trades']} | End Equity {m['end_equity']:,.2f}")
+    log.info(f"Portfolio reports → {out_dir}")
+    return m
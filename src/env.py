@@ -1,12 +1,20 @@
-from dotenv import load_dotenv
 from pathlib import Path
 import os
 
-# Load .env automatically at import
-load_dotenv(dotenv_path=Path(".env"), override=True)
+_dotenv_loaded = False
+
+
+def _load_dotenv():
+    # Load .env on first use rather than at import, so importing modules stays side-effect free.
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path=Path(".env"), override=True)
+        _dotenv_loaded = True
 
 def get_env(key: str, default=None) -> str:
-    """Fetch a variable from environment or return default."""
+    """Fetch a variable from environment (after loading .env) or return default."""
+    _load_dotenv()
     return os.getenv(key, default)
 
 def get_api_keys() -> dict:
@@ -17,6 +25,13 @@ def get_api_keys() -> dict:
         "santiment": get_env("SANTIMENT_API_KEY", ""),
     }
 
-# Common globals for convenience
-API_MODE = get_env("API_MODE", "offline")
-BINANCE_TYPE = get_env("BINANCE_TYPE", "futures")
+def get_api_mode() -> str:
+    return get_env("API_MODE", "offline")
+
+# Common globals for convenience, resolved lazily on attribute access.
+_LAZY_GLOBALS = {"API_MODE": ("API_MODE", "offline"), "BINANCE_TYPE": ("BINANCE_TYPE", "futures")}
+
+def __getattr__(name: str):
+    if name in _LAZY_GLOBALS:
+        return get_env(*_LAZY_GLOBALS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
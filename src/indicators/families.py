@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from src.indicators.streaming import ewm_mean
+from src.indicators.trend import _supertrend_kernel
+from src.indicators.volatility import true_range
+
+
+class IndicatorFamilies:
+    """The ``compute_features`` indicators of one candle frame for many parameter sets at once.
+
+    Every distinct computation runs once and is kept: EMAs of all requested spans (the EMA
+    windows and the MACD legs) form one ``(bars, spans)`` matrix, RSI periods share one price
+    delta and its gain/loss split, and Supertrends share one true range, with one ATR per period
+    reused by every multiplier. Each result equals the matching ``compute_features`` column.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.index = df.index
+        self.close = df['close'].astype(np.float64)
+        self.spans: list[int] = []
+        self.ema_matrix = np.empty((len(df), 0))
+        self._hl2 = (df['high'].to_numpy(dtype=np.float64) + df['low'].to_numpy(dtype=np.float64)) / 2.0
+        self._tr = pd.Series(true_range(df), index=df.index)
+        self._delta = None
+        self._rsi: dict[int, np.ndarray] = {}
+        self._signal: dict[tuple[int, int, int], np.ndarray] = {}
+        self._atr: dict[int, np.ndarray] = {}
+        self._supertrend: dict[tuple[int, float], np.ndarray] = {}
+
+    def add_spans(self, spans):
+        """Extend the EMA matrix with any of ``spans`` it does not hold yet, one column each."""
+        new = sorted(set(int(s) for s in spans) - set(self.spans))
+        if new:
+            cols = [ewm_mean(self.close, span=s).to_numpy() for s in new]
+            self.ema_matrix = np.column_stack([self.ema_matrix, *cols])
+            self.spans += new
+
+    def ema(self, span: int) -> np.ndarray:
+        self.add_spans([span])
+        return self.ema_matrix[:, self.spans.index(int(span))]
+
+    def rsi(self, period: int) -> np.ndarray:
+        if period not in self._rsi:
+            if self._delta is None:
+                delta = self.close.diff()
+                self._delta = (delta.clip(lower=0), -delta.clip(upper=0))
+            up, down = self._delta
+            gain = ewm_mean(up, alpha=1/period)
+            loss = ewm_mean(down, alpha=1/period)
+            self._rsi[period] = (100 - (100 / (1 + gain / (loss.replace(0, 1e-12))))).to_numpy()
+        return self._rsi[period]
+
+    def macd(self, fast: int, slow: int, signal: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """``(line, signal, hist)``; the legs come from the EMA matrix."""
+        line = self.ema(fast) - self.ema(slow)
+        key = (fast, slow, signal)
+        if key not in self._signal:
+            self._signal[key] = ewm_mean(pd.Series(line, index=self.index), span=signal).to_numpy()
+        sig = self._signal[key]
+        return line, sig, line - sig
+
+    def supertrend(self, period: int, multiplier: float) -> np.ndarray:
+        key = (period, float(multiplier))
+        if key not in self._supertrend:
+            if period not in self._atr:
+                self._atr[period] = ewm_mean(self._tr, alpha=1/period).to_numpy()
+            offset = multiplier * self._atr[period]
+            st, _ = _supertrend_kernel(self.close.to_numpy(), self._hl2 + offset, self._hl2 - offset)
+            self._supertrend[key] = st
+        return self._supertrend[key]
+
+    @property
+    def counts(self) -> dict[str, int]:
+        """How many distinct series of each family have been computed."""
+        return {"ema": len(self.spans), "rsi": len(self._rsi), "macd_signal": len(self._signal),
+                "atr": len(self._atr), "supertrend": len(self._supertrend)}
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from src.indicators.features import compute_features, extend_features
+from src.utils.io import save_parquet, load_parquet
+
+
+def params_hash(features_cfg: dict) -> str:
+    return hashlib.sha1(json.dumps(features_cfg, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def candles_hash(df: pd.DataFrame) -> str:
+    h = hashlib.sha1(df.index.as_unit("ms").asi8.tobytes())
+    for col in ("open", "high", "low", "close"):
+        h.update(np.ascontiguousarray(df[col].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+class FeatureCache:
+    """Size-bounded LRU cache of ``compute_features`` frames stored as Parquet files.
+
+    Entries are keyed by the indicator parameters and the first candle timestamp, and validated
+    against a hash of the candles they were computed on. When the requested candles extend a
+    cached range (optionally replacing its last, possibly still-forming bar) only the new bars
+    are computed. ``stats`` counts hits, extensions, misses and evictions and estimates the
+    compute time saved.
+    """
+
+    def __init__(self, root: Path | str = "data/cache/features", max_bytes: int = 256 * 1024 * 1024,
+                 max_extend_rows: int = 5000):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_extend_rows = max_extend_rows
+        self.index_path = self.root / "index.json"
+        self.index: dict = json.loads(self.index_path.read_text()) if self.index_path.exists() else {}
+        self.stats = {"hits": 0, "extended": 0, "misses": 0, "evictions": 0, "seconds_saved": 0.0}
+        self._evicted: set[str] = set()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.parquet"
+
+    def _reusable_rows(self, entry: dict, df: pd.DataFrame) -> int:
+        """How many leading cached rows are still valid for ``df`` (0 when none are)."""
+        n = entry["rows"]
+        if n <= len(df) and candles_hash(df.iloc[:n]) == entry["candles_hash"]:
+            return n
+        if 1 < n <= len(df) + 1 and candles_hash(df.iloc[:n - 1]) == entry["prefix_hash"]:
+            return n - 1
+        return 0
+
+    def get(self, df: pd.DataFrame, features_cfg: dict, dtype=np.float64) -> pd.DataFrame:
+        if df.empty:
+            return compute_features(df, features_cfg, dtype)
+        # Compact (float32) frames are cached separately: they are not bit-identical to float64 ones.
+        suffix = "" if np.dtype(dtype) == np.float64 else f"-{np.dtype(dtype).name}"
+        key = f"{params_hash(features_cfg)}{suffix}-{int(df.index[:1].as_unit('ms').asi8[0])}"
+        entry = self.index.get(key)
+        t0 = time.perf_counter()
+
+        reuse = 0
+        if entry is not None and self._path(key).exists():
+            reuse = self._reusable_rows(entry, df)
+        if reuse > 0 and reuse == len(df):
+            self.stats["hits"] += 1
+            cached = load_parquet(self._path(key))
+            features = cached.iloc[:reuse].set_axis(df.index)
+            entry["last_used"] = time.time()
+            self.stats["seconds_saved"] += max(entry["compute_seconds"] - (time.perf_counter() - t0), 0.0)
+            self._write_index()
+            return features
+
+        extendable = (
+            reuse > 0
+            and len(df) - reuse <= self.max_extend_rows
+            and not df[["high", "low", "close"]].isna().to_numpy().any()
+        )
+        if extendable:
+            self.stats["extended"] += 1
+            cached = load_parquet(self._path(key)).iloc[:reuse]
+            features = extend_features(cached, df, features_cfg)
+            if np.dtype(dtype) != np.float64:
+                features = features.astype({c: dtype for c in features.columns if c != "st_direction"})
+            elapsed = time.perf_counter() - t0
+            full_seconds = entry["compute_seconds"] * len(df) / max(entry["rows"], 1)
+            self.stats["seconds_saved"] += max(full_seconds - elapsed, 0.0)
+        else:
+            self.stats["misses"] += 1
+            features = compute_features(df, features_cfg, dtype)
+            full_seconds = time.perf_counter() - t0
+
+        features.index = df.index
+        self._store(key, df, features, full_seconds)
+        return features
+
+    def _store(self, key: str, df: pd.DataFrame, features: pd.DataFrame, compute_seconds: float):
+        path = self._path(key)
+        save_parquet(features, path)
+        self.index[key] = {
+            "rows": len(df),
+            "candles_hash": candles_hash(df),
+            "prefix_hash": candles_hash(df.iloc[:-1]),
+            "bytes": path.stat().st_size,
+            "compute_seconds": compute_seconds,
+            "last_used": time.time(),
+        }
+        self._evict()
+        self._write_index()
+
+    def _evict(self):
+        total = sum(e["bytes"] for e in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]["last_used"]):
+            if total <= self.max_bytes or len(self.index) <= 1:
+                break
+            total -= self.index.pop(key)["bytes"]
+            self._path(key).unlink(missing_ok=True)
+            self._evicted.add(key)
+            self.stats["evictions"] += 1
+
+    def _write_index(self):
+        # Other processes may share the cache: keep their entries and replace the file atomically.
+        self.root.mkdir(parents=True, exist_ok=True)
+        if self.index_path.exists():
+            for key, entry in json.loads(self.index_path.read_text()).items():
+                if key not in self.index and key not in self._evicted and self._path(key).exists():
+                    self.index[key] = entry
+        tmp = self.index_path.with_name(f"index.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.index, indent=2))
+        os.replace(tmp, self.index_path)
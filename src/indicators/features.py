@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+from src.indicators.trend import ema, supertrend_bands, _supertrend_kernel
+from src.indicators.momentum import rsi_averages
+from src.indicators.streaming import FeatureState
+
+# Columns besides the indicators themselves that carry the recursive state needed to extend a
+# feature frame with new bars: RSI gain/loss averages, the MACD component EMAs and the ATR the
+# Supertrend bands are built from.
+STATE_COLUMNS = ("rsi_gain", "rsi_loss", "macd_fast", "macd_slow", "st_atr")
+
+
+def iter_features(df: pd.DataFrame, features_cfg: dict, seed: tuple | None = None):
+    """Yield ``(column, float64 Series)`` for every feature in ``compute_features`` order.
+
+    Consumers that only need to fold each indicator into a running result (compact memory mode)
+    can drop columns as they arrive instead of holding the whole frame.
+
+    ``seed`` is ``(row, prev_close)``: the last ``compute_features`` row of the bars preceding
+    ``df`` and the close it was computed on. Every recurrence then resumes from that row, so
+    consecutive blocks of NaN-free candles give exactly the rows of one run over all of them.
+    """
+    row, prev_close = seed if seed is not None else (None, None)
+
+    def last(col):
+        return None if row is None else float(row[col])
+
+    close = df['close']
+    for w in features_cfg['ema']['windows']:
+        yield f"ema_{w}", ema(close, w, last(f"ema_{w}"))
+
+    rsi_seed = None if row is None else (prev_close, last("rsi_gain"), last("rsi_loss"))
+    gain, loss = rsi_averages(close, features_cfg['rsi']['period'], rsi_seed)
+    yield "rsi_gain", gain
+    yield "rsi_loss", loss
+    yield "rsi", 100 - (100 / (1 + gain / (loss.replace(0, 1e-12))))
+    del gain, loss
+
+    macd_cfg = features_cfg['macd']
+    fast = ema(close, macd_cfg['fast'], last("macd_fast"))
+    slow = ema(close, macd_cfg['slow'], last("macd_slow"))
+    line = fast - slow
+    signal_line = ema(line, macd_cfg['signal'], last("macd_signal"))
+    yield "macd_fast", fast
+    yield "macd_slow", slow
+    del fast, slow
+    yield "macd_line", line
+    yield "macd_signal", signal_line
+    yield "macd_hist", line - signal_line
+    del line, signal_line
+
+    st_seed = None if row is None else (prev_close, last("st_atr"))
+    upperband, lowerband, st_atr = supertrend_bands(df, **features_cfg['supertrend'], seed=st_seed)
+    st, direction = _supertrend_kernel(
+        close.to_numpy(), upperband.to_numpy(), lowerband.to_numpy(),
+        seed=None if row is None else (last("supertrend"), int(row["st_direction"])),
+    )
+    del upperband, lowerband
+    yield "st_atr", st_atr
+    yield "supertrend", pd.Series(st, index=df.index)
+    yield "st_direction", pd.Series(direction, index=df.index)
+
+
+def compute_features(df: pd.DataFrame, features_cfg: dict, dtype=np.float64, state: bool = True,
+                     seed: tuple | None = None) -> pd.DataFrame:
+    """Compute every indicator ``tech_subscore`` uses, plus their recursive state columns.
+
+    Recurrences always run in float64. With ``dtype=np.float32`` (compact memory mode) each column
+    is downcast as soon as it is produced, so only a few float64 temporaries are alive at a time.
+    ``state=False`` drops the ``STATE_COLUMNS`` when the frame will never be extended; ``seed``
+    resumes from a previous block as in ``iter_features``.
+    """
+    cols = {}
+    for name, s in iter_features(df, features_cfg, seed):
+        if not state and name in STATE_COLUMNS:
+            continue
+        cols[name] = s if name == "st_direction" or s.dtype == dtype else s.astype(dtype)
+    # copy=False keeps one block per column instead of consolidating them into a fresh 2-D copy.
+    return pd.DataFrame(cols, index=df.index, copy=False)
+
+
+def extend_features(features: pd.DataFrame, df: pd.DataFrame, features_cfg: dict) -> pd.DataFrame:
+    """Append rows for ``df.iloc[len(features):]`` by resuming every recurrence from the last row.
+
+    ``df`` holds the full candle history the existing ``features`` were computed on, followed by
+    the new bars. The candles must be NaN free; the result matches ``compute_features(df)``
+    exactly.
+    """
+    start = len(features)
+    if start == 0:
+        return compute_features(df, features_cfg)
+    state = FeatureState.from_row(features_cfg, features.iloc[-1], float(df['close'].iloc[start - 1]))
+
+    new = df.iloc[start:]
+    cols = state.update_many(new['high'], new['low'], new['close'])
+    tail = pd.DataFrame(cols, index=new.index)[list(features.columns)]
+    return pd.concat([features, tail])
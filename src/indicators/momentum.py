@@ -1,9 +1,22 @@
 import pandas as pd
 
-def rsi(close: pd.Series, period: int = 14) -> pd.Series:
+from src.indicators.streaming import ewm_mean
+
+def rsi_averages(close: pd.Series, period: int = 14, seed: tuple[float, float, float] | None = None):
+    """Return the smoothed (gain, loss) Series RSI is derived from.
+
+    ``seed`` is ``(prev_close, prev_gain, prev_loss)`` from the bar before ``close`` to resume a run.
+    """
     delta = close.diff()
-    gain = delta.clip(lower=0).ewm(alpha=1/period, adjust=False).mean()
-    loss = (-delta.clip(upper=0)).ewm(alpha=1/period, adjust=False).mean()
+    prev_close, prev_gain, prev_loss = seed if seed is not None else (None, None, None)
+    if prev_close is not None and len(delta):
+        delta.iloc[0] = close.iloc[0] - prev_close
+    gain = ewm_mean(delta.clip(lower=0), prev_gain, alpha=1/period)
+    loss = ewm_mean(-delta.clip(upper=0), prev_loss, alpha=1/period)
+    return gain, loss
+
+def rsi(close: pd.Series, period: int = 14) -> pd.Series:
+    gain, loss = rsi_averages(close, period)
     rs = gain / (loss.replace(0, 1e-12))
     return 100 - (100 / (1 + rs))
 
@@ -0,0 +1,283 @@
+import math
+import numpy as np
+import pandas as pd
+
+
+def ewm_alpha(span: float | None = None, alpha: float | None = None) -> float:
+    """Smoothing factor exactly as pandas derives it (via the centre of mass)."""
+    if span is not None:
+        com = (span - 1) / 2
+    elif alpha is not None:
+        com = (1 - alpha) / alpha
+    else:
+        raise ValueError("Must pass one of span or alpha")
+    return 1.0 / (1.0 + float(com))
+
+
+def ewm_mean(series: pd.Series, seed: float | None = None, **ewm_kw) -> pd.Series:
+    """``series.ewm(adjust=False, **ewm_kw).mean()``, optionally resumed from ``seed``.
+
+    ``seed`` is the last output of the same average over the values preceding ``series``; the
+    result then equals the matching tail of one uninterrupted run, provided the preceding run
+    ended on an observation (pandas only carries a weight other than 1 across NaN gaps).
+    """
+    if seed is None:
+        return series.ewm(adjust=False, **ewm_kw).mean()
+    extended = pd.concat([pd.Series([seed], dtype=np.float64), series], ignore_index=True)
+    return pd.Series(extended.ewm(adjust=False, **ewm_kw).mean().to_numpy()[1:], index=series.index,
+                     name=series.name)
+
+
+class EWMState:
+    """Incremental ``Series.ewm(..., adjust=False).mean()`` that matches pandas bit for bit."""
+
+    def __init__(self, span: float | None = None, alpha: float | None = None,
+                 value: float = math.nan, old_wt: float = 1.0):
+        self.alpha = ewm_alpha(span, alpha)
+        self.value = value
+        self.old_wt = old_wt
+
+    def update(self, x: float) -> float:
+        weighted = self.value
+        if weighted == weighted:
+            self.old_wt *= 1.0 - self.alpha
+            if x == x:
+                if weighted != x:
+                    weighted = self.old_wt * weighted + self.alpha * x
+                    weighted /= self.old_wt + self.alpha
+                self.old_wt = 1.0
+        elif x == x:
+            weighted = x
+        self.value = weighted
+        return weighted
+
+    def update_many(self, xs) -> np.ndarray:
+        out = np.empty(len(xs), dtype=np.float64)
+        for i, x in enumerate(np.asarray(xs, dtype=np.float64).tolist()):
+            out[i] = self.update(x)
+        return out
+
+    def snapshot(self) -> dict:
+        return {"value": self.value, "old_wt": self.old_wt}
+
+    def restore(self, state: dict):
+        self.value = state["value"]
+        self.old_wt = state["old_wt"]
+
+
+class _Stateful:
+    """snapshot()/restore() over the scalar attributes in ``_state`` and nested ``_children``."""
+
+    _state: tuple = ()
+    _children: tuple = ()
+
+    def snapshot(self) -> dict:
+        snap = {k: getattr(self, k) for k in self._state}
+        snap.update({k: getattr(self, k).snapshot() for k in self._children})
+        return snap
+
+    def restore(self, state: dict):
+        for k in self._state:
+            setattr(self, k, state[k])
+        for k in self._children:
+            getattr(self, k).restore(state[k])
+
+
+class EMA(_Stateful):
+    """Streaming ``indicators.trend.ema``."""
+
+    _children = ("ewm",)
+
+    def __init__(self, window: int):
+        self.ewm = EWMState(span=window)
+
+    @property
+    def value(self) -> float:
+        return self.ewm.value
+
+    def update(self, close: float) -> float:
+        return self.ewm.update(close)
+
+    def update_many(self, close) -> np.ndarray:
+        return self.ewm.update_many(close)
+
+
+class RSI(_Stateful):
+    """Streaming ``indicators.momentum.rsi``; also exposes the smoothed gain/loss."""
+
+    _state = ("prev_close", "value")
+    _children = ("gain", "loss")
+
+    def __init__(self, period: int = 14):
+        self.gain = EWMState(alpha=1/period)
+        self.loss = EWMState(alpha=1/period)
+        self.prev_close = math.nan
+        self.value = math.nan
+
+    def update(self, close: float) -> float:
+        delta = close - self.prev_close
+        gain = self.gain.update(0.0 if delta < 0 else delta)
+        loss = self.loss.update(-(0.0 if delta > 0 else delta))
+        self.prev_close = close
+        self.value = 100 - (100 / (1 + gain / (loss if loss != 0 else 1e-12)))
+        return self.value
+
+    def update_many(self, close) -> np.ndarray:
+        return np.array([self.update(c) for c in np.asarray(close, dtype=np.float64).tolist()])
+
+
+class MACD(_Stateful):
+    """Streaming ``indicators.momentum.macd``; ``update`` returns ``(line, signal, hist)``."""
+
+    _children = ("fast", "slow", "signal")
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EWMState(span=fast)
+        self.slow = EWMState(span=slow)
+        self.signal = EWMState(span=signal)
+
+    def update(self, close: float) -> tuple[float, float, float]:
+        line = self.fast.update(close) - self.slow.update(close)
+        sig = self.signal.update(line)
+        return line, sig, line - sig
+
+    def update_many(self, close) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        rows = [self.update(c) for c in np.asarray(close, dtype=np.float64).tolist()]
+        out = np.array(rows, dtype=np.float64).reshape(-1, 3)
+        return out[:, 0], out[:, 1], out[:, 2]
+
+
+class ATR(_Stateful):
+    """Streaming ``indicators.volatility.atr``."""
+
+    _state = ("prev_close",)
+    _children = ("ewm",)
+
+    def __init__(self, period: int = 14):
+        self.ewm = EWMState(alpha=1/period)
+        self.prev_close = math.nan
+
+    @property
+    def value(self) -> float:
+        return self.ewm.value
+
+    def update(self, high: float, low: float, close: float) -> float:
+        pc = self.prev_close
+        # max() keeps the first argument when the others are NaN, matching the skipna row max.
+        tr = max(high - low, abs(high - pc), abs(low - pc))
+        self.prev_close = close
+        return self.ewm.update(tr)
+
+    def update_many(self, high, low, close) -> np.ndarray:
+        rows = zip(*(np.asarray(a, dtype=np.float64).tolist() for a in (high, low, close)))
+        return np.array([self.update(h, l, c) for h, l, c in rows], dtype=np.float64)
+
+
+class Supertrend(_Stateful):
+    """Streaming ``indicators.trend.supertrend_with_direction``; ``update`` returns ``(st, direction)``."""
+
+    _state = ("multiplier", "value", "direction", "started")
+    _children = ("atr",)
+
+    def __init__(self, period: int = 10, multiplier: float = 3.0):
+        self.atr = ATR(period)
+        self.multiplier = multiplier
+        self.value = math.nan
+        self.direction = 1
+        self.started = False
+
+    def update(self, high: float, low: float, close: float) -> tuple[float, int]:
+        a = self.atr.update(high, low, close)
+        hl2 = (high + low) / 2.0
+        upper = hl2 + self.multiplier * a
+        prev = self.value
+        if not self.started:
+            self.started = True
+            self.value = upper
+            self.direction = 1
+            return self.value, self.direction
+        if close > prev:
+            self.direction = -1
+        elif close < prev:
+            self.direction = 1
+        if self.direction == -1:
+            self.value = max(hl2 - self.multiplier * a, prev)
+        else:
+            self.value = min(upper, prev)
+        return self.value, self.direction
+
+    def update_many(self, high, low, close) -> tuple[np.ndarray, np.ndarray]:
+        rows = zip(*(np.asarray(a, dtype=np.float64).tolist() for a in (high, low, close)))
+        out = [self.update(h, l, c) for h, l, c in rows]
+        return (np.array([o[0] for o in out], dtype=np.float64),
+                np.array([o[1] for o in out], dtype=np.int8))
+
+
+class FeatureState:
+    """Every ``tech_subscore`` indicator for one timeframe, advanced one bar at a time.
+
+    ``update`` returns a row keyed like the columns of ``indicators.features.compute_features``.
+    """
+
+    def __init__(self, features_cfg: dict):
+        self.windows = list(features_cfg['ema']['windows'])
+        self.emas = [EMA(w) for w in self.windows]
+        self.rsi = RSI(features_cfg['rsi']['period'])
+        self.macd = MACD(**features_cfg['macd'])
+        self.supertrend = Supertrend(**features_cfg['supertrend'])
+
+    @classmethod
+    def from_row(cls, features_cfg: dict, row, prev_close: float) -> "FeatureState":
+        """Resume from a ``compute_features`` row and the close of the bar it was computed on."""
+        state = cls(features_cfg)
+        for w, e in zip(state.windows, state.emas):
+            e.ewm.value = float(row[f"ema_{w}"])
+        state.rsi.gain.value = float(row["rsi_gain"])
+        state.rsi.loss.value = float(row["rsi_loss"])
+        state.rsi.value = float(row["rsi"])
+        state.rsi.prev_close = prev_close
+        state.macd.fast.value = float(row["macd_fast"])
+        state.macd.slow.value = float(row["macd_slow"])
+        state.macd.signal.value = float(row["macd_signal"])
+        state.supertrend.atr.ewm.value = float(row["st_atr"])
+        state.supertrend.atr.prev_close = prev_close
+        state.supertrend.value = float(row["supertrend"])
+        state.supertrend.direction = int(row["st_direction"])
+        state.supertrend.started = True
+        return state
+
+    def update(self, high: float, low: float, close: float) -> dict:
+        row = {f"ema_{w}": e.update(close) for w, e in zip(self.windows, self.emas)}
+        row["rsi"] = self.rsi.update(close)
+        row["rsi_gain"] = self.rsi.gain.value
+        row["rsi_loss"] = self.rsi.loss.value
+        line, sig, hist = self.macd.update(close)
+        row.update(macd_fast=self.macd.fast.value, macd_slow=self.macd.slow.value,
+                   macd_line=line, macd_signal=sig, macd_hist=hist)
+        st, direction = self.supertrend.update(high, low, close)
+        row.update(st_atr=self.supertrend.atr.value, supertrend=st, st_direction=direction)
+        return row
+
+    def update_many(self, high, low, close) -> dict:
+        """Advance over a batch of bars; returns one array per feature column."""
+        rows = zip(*(np.asarray(a, dtype=np.float64).tolist() for a in (high, low, close)))
+        out = [self.update(h, l, c) for h, l, c in rows]
+        cols = {k: np.array([r[k] for r in out], dtype=np.float64) for k in (out[0] if out else {})}
+        if "st_direction" in cols:
+            cols["st_direction"] = cols["st_direction"].astype(np.int8)
+        return cols
+
+    def snapshot(self) -> dict:
+        return {
+            "emas": [e.snapshot() for e in self.emas],
+            "rsi": self.rsi.snapshot(),
+            "macd": self.macd.snapshot(),
+            "supertrend": self.supertrend.snapshot(),
+        }
+
+    def restore(self, state: dict):
+        for e, s in zip(self.emas, state["emas"]):
+            e.restore(s)
+        self.rsi.restore(state["rsi"])
+        self.macd.restore(state["macd"])
+        self.supertrend.restore(state["supertrend"])
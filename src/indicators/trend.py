@@ -1,36 +1,82 @@
+import numpy as np
 import pandas as pd
 
-def ema(series: pd.Series, window: int) -> pd.Series:
-    return series.ewm(span=window, adjust=False).mean()
+from src.indicators.streaming import ewm_mean
+from src.indicators.volatility import atr as _atr
+
+def ema(series: pd.Series, window: int, seed: float | None = None) -> pd.Series:
+    return ewm_mean(series, seed, span=window)
+
+_KERNEL_CHUNK = 65_536
+
+
+def _supertrend_kernel(close: np.ndarray, upperband: np.ndarray, lowerband: np.ndarray,
+                       seed: tuple[float, int] | None = None):
+    """Supertrend recurrence; ``seed`` is ``(prev_st, prev_direction)`` to continue from an earlier bar."""
+    n = len(close)
+    st = np.empty(n, dtype=np.float64)
+    direction = np.empty(n, dtype=np.int8)
+    if n == 0:
+        return st, direction
+
+    # Plain floats keep the recurrence (including max/min NaN handling) identical to the
+    # original Series loop while avoiding per-element pandas indexing. Converting chunk by chunk
+    # bounds the boxed-float lists to a fixed size instead of ~100 bytes per bar.
+    if seed is None:
+        prev_st = float(upperband[0])
+        prev_dir = 1
+        st[0] = prev_st
+        direction[0] = prev_dir
+        first = 1
+    else:
+        prev_st, prev_dir = float(seed[0]), int(seed[1])
+        first = 0
+    for start in range(first, n, _KERNEL_CHUNK):
+        stop = min(start + _KERNEL_CHUNK, n)
+        c = close[start:stop].tolist()
+        up = upperband[start:stop].tolist()
+        lo = lowerband[start:stop].tolist()
+        st_chunk = [0.0] * (stop - start)
+        dir_chunk = [0] * (stop - start)
+        for j in range(stop - start):
+            ci = c[j]
+            if ci > prev_st:
+                prev_dir = -1
+            elif ci < prev_st:
+                prev_dir = 1
+
+            if prev_dir == -1:
+                prev_st = max(lo[j], prev_st)
+            else:
+                prev_st = min(up[j], prev_st)
+            st_chunk[j] = prev_st
+            dir_chunk[j] = prev_dir
+        st[start:stop] = st_chunk
+        direction[start:stop] = dir_chunk
+    return st, direction
+
+def supertrend_bands(df: pd.DataFrame, period: int = 10, multiplier: float = 3.0,
+                     seed: tuple[float, float] | None = None):
+    """Return the (upperband, lowerband, atr) Series the Supertrend recurrence runs on.
+
+    ``seed`` resumes the ATR as in ``volatility.atr``.
+    """
+    atr = _atr(df, period, seed)
+
+    hl2 = np.add(df['high'].to_numpy(), df['low'].to_numpy(), dtype=np.float64)
+    hl2 /= 2.0
+    offset = multiplier * atr.to_numpy()
+    upperband = pd.Series(hl2 + offset, index=df.index)
+    hl2 -= offset  # reuse the buffer for the lower band
+    return upperband, pd.Series(hl2, index=df.index), atr
+
+def supertrend_with_direction(df: pd.DataFrame, period: int = 10, multiplier: float = 3.0):
+    """Return the Supertrend line and its direction (-1 while close is above the line, 1 below)."""
+    upperband, lowerband, _ = supertrend_bands(df, period, multiplier)
+
+    # The kernel reads chunks as Python floats, so float32 closes need no float64 copy.
+    st, direction = _supertrend_kernel(df['close'].to_numpy(), upperband.to_numpy(), lowerband.to_numpy())
+    return pd.Series(st, index=df.index), pd.Series(direction, index=df.index)
 
 def supertrend(df: pd.DataFrame, period: int = 10, multiplier: float = 3.0) -> pd.Series:
-    hl2 = (df['high'] + df['low']) / 2.0
-    tr1 = df['high'] - df['low']
-    tr2 = (df['high'] - df['close'].shift()).abs()
-    tr3 = (df['low'] - df['close'].shift()).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.ewm(alpha=1/period, adjust=False).mean()
-
-    upperband = hl2 + multiplier * atr
-    lowerband = hl2 - multiplier * atr
-
-    st = pd.Series(index=df.index, dtype=float)
-    direction = pd.Series(index=df.index, dtype=int)
-
-    st.iloc[0] = upperband.iloc[0]
-    direction.iloc[0] = 1
-
-    for i in range(1, len(df)):
-        if df['close'].iloc[i] > st.iloc[i-1]:
-            direction.iloc[i] = -1
-        elif df['close'].iloc[i] < st.iloc[i-1]:
-            direction.iloc[i] = 1
-        else:
-            direction.iloc[i] = direction.iloc[i-1]
-
-        if direction.iloc[i] == -1:
-            st.iloc[i] = max(lowerband.iloc[i], st.iloc[i-1])
-        else:
-            st.iloc[i] = min(upperband.iloc[i], st.iloc[i-1])
-
-    return st
+    return supertrend_with_direction(df, period, multiplier)[0]
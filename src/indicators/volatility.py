@@ -1,8 +1,24 @@
+import numpy as np
 import pandas as pd
 
-def atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
-    hl = df['high'] - df['low']
-    hc = (df['high'] - df['close'].shift()).abs()
-    lc = (df['low'] - df['close'].shift()).abs()
-    tr = pd.concat([hl, hc, lc], axis=1).max(axis=1)
-    return tr.ewm(alpha=1/period, adjust=False).mean()
+from src.indicators.streaming import ewm_mean
+
+def true_range(df: pd.DataFrame, prev_close: float | None = None) -> np.ndarray:
+    """True range per bar; ``prev_close`` is the close before ``df`` when resuming a longer history."""
+    # Float32 (compact) columns are read as views and cast to float64 by the ufuncs in small
+    # buffers, so no float64 copy of the history is made.
+    high, low, close = (df[c].to_numpy() for c in ('high', 'low', 'close'))
+    prev = np.empty(len(close), dtype=np.float64)
+    prev[:1] = np.nan if prev_close is None else prev_close
+    prev[1:] = close[:-1]
+    # fmax skips NaN like DataFrame.max(axis=1), without materialising a 3-column frame.
+    tr = np.subtract(high, low, dtype=np.float64)
+    gap = np.subtract(high, prev, dtype=np.float64)
+    np.fmax(tr, np.abs(gap, out=gap), out=tr)
+    np.subtract(low, prev, out=gap, dtype=np.float64)
+    return np.fmax(tr, np.abs(gap, out=gap), out=tr)
+
+def atr(df: pd.DataFrame, period: int = 14, seed: tuple[float, float] | None = None) -> pd.Series:
+    """Wilder ATR. ``seed`` is ``(prev_close, prev_atr)`` from the bar before ``df`` to resume a run."""
+    prev_close, prev_atr = seed if seed is not None else (None, None)
+    return ewm_mean(pd.Series(true_range(df, prev_close), index=df.index), prev_atr, alpha=1/period)
@@ -1,4 +1,9 @@
 from dataclasses import dataclass
+import numpy as np
+
+# Integer decision codes used by the array APIs (int8 arrays).
+HOLD, BUY, SELL, WAIT = 0, 1, -1, 2
+DECISION_LABELS = {BUY: "BUY", SELL: "SELL", HOLD: "HOLD", WAIT: "WAIT"}
 
 @dataclass
 class Weights:
@@ -12,6 +17,17 @@ class Thresholds:
     sell: float = -0.65
     neutral_band: float = 0.20
 
+def _cutoff(x: np.ndarray, threshold: float, up: bool):
+    """``threshold`` as a scalar of ``x``'s dtype, rounded ``up`` (or down) to the nearest value of
+    that dtype, so comparing float32 scores against it gives the float64 comparison's answer."""
+    t = x.dtype.type(threshold)
+    if up and float(t) < threshold:
+        t = np.nextafter(t, x.dtype.type(np.inf))
+    elif not up and float(t) > threshold:
+        t = np.nextafter(t, x.dtype.type(-np.inf))
+    return t
+
+
 class ConfluenceEngine:
     def __init__(self, weights: Weights, th: Thresholds):
         self.w = weights
@@ -28,3 +44,44 @@ class ConfluenceEngine:
         if abs(total_score) < self.th.neutral_band:
             return "HOLD"
         return "WAIT"
+
+    def decide_array(self, total_scores) -> np.ndarray:
+        """Vectorised ``decide``: map an array of scores to int8 decision codes.
+
+        Float32 scores (compact mode) are compared in float32, without a float64 copy.
+        """
+        x = np.asarray(total_scores)
+        if x.dtype.kind != "f":
+            x = x.astype(np.float64)
+        codes = np.full(x.shape, WAIT, dtype=np.int8)
+        codes[np.abs(x) < _cutoff(x, self.th.neutral_band, up=True)] = HOLD
+        codes[x <= _cutoff(x, self.th.sell, up=False)] = SELL
+        codes[x >= _cutoff(x, self.th.buy, up=True)] = BUY
+        return codes
+
+    @staticmethod
+    def gate_codes(low_codes: np.ndarray, higher_scores) -> np.ndarray:
+        """Keep entry-timeframe BUY/SELL codes only where every higher-timeframe score agrees.
+
+        ``higher_scores`` is a sequence of score arrays already aligned to the entry bars; a BUY
+        needs all of them ``>= 0`` and a SELL all ``<= 0``. Everything else becomes HOLD.
+        """
+        low_codes = np.asarray(low_codes)
+        buy_mask = low_codes == BUY
+        sell_mask = low_codes == SELL
+        for scores in higher_scores:
+            scores = np.asarray(scores)
+            buy_mask &= scores >= 0
+            sell_mask &= scores <= 0
+        gated = np.full(low_codes.shape, HOLD, dtype=np.int8)
+        gated[buy_mask] = BUY
+        gated[sell_mask] = SELL
+        return gated
+
+    @staticmethod
+    def labels(codes: np.ndarray) -> np.ndarray:
+        """Turn int8 decision codes back into the "BUY"/"SELL"/"HOLD"/"WAIT" strings."""
+        lookup = np.empty(4, dtype=object)
+        for code, label in DECISION_LABELS.items():
+            lookup[code] = label
+        return lookup[np.asarray(codes)]
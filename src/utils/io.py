@@ -1,12 +1,44 @@
+import os
 from pathlib import Path
 import pandas as pd
 
 def ensure_parents(path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
 
-def save_parquet(df: pd.DataFrame, path: Path):
+def save_parquet(df: pd.DataFrame, path: Path, **kwargs):
+    # Write then rename so concurrent readers (e.g. parallel runs sharing a store) never see a partial file.
     ensure_parents(path)
-    df.to_parquet(path, index=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    df.to_parquet(tmp, index=True, **kwargs)
+    os.replace(tmp, path)
 
 def load_parquet(path: Path) -> pd.DataFrame:
     return pd.read_parquet(path)
+
+
+class ParquetAppender:
+    """Write a frame to one Parquet file block by block, each block becoming a row group.
+
+    The file appears under ``path`` only on ``close``, like ``save_parquet``.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self.writer = None
+        self.rows = 0
+
+    def append(self, df: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        if self.writer is None:
+            ensure_parents(self.path)
+            self.writer = pq.ParquetWriter(self.tmp, table.schema)
+        self.writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp, self.path)
@@ -1,5 +1,69 @@
+import numpy as np
 import pandas as pd
 
-def align_to_lower_tf(higher_tf_series: pd.Series, lower_index: pd.DatetimeIndex) -> pd.Series:
-    s = higher_tf_series.copy().sort_index()
-    return s.reindex(lower_index, method='ffill')
+from src.utils.timeframes import timeframe_to_ms
+
+
+def _epoch_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    return index.as_unit("ns").asi8
+
+
+def _index_from_ns(ts: np.ndarray, like: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(ts.view("M8[ns]"), name=like.name)
+    return index.tz_localize("UTC").tz_convert(like.tz) if like.tz is not None else index
+
+
+def can_resample(base_tf: str, tf: str) -> bool:
+    """True when bars of ``tf`` are whole multiples of ``base_tf`` bars."""
+    base_ms, tf_ms = timeframe_to_ms(base_tf), timeframe_to_ms(tf)
+    return tf_ms > base_ms and tf_ms % base_ms == 0
+
+
+def resample_ohlcv(df: pd.DataFrame, tf: str) -> pd.DataFrame:
+    """OHLCV bars of timeframe ``tf`` built from the finer, time-sorted bars of ``df``.
+
+    Bars are labelled by their open time on the epoch grid (UTC midnight for ``1d``), as exchanges
+    do. A leading bar that starts before ``df`` does is dropped; the last one may still be forming,
+    like the last bar an exchange returns. Keeps the input dtype.
+    """
+    if df.empty:
+        return df.copy()
+    tf_ns = timeframe_to_ms(tf) * 1_000_000
+    bucket = _epoch_ns(df.index) // tf_ns * tf_ns
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+    out = {
+        "open": df["open"].to_numpy()[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(), starts),
+        "low": np.minimum.reduceat(df["low"].to_numpy(), starts),
+        "close": df["close"].to_numpy()[ends],
+    }
+    if "volume" in df:
+        out["volume"] = np.add.reduceat(df["volume"].to_numpy(), starts)
+    out = pd.DataFrame(out, index=_index_from_ns(bucket[starts], df.index))
+    return out.iloc[1:] if bucket[0] != _epoch_ns(df.index)[0] else out
+
+
+def closed_bar_positions(higher_index: pd.DatetimeIndex, higher_tf: str, lower_index: pd.DatetimeIndex,
+                         lower_tf: str) -> np.ndarray:
+    """For each lower bar, the position of the last higher bar that has closed by the time the lower
+    bar closes (-1 if none has). Both indexes hold bar open times and must be sorted.
+
+    A higher bar is only final at its close, so aligning by open time would let a daily bar's
+    close leak into the earlier hours of that day.
+    """
+    higher_close = _epoch_ns(higher_index) + timeframe_to_ms(higher_tf) * 1_000_000
+    lower_close = _epoch_ns(lower_index) + timeframe_to_ms(lower_tf) * 1_000_000
+    return np.searchsorted(higher_close, lower_close, side="right") - 1
+
+
+def align_to_lower_tf(higher_tf_series: pd.Series, positions: np.ndarray, lower_index: pd.DatetimeIndex) -> pd.Series:
+    """``higher_tf_series`` on ``lower_index`` via ``closed_bar_positions``: a plain take, so the
+    positions are computed once and reused for every series of that timeframe. Lower bars
+    before the first closed higher bar get NaN; the output keeps the input dtype."""
+    values = higher_tf_series.to_numpy()
+    if not len(values):
+        return pd.Series(np.nan, index=lower_index, dtype=values.dtype, name=higher_tf_series.name)
+    out = values[np.maximum(positions, 0)]
+    out[positions < 0] = np.nan
+    return pd.Series(out, index=lower_index, name=higher_tf_series.name)
@@ -0,0 +1,159 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_ACTIVE: "RunProfile | None" = None
+
+
+def _peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10  # bytes on macOS, KiB elsewhere
+
+
+def _hwm_mb() -> float | None:
+    """Peak RSS since the last ``_reset_hwm`` (or process start); Linux only."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2**10
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _reset_hwm() -> bool:
+    """Restart the kernel's peak-RSS counter from the current RSS (Linux 4.0+); False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _rss_mb() -> float | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RunProfile:
+    """Timed spans for one run: duration, row counts and memory per stage, in start order.
+
+    Spans nest; each records its parent so the JSON can be read as a tree. A stage's
+    ``peak_rss_mb`` is the highest RSS reached while it ran (nested stages included), read from
+    the kernel's peak counter, which is reset at every span boundary; it is None where that
+    counter cannot be reset (non-Linux). The run's ``peak_rss_mb`` is the process peak. With
+    ``cprofile`` set, the whole run is also captured by ``cProfile`` and dumped next to the JSON.
+    """
+
+    def __init__(self, name: str, cprofile: bool = False):
+        self.name = name
+        self.spans: list[dict] = []
+        self._stack: list[dict] = []
+        # Resetting the counter also resets ru_maxrss, so the process peak is tracked here.
+        self.peak_rss_mb = _peak_rss_mb()
+        self._stage_peaks = _reset_hwm()
+        self._peaks: list[float] = []
+        self._t0 = time.perf_counter()
+        self.started_at = time.time()
+        self.profiler = None
+        if cprofile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+
+    def _observe_peak(self):
+        """Fold the peak RSS since the last reset into every open span and the run, then reset."""
+        if not self._stage_peaks:
+            return
+        hwm = _hwm_mb()
+        if hwm is not None:
+            self._peaks = [max(p, hwm) for p in self._peaks]
+            self.peak_rss_mb = max(self.peak_rss_mb or 0.0, hwm)
+        _reset_hwm()
+
+    @contextmanager
+    def span(self, stage: str, **attrs):
+        rec = {"stage": stage, "parent": self._stack[-1]["stage"] if self._stack else None, **attrs}
+        self._observe_peak()
+        rss0 = _rss_mb()
+        self.spans.append(rec)
+        self._stack.append(rec)
+        self._peaks.append(rss0 or 0.0)
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["seconds"] = time.perf_counter() - t0
+            rss1 = _rss_mb()
+            rec["rss_delta_mb"] = rss1 - rss0 if rss0 is not None and rss1 is not None else None
+            self._observe_peak()
+            peak = self._peaks.pop()
+            rec["peak_rss_mb"] = peak if self._stage_peaks else None
+            self._stack.pop()
+
+    def _process_peak(self) -> float | None:
+        if not self._stage_peaks:
+            return _peak_rss_mb()
+        self._observe_peak()
+        return self.peak_rss_mb
+
+    def to_dict(self) -> dict:
+        return {
+            "run": self.name,
+            "started_at": self.started_at,
+            "total_seconds": time.perf_counter() - self._t0,
+            "peak_rss_mb": self._process_peak(),
+            "stages": self.spans,
+        }
+
+    def write(self, path: Path | str) -> dict:
+        out = self.to_dict()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(out, indent=2, default=str))
+        if self.profiler is not None:
+            self.profiler.dump_stats(path.with_suffix(".prof"))
+        return out
+
+
+@contextmanager
+def profiled(name: str, cprofile: bool = False):
+    """Make a ``RunProfile`` active for the duration of the block so ``span`` calls record into it."""
+    global _ACTIVE
+    prev, _ACTIVE = _ACTIVE, RunProfile(name, cprofile)
+    profile = _ACTIVE
+    if profile.profiler is not None:
+        profile.profiler.enable()
+    try:
+        yield profile
+    finally:
+        if profile.profiler is not None:
+            profile.profiler.disable()
+        _ACTIVE = prev
+
+
+@contextmanager
+def span(stage: str, **attrs):
+    """Time a stage in the active run profile; a plain no-op (yielding a scratch dict) outside one.
+
+    Set extra fields on the yielded record, e.g. ``rec["rows"] = len(df)``.
+    """
+    if _ACTIVE is None:
+        yield dict(attrs)
+        return
+    with _ACTIVE.span(stage, **attrs) as rec:
+        yield rec
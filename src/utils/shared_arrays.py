@@ -0,0 +1,56 @@
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+_ALIGN = 64
+
+
+class SharedArrays:
+    """Named numpy arrays packed into one shared-memory segment.
+
+    The creating process calls ``create`` and passes ``spec`` (a small picklable dict) to its
+    workers, which ``attach`` and get read-only views of the same pages: nothing is copied or
+    pickled per worker. The creator owns the segment and must ``unlink`` it when done.
+    """
+
+    def __init__(self, shm: SharedMemory, layout: dict, owner: bool):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {}
+        for name, (offset, dtype, shape) in layout.items():
+            arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            if not owner:
+                arr.flags.writeable = False
+            self.arrays[name] = arr
+
+    @classmethod
+    def create(cls, arrays: dict[str, np.ndarray]) -> "SharedArrays":
+        layout, size = {}, 0
+        for name, arr in arrays.items():
+            arr = np.ascontiguousarray(arr)
+            layout[name] = (size, arr.dtype.str, arr.shape)
+            size += -(-arr.nbytes // _ALIGN) * _ALIGN
+        shared = cls(SharedMemory(create=True, size=max(size, 1)), layout, owner=True)
+        for name, arr in arrays.items():
+            shared.arrays[name][...] = arr
+        return shared
+
+    @classmethod
+    def attach(cls, spec: dict) -> "SharedArrays":
+        return cls(SharedMemory(name=spec["name"]), spec["layout"], owner=False)
+
+    @property
+    def spec(self) -> dict:
+        return {"name": self.shm.name, "layout": self.layout}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def close(self):
+        self.arrays.clear()  # views must go before the buffer can be released
+        self.shm.close()
+
+    def unlink(self):
+        self.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import yaml
+
+from src.adapters.candle_store import CandleStore
+from src.analytics.adaptive_tuner import rung_fractions, successive_halving
+from src.analytics.benchmark import synthetic_candles
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "settings.yaml"
+SYMBOL = "BTC/USDT"
+
+
+@pytest.fixture(scope="module")
+def config(tmp_path_factory) -> Path:
+    root = tmp_path_factory.mktemp("tune")
+    cfg = yaml.safe_load(CONFIG.read_text())
+    candles = synthetic_candles(12_000)
+    candles.index = pd.date_range("2023-01-01", periods=len(candles), freq="h", name="timestamp")
+    CandleStore(root / "candles").merge(cfg['exchange'], cfg['market_type'], SYMBOL, "1h", candles)
+    cfg.update(api_mode="offline", symbols=[SYMBOL], timeframes=["1h"], lookback_bars=3000)
+    cfg['acquisition'] = {'async': False, 'resample_higher': True}
+    cfg['candle_store'] = {'enabled': True, 'offline': True, 'root': str(root / "candles")}
+    cfg['sentiment_cache'] = {'enabled': False}
+    cfg['feature_cache'] = {'enabled': False}
+    # 9 candidates on a ninth, a third and all of the history: 9 -> 3 -> 1.
+    cfg['tune'] = {**cfg['tune'], 'candidates': 9, 'eta': 3, 'min_fraction': 1 / 9, 'min_trades': 1,
+                   'time_budget': None}
+    path = root / "settings.yaml"
+    path.write_text(yaml.safe_dump(cfg))
+    return path
+
+
+def test_rung_fractions():
+    assert rung_fractions(0.04, 3) == pytest.approx([0.04, 0.12, 0.36, 1.0])
+    assert rung_fractions(1 / 9, 3) == pytest.approx([1 / 9, 1 / 3, 1.0])
+    assert rung_fractions(0.5, 4) == [0.5, 1.0]
+    assert rung_fractions(1.0, 3) == [1.0]
+
+
+def test_successive_halving_does_not_depend_on_workers(config, tmp_path):
+    results = {}
+    for workers in (1, 2):
+        out = tmp_path / f"workers_{workers}"
+        best = successive_halving(str(config), workers=workers, out_dir=out)
+        results[workers] = (best, pd.read_csv(out / "tune_search.csv"),
+                            json.loads((out / "tune_best.json").read_text()))
+
+    best, search, saved = results[1]
+    assert results[2][0] == best
+    pd.testing.assert_frame_equal(results[2][1], search, check_exact=True)
+    assert {k: v for k, v in results[2][2].items() if k != "seconds"} == \
+           {k: v for k, v in saved.items() if k != "seconds"}
+
+    # 9 candidates, the best third promoted at each rung; the last rung runs the full lookback.
+    assert search.groupby("rung")["candidate"].count().tolist() == [9, 3, 1]
+    assert search.groupby("rung")["bars"].first().tolist() == [333, 1000, 3000]
+    promoted = search[search["rung"] == 1]["candidate"]
+    first = search[search["rung"] == 0].assign(eligible=lambda d: d["num_trades"] >= 1)
+    first = first.sort_values(["eligible", "sharpe_ratio", "candidate"], ascending=[False, False, True])
+    assert set(promoted) == set(first["candidate"].head(3))
+    assert best["rung"] == 2 and best["candidate"] == search[search["rung"] == 2]["candidate"].item()
+    assert saved["evaluations"] == 13
+    assert saved["full_history_equivalents"] == pytest.approx((9 * 333 + 3 * 1000 + 3000) / 3000)
+
+
+def test_spent_time_budget_stops_after_the_rung_under_way(config, tmp_path):
+    best = successive_halving(str(config), time_budget=0.0, workers=1, out_dir=tmp_path)
+    search = pd.read_csv(tmp_path / "tune_search.csv")
+    # The budget is only checked between rungs, so the first one still runs all 9 candidates.
+    assert search["rung"].tolist() == [0] * 9
+    assert best["rung"] == 0
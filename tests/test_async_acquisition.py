@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from aiohttp import web
+
+from src.adapters import sentiment_providers as sp
+from src.adapters.async_acquisition import AsyncCCXTClient, acquire_async, sentiment_from_raw
+from src.adapters.candle_store import CandleStore
+from src.adapters.exchange_ccxt import CCXTClient
+from src.utils.timeframes import timeframe_to_ms
+
+DELAY = 0.2
+SYMBOL = "BTC/USDT"
+REQUESTS = [("1d", 40), ("4h", 60), ("1h", 80)]
+
+
+class InFlight:
+    """Counts concurrent requests across the stub exchange and the stub HTTP server."""
+
+    def __init__(self):
+        self.now = self.peak = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.now += 1
+            self.peak = max(self.peak, self.now)
+
+    def __exit__(self, *exc):
+        with self.lock:
+            self.now -= 1
+
+
+def stub_candles(timeframe: str, end_ms: int, n: int = 200) -> list:
+    tf_ms = timeframe_to_ms(timeframe)
+    last = end_ms // tf_ms * tf_ms
+    ts = last - tf_ms * np.arange(n)[::-1]
+    close = 100 + np.sin(ts / tf_ms / 7.0) * 5
+    return [[int(t), c - 0.5, c + 1.0, c - 1.0, c, 10.0] for t, c in zip(ts, close)]
+
+
+class StubExchange:
+    """Just the part of a ccxt exchange the clients use: paged ``fetch_ohlcv``."""
+
+    def __init__(self, in_flight: InFlight):
+        self.in_flight = in_flight
+        self.end_ms = int(time.time() * 1000)
+        self.candles = {tf: stub_candles(tf, self.end_ms) for tf, _ in REQUESTS}
+
+    def milliseconds(self) -> int:
+        return self.end_ms
+
+    def page(self, timeframe: str, since: int, limit: int) -> list:
+        return [row for row in self.candles[timeframe] if row[0] >= since][:limit]
+
+    def fetch_ohlcv(self, symbol, timeframe, since, limit):
+        with self.in_flight:
+            time.sleep(DELAY)
+            return self.page(timeframe, since, limit)
+
+
+class AsyncStubExchange(StubExchange):
+    async def fetch_ohlcv(self, symbol, timeframe, since, limit):
+        with self.in_flight:
+            await asyncio.sleep(DELAY)
+            return self.page(timeframe, since, limit)
+
+    async def close(self):
+        pass
+
+
+def stub_app(in_flight: InFlight) -> web.Application:
+    days = pd.date_range(end=pd.Timestamp.now().normalize(), periods=30, freq="D")
+
+    async def fear_greed(request):
+        with in_flight:
+            await asyncio.sleep(DELAY)
+            return web.json_response({"data": [{"timestamp": str(ts.value // 10**9), "value": str(20 + 2 * i)}
+                                               for i, ts in enumerate(days)]})
+
+    async def funding(request):
+        with in_flight:
+            await asyncio.sleep(DELAY)
+            return web.json_response([{"fundingTime": ts.value // 10**6, "fundingRate": str(1e-4 * np.sin(i))}
+                                      for i, ts in enumerate(days)])
+
+    app = web.Application()
+    app.router.add_get("/fng/", fear_greed)
+    app.router.add_get("/fundingRate", funding)
+    return app
+
+
+@pytest.fixture
+def stub_server():
+    """A local HTTP server for the sentiment providers, on its own loop so sync clients can call it."""
+    in_flight = InFlight()
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(stub_app(in_flight))
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{port}"
+    yield {"fear_greed": f"{base}/fng/", "funding": f"{base}/fundingRate"}, in_flight
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.run_until_complete(runner.cleanup())
+    loop.close()
+
+
+def test_requests_overlap_and_match_the_sync_client(stub_server, tmp_path, monkeypatch):
+    urls, in_flight = stub_server
+    flags = dict(use_fear_greed=True, use_funding=True, use_news=False)
+
+    client = AsyncCCXTClient("binance", market_type="futures", store=CandleStore(tmp_path / "async"))
+    client.ex = AsyncStubExchange(in_flight)
+    t0 = time.perf_counter()
+    frames, raw = asyncio.run(acquire_async(client, SYMBOL, REQUESTS, "live", urls=urls, **flags))
+    elapsed = time.perf_counter() - t0
+    report = {}
+    sent = sentiment_from_raw(raw, SYMBOL, frames[-1].index, "live", report=report, **flags)
+    assert report == {"fear_greed": "network", "funding": "network"}
+
+    # Three candle windows and two providers: all in flight at once, so the whole acquisition
+    # takes about one request's latency rather than five.
+    assert in_flight.peak == len(REQUESTS) + 2
+    assert elapsed < 2.5 * DELAY
+
+    sync = CCXTClient("binance", market_type="futures", store=CandleStore(tmp_path / "sync"))
+    sync._ex = StubExchange(in_flight)
+    for url_key, url in urls.items():
+        monkeypatch.setitem(sp.URLS, url_key, url)
+    for (tf, n), df in zip(REQUESTS, frames):
+        pd.testing.assert_frame_equal(df, sync.fetch_ohlcv_df(SYMBOL, tf, lookback_bars=n))
+    expected = sp.get_combined_sentiment(SYMBOL, frames[-1].index, "live", **flags)
+    pd.testing.assert_series_equal(sent, expected)
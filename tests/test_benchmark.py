@@ -0,0 +1,37 @@
+import copy
+from pathlib import Path
+
+import pytest
+import yaml
+
+from src.analytics.benchmark import STAGES, _peak_bytes, _stage_callables, synthetic_candles
+from src.core.backtest_runner import to_compact
+
+SETTINGS = Path(__file__).resolve().parents[1] / "config" / "settings.yaml"
+
+
+def stage_peaks(compact: bool, n: int = 100_000) -> dict[str, int]:
+    cfg = copy.deepcopy(yaml.safe_load(SETTINGS.read_text()))
+    cfg.setdefault('memory', {})['compact'] = compact
+    df = synthetic_candles(n)
+    if compact:
+        df = to_compact(df)
+    calls = _stage_callables(cfg, df)
+    return {stage: _peak_bytes(calls[stage][0]) for stage in STAGES}
+
+
+@pytest.fixture(scope="module")
+def peaks():
+    return {compact: stage_peaks(compact) for compact in (False, True)}
+
+
+@pytest.mark.parametrize("stage", STAGES)
+def test_compact_never_allocates_more_than_float64(peaks, stage):
+    # Compact runs fill at float32 prices, so a few entries differ and the curves the metrics
+    # stages walk can be a few bars longer; allow that, not a float64 copy of any input.
+    assert peaks[True][stage] <= peaks[False][stage] * 1.01
+
+
+@pytest.mark.parametrize("stage", ["tech_subscore", "signals"])
+def test_compact_shrinks_the_float32_stages(peaks, stage):
+    assert peaks[True][stage] < peaks[False][stage] * 0.8
@@ -0,0 +1,119 @@
+import time
+
+import ccxt
+import numpy as np
+import pandas as pd
+
+from src.adapters.candle_store import CandleStore
+from src.adapters.exchange_ccxt import CCXTClient
+
+SYMBOL = "BTC/USDT"
+KEY = ("binance", "spot", SYMBOL, "1h")
+HOUR_MS = 3_600_000
+
+
+def hourly(ts_ms) -> pd.DataFrame:
+    ts = np.asarray(ts_ms, dtype=np.int64)
+    close = 100 + np.sin(ts / HOUR_MS / 5.0)
+    return pd.DataFrame({"open": close - 0.5, "high": close + 1.0, "low": close - 1.0, "close": close,
+                         "volume": 10.0}, index=pd.DatetimeIndex(pd.to_datetime(ts, unit="ms"), name="timestamp"))
+
+
+class ListedExchange:
+    """Hourly bars from a listing 200 hours ago up to now, minus a 10-hour outage; records each request."""
+
+    def __init__(self, fail_at: int | None = None):
+        last = int(time.time() * 1000) // HOUR_MS * HOUR_MS
+        ts = last - HOUR_MS * np.arange(200)[::-1]
+        self.outage = (int(ts[100]), int(ts[110]))
+        self.ts = ts[(ts < self.outage[0]) | (ts >= self.outage[1])]
+        self.listing = int(ts[0])
+        self.fail_at = fail_at
+        self.requests: list[int] = []
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=1000):
+        self.requests.append(since)
+        if self.fail_at is not None and len(self.requests) >= self.fail_at:
+            raise ccxt.NetworkError("connection reset")
+        ts = self.ts[self.ts >= since][:limit]
+        return [[t, *row] for t, row in zip(ts.tolist(), hourly(ts).values.tolist())]
+
+
+def client(store: CandleStore, exchange) -> CCXTClient:
+    cc = CCXTClient("binance", store=store)
+    cc._ex = exchange
+    return cc
+
+
+def test_missing_ranges_skip_known_empty_ranges_but_not_the_tail():
+    store = CandleStore("unused")
+    cached = hourly([10 * HOUR_MS, 11 * HOUR_MS, 15 * HOUR_MS, 16 * HOUR_MS, 20 * HOUR_MS])
+    since, until = 5 * HOUR_MS, 30 * HOUR_MS
+    assert store.missing_ranges(cached, HOUR_MS, since, until) == [
+        (5 * HOUR_MS, 10 * HOUR_MS), (12 * HOUR_MS, 15 * HOUR_MS), (17 * HOUR_MS, 20 * HOUR_MS),
+        (20 * HOUR_MS, until)]
+    empty = [(0, 8 * HOUR_MS), (12 * HOUR_MS, 15 * HOUR_MS), (18 * HOUR_MS, 19 * HOUR_MS), (20 * HOUR_MS, until)]
+    assert store.missing_ranges(cached, HOUR_MS, since, until, empty) == [
+        (8 * HOUR_MS, 10 * HOUR_MS), (17 * HOUR_MS, 18 * HOUR_MS), (19 * HOUR_MS, 20 * HOUR_MS),
+        (20 * HOUR_MS, until)]
+
+
+def test_record_empty_keeps_the_uncovered_parts_and_coalesces(tmp_path):
+    store = CandleStore(tmp_path)
+    fetched = [2 * HOUR_MS, 3 * HOUR_MS, 6 * HOUR_MS]
+    assert store.record_empty(*KEY, [(0, 8 * HOUR_MS)], fetched) == [
+        (0, 2 * HOUR_MS), (4 * HOUR_MS, 6 * HOUR_MS), (7 * HOUR_MS, 8 * HOUR_MS)]
+    assert store.record_empty(*KEY, [(8 * HOUR_MS, 9 * HOUR_MS), (1 * HOUR_MS, 2 * HOUR_MS)], []) == [
+        (0, 2 * HOUR_MS), (4 * HOUR_MS, 6 * HOUR_MS), (7 * HOUR_MS, 9 * HOUR_MS)]
+    assert store.load_empty(*KEY) == [(0, 2 * HOUR_MS), (4 * HOUR_MS, 6 * HOUR_MS), (7 * HOUR_MS, 9 * HOUR_MS)]
+    assert store.empty_path_for(*KEY).parent == store.path_for(*KEY).parent
+
+
+def test_head_before_listing_and_outages_are_not_refetched(tmp_path):
+    store = CandleStore(tmp_path)
+    exchange = ListedExchange()
+    first = client(store, exchange).fetch_ohlcv_df(SYMBOL, "1h", lookback_bars=300)
+    assert len(first) == 190
+    # The empty store asked once, from the start of the window.
+    assert len(exchange.requests) == 1
+
+    empty = store.load_empty(*KEY)
+    assert empty[-1] == exchange.outage
+    assert empty[0][1] == exchange.listing
+    # Nothing past the newest bar is known to be empty.
+    assert empty[-1][1] < int(exchange.ts[-1])
+
+    exchange.requests.clear()
+    second = client(store, exchange).fetch_ohlcv_df(SYMBOL, "1h", lookback_bars=300)
+    pd.testing.assert_frame_equal(second, first)
+    # Only the tail, from the last stored bar (it may have been forming), is requested again.
+    assert exchange.requests == [int(exchange.ts[-1])]
+
+    # Without the record the head and the outage are requested as well.
+    store.empty_path_for(*KEY).unlink()
+    exchange.requests.clear()
+    client(store, exchange).fetch_ohlcv_df(SYMBOL, "1h", lookback_bars=300)
+    assert len(exchange.requests) == 3 and exchange.requests[-1] == int(exchange.ts[-1])
+    # The same listing edge and outage; the window's start has moved on with the clock.
+    assert store.load_empty(*KEY)[0][1] == exchange.listing and store.load_empty(*KEY)[1:] == empty[1:]
+
+
+def test_nothing_is_recorded_after_a_network_error(tmp_path):
+    store = CandleStore(tmp_path)
+    exchange = ListedExchange()
+    store.merge(*KEY[:3], "1h", hourly(exchange.ts))
+    # The head before the listing comes back empty, then the request for the outage fails.
+    flaky = ListedExchange(fail_at=2)
+    cached = client(store, flaky).fetch_ohlcv_df(SYMBOL, "1h", lookback_bars=300)
+    assert len(flaky.requests) == 2
+    assert len(cached) == 190
+    assert not store.empty_path_for(*KEY).exists()
+
+
+def test_offline_reads_leave_the_record_alone(tmp_path):
+    store = CandleStore(tmp_path)
+    exchange = ListedExchange()
+    store.merge(*KEY[:3], "1h", hourly(exchange.ts))
+    cc = CCXTClient("binance", store=store, offline=True)
+    assert len(cc.fetch_ohlcv_df(SYMBOL, "1h", lookback_bars=300)) == 190
+    assert not store.empty_path_for(*KEY).exists()
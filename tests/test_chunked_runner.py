@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.adapters.candle_store import CandleStore
+from src.analytics.benchmark import synthetic_candles
+from src.core.backtest_runner import TF_HIGH, TF_MID, run_strategy
+from src.core.chunked_runner import run_strategy_chunked
+from src.utils.mtf import resample_ohlcv
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "settings.yaml"
+SYMBOL = "BTC/USDT"
+# Merged from per-block sums, so equal up to the last bits (see ``RunningSummary``).
+APPROX = {"sharpe_ratio", "profit_factor"}
+
+
+@pytest.fixture(scope="module")
+def config(tmp_path_factory) -> Path:
+    root = tmp_path_factory.mktemp("store")
+    cfg = yaml.safe_load(CONFIG.read_text())
+    # 3000 hourly bars keep every timeframe inside run_strategy's lookbacks (800 4h, 400 1d bars),
+    # so both runs see the same candles.
+    candles = synthetic_candles(3000)
+    candles.index = pd.date_range("2023-01-01", periods=len(candles), freq="h", name="timestamp")
+    store = CandleStore(root / "candles")
+    for tf, df in {"1h": candles, TF_MID: resample_ohlcv(candles, TF_MID),
+                   TF_HIGH: resample_ohlcv(candles, TF_HIGH)}.items():
+        store.merge(cfg['exchange'], cfg['market_type'], SYMBOL, tf, df)
+    cfg.update(api_mode="offline", symbols=[SYMBOL], timeframes=["1h"], lookback_bars=len(candles))
+    cfg['candle_store'] = {'enabled': True, 'offline': True, 'root': str(root / "candles")}
+    cfg['sentiment_cache'] = {'enabled': False}
+    cfg['feature_cache'] = {'enabled': False}
+    cfg['acquisition'] = {'async': False, 'resample_higher': False}
+    cfg['reports'] = {**cfg.get('reports', {}), 'charts': 'off'}
+    cfg['confluence']['thresholds'] = {'buy': 0.3, 'sell': -0.3, 'neutral_band': 0.1}
+    path = root / "settings.yaml"
+    path.write_text(yaml.safe_dump(cfg))
+    return path
+
+
+@pytest.fixture(scope="module")
+def in_memory(config, tmp_path_factory) -> Path:
+    out = tmp_path_factory.mktemp("in_memory")
+    run_strategy(str(config), out_dir=out)
+    return out
+
+
+# With the smaller blocks some positions are open across a block boundary.
+@pytest.mark.parametrize("block_bars,carried", [(97, True), (250, True), (1024, False), (2999, False)])
+def test_chunked_run_matches_in_memory_run(config, in_memory, tmp_path, block_bars, carried):
+    m = run_strategy_chunked(str(config), out_dir=tmp_path, block_bars=block_bars)
+
+    equity = pd.read_parquet(tmp_path / "equity.parquet")
+    expected_equity = pd.read_parquet(in_memory / "equity.parquet")
+    assert len(equity) > 2500
+    pd.testing.assert_frame_equal(equity, expected_equity, check_exact=True, check_freq=False)
+
+    trades = pd.read_csv(tmp_path / "trades_summary.csv")
+    expected_trades = pd.read_csv(in_memory / "trades_summary.csv")
+    assert len(trades) > 5
+    if carried:
+        block = pd.Series(np.arange(len(equity)) // block_bars, index=equity.index)
+        entry_block = block.loc[pd.to_datetime(trades["entry_time"])].to_numpy()
+        exit_block = block.loc[pd.to_datetime(trades["exit_time"])].to_numpy()
+        assert (entry_block < exit_block).any()
+    pd.testing.assert_frame_equal(trades, expected_trades, check_exact=True)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "drawdown.csv"), pd.read_csv(in_memory / "drawdown.csv"),
+                                  check_exact=True)
+
+    expected = json.loads((in_memory / "metrics_summary.json").read_text())
+    assert json.loads((tmp_path / "metrics_summary.json").read_text()) == m
+    for key, value in expected.items():
+        if key in APPROX:
+            assert m[key] == pytest.approx(value, rel=1e-12, abs=0), key
+        else:
+            assert m[key] == value, key
+    assert np.isfinite(m["sharpe_ratio"])
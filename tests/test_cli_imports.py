@@ -0,0 +1,28 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import manage
+
+ROOT = Path(__file__).resolve().parents[1]
+
+COMMANDS = sorted(p.stem for p in (ROOT / "src" / "commands").glob("*.py") if p.stem not in ("__init__", "base"))
+HEAVY = ("ccxt", "plotly", "matplotlib", "pyarrow")
+# Scheduler-driven invocations are short; importing a command must stay well below this.
+IMPORT_BUDGET_MS = 300
+
+
+def test_cli_does_not_import_heavy_dependencies():
+    code = (f"import sys; sys.path.insert(0, {str(ROOT)!r}); import manage, importlib, json; "
+            f"[importlib.import_module(f'commands.{{name}}') for name in {COMMANDS!r}]; "
+            f"print(json.dumps(sorted(m for m in {HEAVY!r} if m in sys.modules)))")
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, check=True)
+    assert json.loads(proc.stdout) == []
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_command_import_time_within_budget(command):
+    assert manage.command_import_ms(command) < IMPORT_BUDGET_MS
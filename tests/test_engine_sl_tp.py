@@ -0,0 +1,223 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.engine_sl_tp import ChunkedLongSlTp, bt_long_sl_tp, bt_long_sl_tp_batch
+from src.signals.risk import RiskModel
+
+
+def reference_bt_long_sl_tp(df: pd.DataFrame, entries: pd.Series, exits: pd.Series, atr_series: pd.Series,
+                            risk_model, fees_bps: int = 7, slippage_bps: int = 5,
+                            initial_equity: float = 10_000.0):
+    """The original per-bar loop, kept verbatim as the behaviour to match."""
+    price = df['close']
+    high = df['high']
+    low = df['low']
+    open_ = df.get('open', price)
+
+    fee_rate = (fees_bps + slippage_bps) / 10_000
+
+    cash = initial_equity
+    position_qty = 0.0
+    entry_price = None
+    entry_time = None
+    sl = None
+    tp = None
+    active_trade = None
+
+    curve = []
+    trades: list[dict] = []
+
+    for ts in df.index:
+        mark_price = price.loc[ts]
+        equity = cash + position_qty * mark_price
+
+        if position_qty > 0:
+            hit_sl = (low.loc[ts] <= sl) if sl is not None else False
+            hit_tp = (high.loc[ts] >= tp) if tp is not None else False
+            exit_px = None
+            exit_reason = None
+            if hit_sl and hit_tp:
+                bar_open = open_.loc[ts]
+                dist_sl = max(bar_open - sl, 0.0)
+                dist_tp = max(tp - bar_open, 0.0)
+                if dist_sl <= dist_tp:
+                    exit_px = sl
+                    exit_reason = "stop_loss"
+                else:
+                    exit_px = tp
+                    exit_reason = "take_profit"
+            elif hit_sl:
+                exit_px = sl
+                exit_reason = "stop_loss"
+            elif hit_tp:
+                exit_px = tp
+                exit_reason = "take_profit"
+            elif bool(exits.get(ts, False)):
+                exit_px = mark_price
+                exit_reason = "signal_exit"
+
+            if exit_px is not None:
+                gross_proceeds = position_qty * exit_px
+                exit_fee = gross_proceeds * fee_rate
+                cash += gross_proceeds - exit_fee
+                realized_pnl = gross_proceeds - exit_fee - active_trade["entry_cost"]
+                active_trade.update({
+                    "exit_time": ts,
+                    "exit_price": float(exit_px),
+                    "exit_fee": float(exit_fee),
+                    "pnl": float(realized_pnl),
+                    "pnl_pct": float(realized_pnl / active_trade["equity_at_entry"]),
+                    "return_on_risk": float(
+                        realized_pnl / max(active_trade["capital_risked"], 1e-9)
+                    ),
+                    "holding_period": ts - active_trade["entry_time"],
+                    "exit_reason": exit_reason,
+                })
+                trades.append(active_trade)
+
+                position_qty = 0.0
+                entry_price = None
+                entry_time = None
+                sl = None
+                tp = None
+                active_trade = None
+                equity = cash
+
+        if position_qty == 0 and bool(entries.get(ts, False)):
+            entry_price = mark_price
+            atr_val = float(atr_series.loc[ts])
+            legs = risk_model.construct(equity, entry_price, atr_val, "LONG")
+            sl, tp = legs["sl"], legs["tp"]
+            qty = max(0.0, float(legs.get("qty", 0.0)))
+            if qty <= 0:
+                continue
+            max_affordable_qty = (
+                cash / (entry_price * (1 + fee_rate)) if entry_price > 0 else 0.0
+            )
+            if max_affordable_qty > 0 and qty > max_affordable_qty:
+                qty = max_affordable_qty
+            gross_cost = qty * entry_price
+            entry_fee = gross_cost * fee_rate
+            total_cost = gross_cost + entry_fee
+            if total_cost > cash or qty <= 0:
+                continue
+            cash -= total_cost
+            position_qty = qty
+            entry_time = ts
+            active_trade = {
+                "entry_time": ts,
+                "entry_price": float(entry_price),
+                "qty": float(qty),
+                "entry_fee": float(entry_fee),
+                "stop_loss": float(sl),
+                "take_profit": float(tp),
+                "capital_risked": float(abs(entry_price - sl) * qty),
+                "entry_cost": float(total_cost),
+                "equity_at_entry": float(equity),
+            }
+
+        equity = cash + position_qty * mark_price
+        curve.append((ts, equity))
+
+    curve_df = pd.DataFrame(curve, columns=['timestamp', 'equity']).set_index('timestamp')
+    return curve_df, trades
+
+
+def market(n: int, seed: int = 0):
+    """Random-walk candles with random entry/exit signals and an ATR with NaN gaps."""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.0, n))
+    open_ = close + rng.normal(0, 0.5, n)
+    spread = rng.uniform(0.1, 2.5, n)
+    index = pd.date_range("2024-01-01", periods=n, freq="h")
+    df = pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.uniform(1, 10, n),
+    }, index=index)
+    entries = pd.Series(rng.random(n) < 0.15, index=index)
+    exits = pd.Series(rng.random(n) < 0.05, index=index)
+    atr = pd.Series(rng.uniform(0.2, 1.5, n), index=index)
+    atr[rng.random(n) < 0.05] = np.nan  # entries on these bars size to zero and are rejected
+    return df, entries, exits, atr
+
+
+def assert_same_run(result, expected):
+    (curve, trades), (ref_curve, ref_trades) = result, expected
+    pd.testing.assert_frame_equal(curve, ref_curve, check_exact=True)
+    assert trades == ref_trades
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("risk", [RiskModel(0.02, 1.5, 2.0), RiskModel(50.0, 1.0, 1.5)])
+def test_matches_reference_loop(seed, risk):
+    df, entries, exits, atr = market(1500, seed)
+    expected = reference_bt_long_sl_tp(df, entries, exits, atr, risk)
+    assert_same_run(bt_long_sl_tp(df, entries, exits, atr, risk), expected)
+
+    trades = expected[1]
+    assert len(trades) > 20
+    assert {t["exit_reason"] for t in trades} == {"stop_loss", "take_profit", "signal_exit"}
+    # Rejected entries (NaN ATR; with the oversized risk also cash short by rounding) drop their bars.
+    assert len(expected[0]) < len(df)
+
+
+def test_missing_open_and_signal_bars():
+    df, entries, exits, atr = market(800, seed=11)
+    df = df.drop(columns="open")
+    # Signals defined on part of the bars only: missing bars carry no signal.
+    entries, exits = entries.iloc[::2], exits.iloc[100:]
+    risk = RiskModel(0.05, 2.0, 1.0)
+    assert_same_run(bt_long_sl_tp(df, entries, exits, atr, risk),
+                    reference_bt_long_sl_tp(df, entries, exits, atr, risk))
+
+
+def test_batch_rows_match_single_runs():
+    df, entries, exits, atr = market(1200, seed=3)
+    rng = np.random.default_rng(3)
+    entry_m = np.stack([entries.to_numpy(), rng.random(len(df)) < 0.3, rng.random(len(df)) < 0.05])
+    models = [RiskModel(0.02, 1.5, 2.0), RiskModel(50.0, 1.0, 1.5), RiskModel(0.01, 3.0, 1.0)]
+    fees, equity0 = [7, 0, 20], [10_000.0, 2_500.0, 1e6]
+
+    equity, ledger, recorded = bt_long_sl_tp_batch(df, entry_m, exits, atr, models, fees_bps=fees,
+                                                   slippage_bps=5, initial_equity=equity0, with_recorded=True)
+    assert equity.shape == recorded.shape == (3, len(df))
+    for v in range(3):
+        curve, trades = bt_long_sl_tp(df, pd.Series(entry_m[v], index=df.index), exits, atr, models[v],
+                                      fees[v], 5, equity0[v])
+        np.testing.assert_array_equal(equity[v][recorded[v]], curve["equity"].to_numpy())
+        np.testing.assert_array_equal(df.index[recorded[v]], curve.index)
+        assert ledger.to_records(df.index, variant=v) == trades
+
+
+@pytest.mark.parametrize("blocks", [[300, 300, 300, 300], [1, 499, 7, 693], [1200]])
+def test_chunked_blocks_match_one_call(blocks):
+    df, entries, exits, atr = market(1200, seed=5)
+    exits &= np.arange(len(df)) % 3 == 0  # fewer exits and wide stops: positions outlive blocks
+    risk = RiskModel(0.01, 6.0, 2.0)
+    runner = ChunkedLongSlTp(risk)
+    curves, trades, start = [], [], 0
+    for size in blocks:
+        part = slice(start, start + size)
+        curve, block_trades = runner.run_block(df.iloc[part], entries.iloc[part], exits.iloc[part],
+                                               atr.iloc[part])
+        curves.append(curve)
+        trades += block_trades
+        start += size
+
+    assert_same_run((pd.concat(curves), trades), bt_long_sl_tp(df, entries, exits, atr, risk))
+    bar = pd.Series(np.arange(len(df)), index=df.index)
+    cuts = np.cumsum(blocks)[:-1]
+    carried = [t for t in trades if ((bar[t["entry_time"]] < cuts) & (cuts <= bar[t["exit_time"]])).any()]
+    assert len(carried) >= (1 if len(cuts) else 0)
+
+
+def test_float32_prices_run_as_their_float64_values():
+    df, entries, exits, atr = market(1500, seed=8)
+    df32, atr32 = df.astype(np.float32), atr.astype(np.float32)
+    risk = RiskModel(0.02, 1.5, 2.0)
+    assert_same_run(bt_long_sl_tp(df32, entries, exits, atr32, risk),
+                    bt_long_sl_tp(df32.astype(np.float64), entries, exits, atr32.astype(np.float64), risk))
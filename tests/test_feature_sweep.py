@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.analytics.feature_sweep import DEFAULT_GRID, TechScorer, feature_combinations
+from src.core.backtest_runner import tech_subscore
+from src.indicators.features import compute_features
+from src.indicators.families import IndicatorFamilies
+
+FEATURES_CFG = yaml.safe_load((Path(__file__).resolve().parents[1] / "config" / "settings.yaml").read_text())['features']
+COMBOS = feature_combinations(FEATURES_CFG, DEFAULT_GRID)
+
+
+def candles(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.0, n))
+    close[300:320] = close[300]  # a flat stretch: zero deltas
+    open_ = close + rng.normal(0, 0.3, n)
+    spread = rng.uniform(0.1, 2.0, n)
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+    }, index=pd.date_range("2024-01-01", periods=n, freq="h"))
+
+
+def test_grid_combinations():
+    # 3 EMA windows x 3 RSI periods x 4 MACDs (every fast leg is below every slow one) x 9 Supertrends
+    assert len(COMBOS) == 324
+    assert all(f['atr'] == FEATURES_CFG['atr'] for f in COMBOS)
+    assert COMBOS[0]['ema']['windows'] == [20, 50, 200]
+    skipped = feature_combinations(FEATURES_CFG, {"macd": {"fast": [12, 26], "slow": [26]}})
+    assert [f['macd']['fast'] for f in skipped] == [12]
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_tech_scorer_matches_tech_subscore(seed):
+    df = candles(1500, seed)
+    scorer = TechScorer(df)
+    for feats in COMBOS[::13] + COMBOS[-1:]:
+        expected = tech_subscore(df, {'features': feats}).to_numpy()
+        np.testing.assert_array_equal(scorer.score(feats), expected, err_msg=str(feats))
+
+
+def test_families_share_computations_across_the_grid():
+    df = candles(800)
+    scorer = TechScorer(df)
+    for feats in COMBOS:
+        scorer.score(feats)
+
+    spans = {w for f in COMBOS for w in (*f['ema']['windows'], f['macd']['fast'], f['macd']['slow'])}
+    # One ATR per Supertrend period, shared by its three multipliers.
+    assert scorer.families.counts == {"ema": len(spans), "rsi": 3, "macd_signal": 4, "atr": 3, "supertrend": 9}
+    # 3 trend + 3 EMA-cross + 3 RSI + 4 MACD + 9 Supertrend terms make up all 324 scores.
+    assert len(scorer.terms) == 22
+
+
+def test_families_match_compute_features():
+    df = candles(800, seed=3)
+    families = IndicatorFamilies(df)
+    for feats in (FEATURES_CFG, COMBOS[100], COMBOS[-1]):
+        expected = compute_features(df, feats)
+        for w in feats['ema']['windows']:
+            np.testing.assert_array_equal(families.ema(w), expected[f"ema_{w}"].to_numpy())
+        np.testing.assert_array_equal(families.rsi(feats['rsi']['period']), expected["rsi"].to_numpy())
+        line, sig, hist = families.macd(feats['macd']['fast'], feats['macd']['slow'], feats['macd']['signal'])
+        np.testing.assert_array_equal(line, expected["macd_line"].to_numpy())
+        np.testing.assert_array_equal(sig, expected["macd_signal"].to_numpy())
+        np.testing.assert_array_equal(hist, expected["macd_hist"].to_numpy())
+        st = families.supertrend(feats['supertrend']['period'], feats['supertrend']['multiplier'])
+        np.testing.assert_array_equal(st, expected["supertrend"].to_numpy())
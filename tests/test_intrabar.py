@@ -0,0 +1,133 @@
+import ccxt
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.adapters.candle_store import CandleStore
+from src.adapters.exchange_ccxt import CCXTClient
+from src.backtest.engine_sl_tp import bt_long_sl_tp
+from src.backtest.intrabar import IntrabarResolver
+from src.signals.risk import RiskModel
+from src.utils.mtf import resample_ohlcv
+
+SYMBOL = "BTC/USDT"
+MINUTE_MS = 60_000
+HOUR_MS = 60 * MINUTE_MS
+
+
+def minutes(hours: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = hours * 60
+    close = 100 + np.cumsum(rng.normal(0, 0.15, n))
+    open_ = np.concatenate(([100.0], close[:-1]))
+    wick = np.abs(rng.normal(0, 0.05, (2, n)))
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + wick[0],
+        "low": np.minimum(open_, close) - wick[1],
+        "close": close,
+        "volume": rng.uniform(1, 10, n),
+    }, index=pd.date_range("2024-01-01", periods=n, freq="min", name="timestamp"))
+
+
+def market(hours: int, seed: int = 0):
+    """Hourly bars resampled from minute candles, with SL/TP distances inside one bar's range."""
+    fine = minutes(hours, seed)
+    df = resample_ohlcv(fine, "1h")
+    rng = np.random.default_rng(seed + 100)
+    entries = pd.Series(rng.random(len(df)) < 0.2, index=df.index)
+    exits = pd.Series(rng.random(len(df)) < 0.02, index=df.index)
+    atr = (df["high"] - df["low"]).rolling(14, min_periods=1).mean()
+    return fine, df, entries, exits, atr
+
+
+def frame_loader(fine: pd.DataFrame, calls: list):
+    def load_ranges(ranges):
+        calls.append(ranges)
+        ts = fine.index.as_unit("ms").asi8
+        keep = np.zeros(len(ts), dtype=bool)
+        for start, end in ranges:
+            keep |= (ts >= start) & (ts < end)
+        return fine[keep]
+    return load_ranges
+
+
+RISK = RiskModel(0.02, 0.35, 0.35)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_iterative_loading_matches_every_fine_bar_preloaded(seed):
+    fine, df, entries, exits, atr = market(1500, seed)
+
+    calls = []
+    iterative = IntrabarResolver(df.index, "1h", frame_loader(fine, calls))
+    curve, trades = bt_long_sl_tp(df, entries, exits, atr, RISK, intrabar=iterative)
+
+    preloaded = IntrabarResolver(df.index, "1h", frame_loader(fine, []))
+    preloaded.pending.update(df.index.as_unit("ms").asi8.tolist())
+    preloaded.load_pending()
+    expected_curve, expected_trades = bt_long_sl_tp(df, entries, exits, atr, RISK, intrabar=preloaded)
+
+    pd.testing.assert_frame_equal(curve, expected_curve, check_exact=True)
+    assert trades == expected_trades
+    assert iterative.resolved == preloaded.resolved > 5 and iterative.fallback == preloaded.fallback
+    # Only the ambiguous bars are loaded, over a few batches.
+    assert 1 <= len(calls) < 10 and len(iterative.cache) < len(df) // 10
+
+    # The fine candles change some outcomes of the open-distance rule.
+    _, coarse_trades = bt_long_sl_tp(df, entries, exits, atr, RISK)
+    assert [t["exit_reason"] for t in trades] != [t["exit_reason"] for t in coarse_trades]
+
+
+def test_offline_without_fine_candles_falls_back_to_nearer_level(tmp_path):
+    _, df, entries, exits, atr = market(1500, 1)
+    cc = CCXTClient("binance", store=CandleStore(tmp_path), offline=True)
+    resolver = IntrabarResolver(df.index, "1h", lambda ranges: cc.fetch_ranges_df(SYMBOL, "1m", ranges))
+
+    curve, trades = bt_long_sl_tp(df, entries, exits, atr, RISK, intrabar=resolver)
+    expected_curve, expected_trades = bt_long_sl_tp(df, entries, exits, atr, RISK)
+    pd.testing.assert_frame_equal(curve, expected_curve, check_exact=True)
+    assert trades == expected_trades
+    assert resolver.resolved == 0 and resolver.fallback > 5
+    assert all(len(open_) == 0 for open_, _, _ in resolver.cache.values())
+
+
+class FlakyExchange:
+    """``fetch_ohlcv`` over fixed rows that raises ``ccxt.NetworkError`` from the ``fail_at``-th call on."""
+
+    def __init__(self, rows: list, fail_at: int):
+        self.rows = rows
+        self.fail_at = fail_at
+        self.calls = 0
+
+    def fetch_ohlcv(self, symbol, timeframe, since=None, limit=1000):
+        self.calls += 1
+        if self.calls >= self.fail_at:
+            raise ccxt.NetworkError("connection reset")
+        return [r for r in self.rows if r[0] >= since][:limit]
+
+
+def rows_of(df: pd.DataFrame) -> list:
+    ts = df.index.as_unit("ms").asi8.tolist()
+    return [[t, *values] for t, values in zip(ts, df[["open", "high", "low", "close", "volume"]].values.tolist())]
+
+
+@pytest.mark.parametrize("fail_at", [1, 2])
+def test_network_error_mid_fetch_keeps_the_stored_candles(tmp_path, fail_at):
+    fine = minutes(6)
+    t0 = fine.index[0].value // 1_000_000
+    hour = [(t0 + h * HOUR_MS, t0 + (h + 1) * HOUR_MS) for h in range(6)]
+    store = CandleStore(tmp_path)
+    stored = pd.concat([fine.iloc[:60], fine.iloc[120:150]])  # hour 0 in full, half of hour 2
+    store.merge("binance", "spot", SYMBOL, "1m", stored)
+
+    cc = CCXTClient("binance", store=store)
+    cc._ex = FlakyExchange(rows_of(fine), fail_at)
+    # Hour 0 is served from the store; hours 1, 2 and 3 are fetched in turn until the error.
+    got = cc.fetch_ranges_df(SYMBOL, "1m", [hour[0], hour[1], hour[2], hour[3]])
+
+    fetched = fine.iloc[60:120] if fail_at == 2 else fine.iloc[:0]
+    expected = pd.concat([stored, fetched]).sort_index()
+    pd.testing.assert_frame_equal(got, expected, check_freq=False)
+    on_disk = store.load("binance", "spot", SYMBOL, "1m")
+    pd.testing.assert_frame_equal(on_disk, expected, check_freq=False)
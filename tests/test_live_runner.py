@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.core.backtest_runner import (TF_HIGH, TF_MID, StrategyInputs, build_engine, gate_signals,
+                                      tech_subscore)
+from src.core.live_runner import LiveSignalRunner, ReplayCandleSource
+from src.utils.mtf import align_to_lower_tf, closed_bar_positions, resample_ohlcv
+from src.utils.timeframes import timeframe_to_ms
+
+CFG = yaml.safe_load((Path(__file__).resolve().parents[1] / "config" / "settings.yaml").read_text())
+SYMBOL = "BTC/USDT"
+
+
+def candles(days: int, seed: int = 0) -> pd.DataFrame:
+    n = days * 24
+    rng = np.random.default_rng(seed)
+    # Trends lasting days, so all three timeframes agree often enough to pass the gate.
+    close = 100 + 15 * np.sin(2 * np.pi * np.arange(n) / (24 * 24)) + np.cumsum(rng.normal(0, 0.3, n))
+    open_ = close + rng.normal(0, 0.3, n)
+    spread = rng.uniform(0.1, 2.0, n)
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.uniform(1, 10, n),
+    }, index=pd.date_range("2024-01-01", periods=n, freq="h"))
+
+
+def batch_signals(engine, frames: dict) -> tuple[pd.Series, pd.Series]:
+    """``gate_signals`` over the full frames, with no sentiment."""
+    tf_entry = CFG['timeframes'][0]
+    df_low = frames[tf_entry]
+    totals = {tf: tech_subscore(df, CFG) * engine.w.trend for tf, df in frames.items()}
+    inputs = StrategyInputs(
+        symbol=SYMBOL, tf_entry=tf_entry, df_low=df_low, total_low=totals[tf_entry],
+        total_high_on_low=align_to_lower_tf(totals[TF_HIGH], closed_bar_positions(
+            frames[TF_HIGH].index, TF_HIGH, df_low.index, tf_entry), df_low.index),
+        total_mid_on_low=align_to_lower_tf(totals[TF_MID], closed_bar_positions(
+            frames[TF_MID].index, TF_MID, df_low.index, tf_entry), df_low.index),
+        atr_series=pd.Series(np.nan, index=df_low.index),
+    )
+    return gate_signals(engine, inputs)
+
+
+def replay_file(path: Path, frames: dict, start: pd.Timestamp) -> Path:
+    parts = [df.loc[start:].rename_axis("timestamp").reset_index().assign(symbol=SYMBOL, timeframe=tf)
+             for tf, df in frames.items()]
+    pd.concat(parts, ignore_index=True).sample(frac=1.0, random_state=0).to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("seed", [0, 1, 3])
+def test_replay_after_warm_up_matches_gate_signals(tmp_path, seed):
+    tf_entry = CFG['timeframes'][0]
+    df_low = candles(120, seed)
+    frames = {tf_entry: df_low, TF_MID: resample_ohlcv(df_low, TF_MID), TF_HIGH: resample_ohlcv(df_low, TF_HIGH)}
+    # Thresholds the 0.4-weighted technical score alone can cross.
+    engine = build_engine(CFG, buy=0.3, sell=-0.3, neutral_band=0.1)
+    entries, exits = batch_signals(engine, frames)
+
+    # Warm up on the first 40 days, then replay the rest from a file in bar-close order.
+    start = df_low.index[0] + pd.Timedelta(days=40)
+    runner = LiveSignalRunner(CFG, engine)
+    for tf, df in frames.items():
+        runner.warm_up(SYMBOL, tf, df.loc[:start - pd.Timedelta(milliseconds=1)])
+    decisions = list(runner.run(ReplayCandleSource(replay_file(tmp_path / "candles.csv", frames, start))))
+
+    replayed = df_low.index >= start
+    expected_buy = df_low.index[entries.to_numpy() & replayed]
+    expected_sell = df_low.index[exits.to_numpy() & replayed]
+    assert len(expected_buy) > 10 and len(expected_sell) > 10
+    assert [d.bar_time for d in decisions if d.decision == "BUY"] == list(expected_buy)
+    assert [d.bar_time for d in decisions if d.decision == "SELL"] == list(expected_sell)
+
+    # Signals on entry bars that close at the same instant as a 4h (and 1d) bar: the higher bar is
+    # delivered first and already gates them.
+    closes = (df_low.index + pd.Timedelta(milliseconds=timeframe_to_ms(tf_entry))).as_unit("ns").asi8
+    for tf in (TF_MID, TF_HIGH):
+        shared = closes % (timeframe_to_ms(tf) * 1_000_000) == 0
+        assert (shared & replayed & (entries.to_numpy() | exits.to_numpy())).any(), tf
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from src.adapters import sentiment_cache, sentiment_providers
+from src.adapters.sentiment_cache import SentimentCache
+from src.core.live_runner import LiveSentiment
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+def fear_greed_payload(days: pd.DatetimeIndex, value: int) -> dict:
+    return {"data": [{"timestamp": str(ts.value // 1_000_000_000), "value": str(value)} for ts in days]}
+
+
+def test_refreshes_when_the_cache_entry_expires(tmp_path, monkeypatch):
+    clock = FakeClock(1_000_000.0)
+    monkeypatch.setattr(sentiment_cache, "time", clock)
+    days = pd.date_range("2024-01-01", periods=5, freq="D")
+    responses = [fear_greed_payload(days[:3], 20), fear_greed_payload(days[3:], 90)]
+    requests = []
+
+    def fake_get_json(url, params=None, timeout=10):
+        requests.append(params)
+        return responses[len(requests) - 1]
+
+    monkeypatch.setattr(sentiment_providers, "_safe_get_json", fake_get_json)
+    cache = SentimentCache(tmp_path, {"fear_greed": 1.0})
+    live = LiveSentiment("live", {"use_funding": False, "use_news": False}, cache)
+    symbol = "BTC/USDT"
+    live.warm_up(symbol, pd.date_range(days[0], days[3], freq="h"))
+    warm = live.series[symbol].iloc[-1]
+    assert len(requests) == 1 and warm > 0
+
+    # Within the TTL new bars keep the cached value and nothing is requested.
+    assert live(symbol, days[3] + pd.Timedelta(hours=1)) == warm
+    assert len(requests) == 1
+
+    # Once the entry has expired the next bar re-queries the provider (incrementally) and
+    # picks up the new readings instead of repeating the warm-up value.
+    clock.now += 2 * 3600
+    refreshed = live(symbol, days[4])
+    assert len(requests) == 2
+    assert requests[1]["limit"] != 0  # incremental, not the full history
+    assert refreshed < warm
+    assert live.series[symbol].index[-1] == days[4]
@@ -0,0 +1,61 @@
+import socket
+from pathlib import Path
+
+import pandas as pd
+import pytest
+import yaml
+
+from src.adapters import sentiment_providers as sp
+from src.adapters.candle_store import CandleStore
+from src.analytics.benchmark import synthetic_candles
+from src.core.backtest_runner import build_engine, gate_signals, load_market_data, prepare_inputs
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "settings.yaml"
+SYMBOL = "BTC/USDT"
+
+
+def closed_port_url() -> str:
+    """A local URL nothing listens on, so live sentiment requests fail at once and fall back."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}/"
+
+
+@pytest.fixture
+def cfg(tmp_path, monkeypatch):
+    cfg = yaml.safe_load(CONFIG.read_text())
+    candles = synthetic_candles(12_000)
+    candles.index = pd.date_range("2023-01-01", periods=len(candles), freq="h", name="timestamp")
+    CandleStore(tmp_path).merge(cfg['exchange'], cfg['market_type'], SYMBOL, "1h", candles)
+    url = closed_port_url()
+    for name in sp.URLS:
+        monkeypatch.setitem(sp.URLS, name, url)
+    cfg.update(api_mode="live", symbols=[SYMBOL], timeframes=["1h"], lookback_bars=3000)
+    cfg['acquisition'] = {**cfg.get('acquisition', {}), 'resample_higher': True,
+                          'urls': {name: url for name in sp.URLS}}
+    cfg['candle_store'] = {'enabled': True, 'offline': True, 'root': str(tmp_path)}
+    cfg['sentiment_cache'] = {'enabled': False}
+    cfg['feature_cache'] = {'enabled': False}
+    cfg['memory'] = {**cfg.get('memory', {}), 'compact': False}
+    return cfg
+
+
+def test_resampled_async_acquisition_matches_sequential(cfg):
+    frames = {}
+    for use_async in (True, False):
+        cfg['acquisition']['async'] = use_async
+        frames[use_async] = load_market_data(cfg, SYMBOL, "1h", "live")
+
+    df_high, df_mid, df_low, sent = frames[True]
+    assert len(df_low) == cfg['lookback_bars']
+    assert sent.index.equals(df_low.index)
+    for got, expected in zip(frames[True], frames[False]):
+        if isinstance(got, pd.DataFrame):
+            pd.testing.assert_frame_equal(got, expected)
+        else:
+            pd.testing.assert_series_equal(got, expected)
+
+    cfg['acquisition']['async'] = True
+    inputs = prepare_inputs(cfg)
+    entries, exits = gate_signals(build_engine(cfg), inputs)
+    assert len(entries) == len(exits) == cfg['lookback_bars']
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analytics import metrics
+from src.analytics.metrics import RunningSummary, rolling_drawdown, rolling_sharpe, summary_batch
+from src.analytics.trade_report import generate_trade_log
+from src.backtest.engine_sl_tp import bt_long_sl_tp, bt_long_sl_tp_batch
+from src.signals.risk import RiskModel
+
+# Summed in a different order than ``summary``: equal up to the last bits.
+APPROX = {"sharpe_ratio", "profit_factor"}
+START = 10_000.0
+
+
+def market(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.0, n))
+    spread = rng.uniform(0.1, 2.5, n)
+    index = pd.date_range("2024-01-01", periods=n, freq="h")
+    df = pd.DataFrame({"open": close + rng.normal(0, 0.5, n), "high": close + spread, "low": close - spread,
+                       "close": close}, index=index)
+    atr = pd.Series(rng.uniform(0.2, 1.5, n), index=index)
+    atr[rng.random(n) < 0.05] = np.nan  # rejected entries: bars a single-curve run leaves out
+    entries = rng.random((4, n)) < [[0.02], [0.1], [0.3], [0.0]]
+    exits = rng.random(n) < 0.05
+    return df, entries, exits, atr
+
+
+def assert_same_summary(row: dict, expected: dict):
+    for key, value in expected.items():
+        if key == "drawdown_series":
+            continue
+        if key in APPROX:
+            assert row[key] == pytest.approx(value, rel=1e-12, abs=0), key
+        else:
+            assert row[key] == value, key
+
+
+@pytest.fixture(scope="module")
+def batch():
+    df, entries, exits, atr = market(2000)
+    risk = RiskModel(50.0, 1.0, 1.5)  # oversized risk: many more rejected entries
+    equity, ledger, recorded = bt_long_sl_tp_batch(df, entries, exits, atr, risk, with_recorded=True)
+    return df, entries, exits, atr, risk, equity, ledger, recorded
+
+
+def test_summary_batch_with_recorded_matches_single_run_summaries(batch):
+    df, entries, exits, atr, risk, equity, ledger, recorded = batch
+    rows = summary_batch(equity, ledger["variant"], ledger["pnl"], START, recorded=recorded)
+    assert (~recorded).sum() > 10
+    for v in range(len(entries)):
+        curve, trades = bt_long_sl_tp(df, pd.Series(entries[v], index=df.index), pd.Series(exits, index=df.index),
+                                      atr, risk)
+        expected = metrics.summary(curve, generate_trade_log(trades), START)
+        assert_same_summary(rows.iloc[v].to_dict(), expected)
+    assert rows["num_trades"].iloc[-1] == 0 and rows["profit_factor"].iloc[-1] == 0.0
+
+
+def test_summary_batch_without_recorded_matches_summary_on_every_bar(batch):
+    df, entries, *_, equity, ledger, _ = batch
+    rows = summary_batch(equity, ledger["variant"], ledger["pnl"], START)
+    trades = ledger.to_frame(df.index)
+    for v in range(len(entries)):
+        curve = pd.DataFrame({"equity": equity[v]}, index=df.index)
+        expected = metrics.summary(curve, generate_trade_log(trades[trades["variant"] == v]), START)
+        assert_same_summary(rows.iloc[v].to_dict(), expected)
+
+
+@pytest.mark.parametrize("blocks", [[500, 500, 500, 500], [1, 1, 998, 1000], [2000]])
+def test_running_summary_over_blocks_matches_summary(batch, blocks):
+    df, entries, exits, atr, risk, *_ = batch
+    curve, trades = bt_long_sl_tp(df, pd.Series(entries[1], index=df.index), pd.Series(exits, index=df.index),
+                                  atr, risk)
+    trades_df = generate_trade_log(trades)
+    expected = metrics.summary(curve, trades_df, START)
+
+    running, drawdowns, start = RunningSummary(), [], 0
+    for size in blocks:
+        part = curve.iloc[start:start + size]
+        block_trades = trades_df[trades_df["exit_time"].isin(part.index)]
+        drawdowns.append(running.update(part, block_trades))
+        start += size
+    assert_same_summary(running.result(START), expected)
+    pd.testing.assert_series_equal(pd.concat(drawdowns), expected["drawdown_series"], check_exact=True)
+
+
+def reference_rolling_sharpe(equity: np.ndarray, window: int, periods_per_year: int = 365*24) -> np.ndarray:
+    rets = pd.Series(equity).pct_change()
+    mean = rets.rolling(window).mean()
+    std = rets.rolling(window).std(ddof=0)
+    sharpe = np.sqrt(periods_per_year) * mean / (std + 1e-12)
+    return sharpe.where(std != 0, 0.0).where(std.notna()).to_numpy()
+
+
+@pytest.mark.parametrize("window", [1, 2, 24, 500])
+def test_rolling_functions_match_pandas_rolling(batch, window):
+    *_, equity, _, _ = batch
+    curves = np.vstack([equity, 10_000 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, (2, 2000)),
+                                                           axis=1))])
+    sharpe = rolling_sharpe(curves, window)
+    drawdown = rolling_drawdown(curves, window)
+    for v, curve in enumerate(curves):
+        ref = reference_rolling_sharpe(curve, window)
+        assert np.isnan(sharpe[v, :window]).all()
+        np.testing.assert_allclose(sharpe[v], ref, rtol=1e-6, atol=1e-6, equal_nan=True)
+        series = pd.Series(curve)
+        np.testing.assert_array_equal(drawdown[v], (series / series.rolling(window, min_periods=1).max() - 1.0))
+    np.testing.assert_array_equal(rolling_drawdown(curves[0], window), drawdown[0])
+    np.testing.assert_array_equal(rolling_sharpe(curves[0], window), sharpe[0])
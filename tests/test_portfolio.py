@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest.engine_sl_tp import _size_long, bt_long_sl_tp, nearer_level
+from src.backtest.portfolio import bt_portfolio_long_sl_tp
+from src.signals.risk import RiskModel
+
+
+def reference_portfolio(streams: dict, risk_model, fees_bps: int = 7, slippage_bps: int = 5,
+                        initial_equity: float = 10_000.0, max_symbol_exposure: float | None = None,
+                        max_total_exposure: float | None = None):
+    """Visit every timestamp of every symbol: exits first, then entries, each in symbol order.
+
+    Returns ``(equity per timestamp, trade records, rejected entries per symbol)``.
+    """
+    fee_rate = (fees_bps + slippage_bps) / 10_000
+    symbols = list(streams)
+    bars = {}
+    for s, (df, entries, exits, atr) in streams.items():
+        bars[s] = pd.DataFrame({
+            "open": df["open"], "high": df["high"], "low": df["low"], "close": df["close"],
+            "entry": entries.reindex(df.index, fill_value=False),
+            "exit": exits.reindex(df.index, fill_value=False),
+            "atr": atr.reindex(df.index),
+        })
+    timeline = sorted(set().union(*(b.index for b in bars.values())))
+
+    cash = float(initial_equity)
+    opened: dict[str, dict] = {}  # in the order the positions were opened
+    last_close: dict[str, float] = {}
+    trades, rejected, curve = [], dict.fromkeys(symbols, 0), []
+    for ts in timeline:
+        live = [s for s in symbols if ts in bars[s].index]
+        rows = {s: bars[s].loc[ts] for s in live}
+        for s in live:
+            last_close[s] = float(rows[s]["close"])
+
+        for s in live:
+            p, row = opened.get(s), rows[s]
+            if p is None:
+                continue
+            hit_sl, hit_tp = row["low"] <= p["sl"], row["high"] >= p["tp"]
+            if hit_sl and hit_tp:
+                reason = "stop_loss" if nearer_level(row["open"], p["sl"], p["tp"]) == 0 else "take_profit"
+            elif hit_sl or hit_tp:
+                reason = "stop_loss" if hit_sl else "take_profit"
+            elif row["exit"]:
+                reason = "signal_exit"
+            else:
+                continue
+            exit_px = {"stop_loss": p["sl"], "take_profit": p["tp"]}.get(reason, float(row["close"]))
+            gross_proceeds = p["qty"] * exit_px
+            exit_fee = gross_proceeds * fee_rate
+            cash += gross_proceeds - exit_fee
+            pnl = gross_proceeds - exit_fee - p["trade"]["entry_cost"]
+            trade = p["trade"]
+            trades.append({"symbol": s, **trade, "exit_time": ts, "exit_price": float(exit_px),
+                           "exit_fee": float(exit_fee), "pnl": float(pnl),
+                           "pnl_pct": float(pnl / trade["equity_at_entry"]),
+                           "return_on_risk": float(pnl / max(trade["capital_risked"], 1e-9)),
+                           "holding_period": ts - trade["entry_time"], "exit_reason": reason})
+            del opened[s]
+
+        for s in live:
+            row = rows[s]
+            if s in opened or not row["entry"]:
+                continue
+            exposure = 0.0
+            for o, p in opened.items():
+                exposure += p["qty"] * last_close[o]
+            equity_now = cash + exposure
+            caps = []
+            if max_symbol_exposure is not None:
+                caps.append(max_symbol_exposure * equity_now)
+            if max_total_exposure is not None:
+                caps.append(max_total_exposure * equity_now - exposure)
+            entry_price = float(row["close"])
+            sized = _size_long(risk_model, equity_now, cash, entry_price, float(row["atr"]), fee_rate,
+                               min(caps) if caps else None)
+            if sized is None:
+                rejected[s] += 1
+                continue
+            qty, legs, entry_fee, total_cost = sized
+            cash -= total_cost
+            opened[s] = {"qty": qty, "sl": legs["sl"], "tp": legs["tp"], "trade": {
+                "entry_time": ts, "entry_price": entry_price, "qty": float(qty), "entry_fee": float(entry_fee),
+                "stop_loss": float(legs["sl"]), "take_profit": float(legs["tp"]),
+                "capital_risked": float(abs(entry_price - legs["sl"]) * qty), "entry_cost": float(total_cost),
+                "equity_at_entry": float(equity_now),
+            }}
+
+        exposure = 0.0
+        for s in symbols:
+            if s in opened:
+                exposure += opened[s]["qty"] * last_close[s]
+        curve.append(cash + exposure)
+
+    trades.sort(key=lambda r: (r["entry_time"], r["symbol"]))
+    return pd.Series(curve, index=pd.DatetimeIndex(timeline, name="timestamp")), trades, rejected
+
+
+def stream(n: int, seed: int, freq: str = "h", start: str = "2024-01-01", entry_rate: float = 0.1):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.0, n))
+    open_ = close + rng.normal(0, 0.5, n)
+    spread = rng.uniform(0.1, 2.5, n)
+    index = pd.date_range(start, periods=n, freq=freq)
+    df = pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+    }, index=index)
+    atr = pd.Series(rng.uniform(0.2, 1.5, n), index=index)
+    atr[rng.random(n) < 0.03] = np.nan
+    return (df, pd.Series(rng.random(n) < entry_rate, index=index),
+            pd.Series(rng.random(n) < 0.05, index=index), atr)
+
+
+def misaligned_streams(seed: int) -> dict:
+    """Hourly, two-hourly and half-past-the-hour symbols starting and ending at different times."""
+    return {
+        "AAA": stream(600, seed),
+        "BBB": stream(250, seed + 1, freq="2h", start="2024-01-03"),
+        "CCC": stream(400, seed + 2, start="2024-01-02 00:30"),
+    }
+
+
+def assert_matches_reference(streams, risk, **kwargs):
+    curve, records, attribution = bt_portfolio_long_sl_tp(streams, risk, **kwargs)
+    ref_equity, ref_trades, ref_rejected = reference_portfolio(streams, risk, **kwargs)
+    assert curve.index.equals(ref_equity.index)
+    np.testing.assert_array_equal(curve["equity"].to_numpy(), ref_equity.to_numpy())
+    assert records == ref_trades
+    assert attribution.set_index("symbol")["rejected_entries"].to_dict() == ref_rejected
+    return curve, records, attribution
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_one_symbol_without_caps_matches_bt_long_sl_tp(seed):
+    df, entries, exits, atr = stream(1500, seed, entry_rate=0.15)
+    risk = RiskModel(0.02, 1.5, 2.0)
+    curve, records, attribution = bt_portfolio_long_sl_tp({"AAA": (df, entries, exits, atr)}, risk)
+    single_curve, single_trades = bt_long_sl_tp(df, entries, exits, atr, risk)
+
+    assert records == [{"symbol": "AAA", **t} for t in single_trades]
+    # The portfolio curve also keeps the bars of rejected entries.
+    assert len(curve) == len(df) > len(single_curve)
+    np.testing.assert_array_equal(curve["equity"].loc[single_curve.index].to_numpy(),
+                                  single_curve["equity"].to_numpy())
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("caps", [{}, {"max_symbol_exposure": 0.3, "max_total_exposure": 0.6}])
+def test_misaligned_symbols_match_reference(seed, caps):
+    streams = misaligned_streams(seed)
+    curve, records, _ = assert_matches_reference(streams, RiskModel(0.05, 1.5, 2.0), **caps)
+    assert len(curve) > max(len(s[0]) for s in streams.values())  # a merged timeline, not one symbol's
+    assert {r["symbol"] for r in records} == set(streams)
+    assert (curve["open_positions"] >= 2).any()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_cash_never_goes_negative(seed):
+    streams = misaligned_streams(seed)
+    # Risking far more than the account makes every entry spend all the cash left.
+    curve, records, attribution = assert_matches_reference(streams, RiskModel(20.0, 1.0, 2.0), fees_bps=10)
+    assert (curve["cash"] >= 0).all()
+    assert (curve["cash"] < 1e-6 * curve["equity"]).any()
+    assert attribution["rejected_entries"].sum() > 0
+
+
+def test_exposure_caps_bind_at_entry():
+    streams = misaligned_streams(7)
+    risk = RiskModel(20.0, 1.0, 2.0)
+    curve, records, _ = assert_matches_reference(streams, risk, max_symbol_exposure=0.25, max_total_exposure=0.6)
+    notional = np.array([r["entry_price"] * r["qty"] for r in records])
+    equity_at_entry = np.array([r["equity_at_entry"] for r in records])
+    assert (notional <= 0.25 * equity_at_entry * (1 + 1e-12)).all()
+    assert np.isclose(notional, 0.25 * equity_at_entry, rtol=1e-12).sum() > len(records) // 2
+
+    # Right after the entries at one time, all open positions stay within the total cap of the
+    # equity the last of them was sized from.
+    last_equity = pd.Series(equity_at_entry, index=[r["entry_time"] for r in records]).groupby(level=0).min()
+    exposure = curve["exposure"].loc[last_equity.index]
+    assert (exposure <= 0.6 * last_equity * (1 + 1e-12)).all()
+    assert np.isclose(exposure, 0.6 * last_equity, rtol=1e-9).any()
+
+    uncapped, _, _ = bt_portfolio_long_sl_tp(streams, risk)
+    assert (uncapped["utilisation"] > 0.9).any()
+
+
+def test_waiting_symbols_count_rejected_entries_until_cash_returns():
+    index = pd.date_range("2024-01-01", periods=6, freq="h")
+    flat = pd.DataFrame({"open": 100.0, "high": 100.1, "low": 99.9, "close": 100.0}, index=index)
+    atr = pd.Series(0.5, index=index)  # SL 99.5 and TP 101 are never touched
+    no_exit = pd.Series(False, index=index)
+    streams = {
+        # All in at bar 0 (100 units at 100, no fees leave exactly 0 cash), out on bar 4's signal.
+        "AAA": (flat, pd.Series([True, False, False, False, False, False], index=index),
+                pd.Series([False, False, False, False, True, False], index=index), atr),
+        # Signals on bars 1-3 find no cash; bar 4's comes after AAA's exit and fills.
+        "BBB": (flat, pd.Series([False, True, True, True, True, True], index=index), no_exit, atr),
+    }
+    curve, records, attribution = bt_portfolio_long_sl_tp(streams, RiskModel(10.0, 1.0, 2.0), fees_bps=0,
+                                                          slippage_bps=0)
+    assert [(r["symbol"], r["entry_time"]) for r in records] == [("AAA", index[0])]
+    assert curve["cash"].tolist() == [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    assert curve["open_positions"].tolist() == [1, 1, 1, 1, 1, 1]
+    rejected = attribution.set_index("symbol")["rejected_entries"]
+    assert rejected.to_dict() == {"AAA": 0, "BBB": 3}
+    assert attribution.set_index("symbol")["open_at_end"].to_dict() == {"AAA": False, "BBB": True}
+
+
+def test_signals_still_waiting_at_the_end_count_as_rejected():
+    index = pd.date_range("2024-01-01", periods=6, freq="h")
+    flat = pd.DataFrame({"open": 100.0, "high": 100.1, "low": 99.9, "close": 100.0}, index=index)
+    atr = pd.Series(0.5, index=index)
+    no_exit = pd.Series(False, index=index)
+    streams = {
+        "AAA": (flat, pd.Series([True, False, False, False, False, False], index=index), no_exit, atr),
+        "BBB": (flat, pd.Series([False, True, False, True, True, False], index=index), no_exit, atr),
+    }
+    _, records, attribution = bt_portfolio_long_sl_tp(streams, RiskModel(10.0, 1.0, 2.0), fees_bps=0,
+                                                      slippage_bps=0)
+    assert records == []
+    assert attribution.set_index("symbol")["rejected_entries"].to_dict() == {"AAA": 0, "BBB": 3}
@@ -0,0 +1,106 @@
+import copy
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.indicators.features import compute_features, extend_features
+from src.indicators.streaming import EWMState, FeatureState
+
+FEATURES_CFG = yaml.safe_load((Path(__file__).resolve().parents[1] / "config" / "settings.yaml").read_text())['features']
+
+
+def candles(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.0, n))
+    close[200:220] = close[200]  # a flat stretch: zero deltas
+    spread = rng.uniform(0.1, 2.0, n)
+    return pd.DataFrame({
+        "open": close + rng.normal(0, 0.3, n),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+    }, index=pd.date_range("2024-01-01", periods=n, freq="h"))
+
+
+def streamed(state: FeatureState, df: pd.DataFrame) -> pd.DataFrame:
+    rows = [state.update(h, l, c) for h, l, c in zip(df['high'].tolist(), df['low'].tolist(), df['close'].tolist())]
+    return pd.DataFrame(rows, index=df.index)
+
+
+def assert_same_features(got: pd.DataFrame, expected: pd.DataFrame):
+    for col in expected.columns:
+        np.testing.assert_array_equal(got[col].to_numpy(dtype=np.float64), expected[col].to_numpy(dtype=np.float64),
+                                      err_msg=col)
+
+
+def test_streaming_from_the_first_bar_matches_compute_features():
+    df = candles(1500)
+    expected = compute_features(df, FEATURES_CFG)
+    assert_same_features(streamed(FeatureState(FEATURES_CFG), df), expected)
+
+
+@pytest.mark.parametrize("warm_up", [1, 250, 1499])
+def test_streaming_after_warm_up_matches_compute_features(warm_up):
+    df = candles(1500, seed=1)
+    expected = compute_features(df, FEATURES_CFG)
+    head = compute_features(df.iloc[:warm_up], FEATURES_CFG)
+    state = FeatureState.from_row(FEATURES_CFG, head.iloc[-1], float(df['close'].iloc[warm_up - 1]))
+
+    assert_same_features(streamed(state, df.iloc[warm_up:]), expected.iloc[warm_up:])
+    pd.testing.assert_frame_equal(extend_features(head, df, FEATURES_CFG), expected, check_exact=True,
+                                  check_freq=False)
+
+
+def test_snapshot_restore_resumes_exactly():
+    df = candles(1200, seed=2)
+    expected = compute_features(df, FEATURES_CFG)
+    state = FeatureState(FEATURES_CFG)
+    first = streamed(state, df.iloc[:700])
+    snap = copy.deepcopy(state.snapshot())
+
+    # Run ahead, rewind, and replay the same bars.
+    streamed(state, df.iloc[700:900])
+    state.restore(snap)
+    replayed = streamed(state, df.iloc[700:])
+
+    # A fresh state restored from the snapshot continues the same way.
+    fresh = FeatureState(FEATURES_CFG)
+    fresh.restore(snap)
+    resumed = streamed(fresh, df.iloc[700:])
+
+    assert_same_features(pd.concat([first, replayed]), expected)
+    assert_same_features(resumed, expected.iloc[700:])
+
+
+def test_update_many_matches_update():
+    df = candles(600, seed=3)
+    one, many = FeatureState(FEATURES_CFG), FeatureState(FEATURES_CFG)
+    rows = streamed(one, df)
+    cols = many.update_many(df['high'], df['low'], df['close'])
+    assert_same_features(pd.DataFrame(cols, index=df.index), rows)
+    assert cols["st_direction"].dtype == np.int8
+    assert one.snapshot() == many.snapshot()
+
+
+@pytest.mark.parametrize("kw", [{"span": 20}, {"alpha": 1 / 14}])
+def test_ewm_state_matches_pandas_across_nan_gaps(kw):
+    rng = np.random.default_rng(4)
+    x = rng.normal(0, 1, 800)
+    x[:5] = np.nan  # leading gap
+    x[100:130] = np.nan  # long interior gap: pandas carries a decayed weight across it
+    x[rng.random(800) < 0.05] = np.nan
+    x[300:320] = 1.5  # a constant run
+    expected = pd.Series(x).ewm(adjust=False, **kw).mean().to_numpy()
+
+    state = EWMState(**kw)
+    head = state.update_many(x[:400])
+    snap = state.snapshot()
+    tail = state.update_many(x[400:])
+    np.testing.assert_array_equal(np.r_[head, tail], expected)
+
+    resumed = EWMState(**kw)
+    resumed.restore(snap)
+    np.testing.assert_array_equal(resumed.update_many(x[400:]), expected[400:])
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicators import trend
+from src.indicators.trend import _supertrend_kernel, supertrend, supertrend_bands, supertrend_with_direction
+
+
+def reference_supertrend(df: pd.DataFrame, period: int = 10, multiplier: float = 3.0):
+    """The original per-bar Series loop, kept verbatim as the behaviour to match."""
+    hl2 = (df['high'] + df['low']) / 2.0
+    tr1 = df['high'] - df['low']
+    tr2 = (df['high'] - df['close'].shift()).abs()
+    tr3 = (df['low'] - df['close'].shift()).abs()
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    atr = tr.ewm(alpha=1/period, adjust=False).mean()
+
+    upperband = hl2 + multiplier * atr
+    lowerband = hl2 - multiplier * atr
+
+    st = pd.Series(index=df.index, dtype=float)
+    direction = pd.Series(index=df.index, dtype=int)
+
+    st.iloc[0] = upperband.iloc[0]
+    direction.iloc[0] = 1
+
+    for i in range(1, len(df)):
+        if df['close'].iloc[i] > st.iloc[i-1]:
+            direction.iloc[i] = -1
+        elif df['close'].iloc[i] < st.iloc[i-1]:
+            direction.iloc[i] = 1
+        else:
+            direction.iloc[i] = direction.iloc[i-1]
+
+        if direction.iloc[i] == -1:
+            st.iloc[i] = max(lowerband.iloc[i], st.iloc[i-1])
+        else:
+            st.iloc[i] = min(upperband.iloc[i], st.iloc[i-1])
+
+    return st, direction
+
+
+def candles(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.0, n))
+    spread = rng.uniform(0.1, 2.0, n)
+    return pd.DataFrame({
+        "open": close + rng.normal(0, 0.3, n),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.uniform(1, 10, n),
+    }, index=pd.date_range("2024-01-01", periods=n, freq="h"))
+
+
+@pytest.mark.parametrize("period, multiplier", [(10, 3.0), (7, 1.0), (14, 0.5)])
+def test_matches_reference_loop(period, multiplier):
+    df = candles(2000)
+    st, direction = supertrend_with_direction(df, period, multiplier)
+    ref_st, ref_dir = reference_supertrend(df, period, multiplier)
+
+    np.testing.assert_allclose(st.to_numpy(), ref_st.to_numpy(), rtol=1e-12, atol=0)
+    np.testing.assert_array_equal(direction.to_numpy(), ref_dir.to_numpy())
+    # Narrow bands on a random walk flip the trend often; make sure the flips are exercised.
+    assert np.count_nonzero(np.diff(direction.to_numpy())) > 20
+    pd.testing.assert_series_equal(supertrend(df, period, multiplier), st)
+
+
+def test_nan_warm_up_matches_reference_loop():
+    df = candles(500, seed=1)
+    df.iloc[:15] = np.nan  # e.g. candles missing before a listing, or a warm-up gap
+    df.iloc[200:203, df.columns.get_loc("close")] = np.nan
+
+    st, direction = supertrend_with_direction(df, 10, 2.0)
+    ref_st, ref_dir = reference_supertrend(df, 10, 2.0)
+
+    assert np.isnan(st.iloc[0])
+    np.testing.assert_allclose(st.to_numpy(), ref_st.to_numpy(), rtol=1e-12, atol=0, equal_nan=True)
+    np.testing.assert_array_equal(direction.to_numpy(), ref_dir.to_numpy())
+
+
+def test_chunks_and_seed_continue_the_recurrence(monkeypatch):
+    df = candles(1000, seed=2)
+    upper, lower, _ = supertrend_bands(df, 10, 2.0)
+    close, up, lo = (s.to_numpy(dtype=np.float64) for s in (df['close'], upper, lower))
+    whole_st, whole_dir = _supertrend_kernel(close, up, lo)
+
+    monkeypatch.setattr(trend, "_KERNEL_CHUNK", 7)
+    st, direction = _supertrend_kernel(close, up, lo)
+    np.testing.assert_array_equal(st, whole_st)
+    np.testing.assert_array_equal(direction, whole_dir)
+
+    head_st, head_dir = _supertrend_kernel(close[:400], up[:400], lo[:400])
+    tail_st, tail_dir = _supertrend_kernel(close[400:], up[400:], lo[400:], seed=(head_st[-1], head_dir[-1]))
+    np.testing.assert_array_equal(np.r_[head_st, tail_st], whole_st)
+    np.testing.assert_array_equal(np.r_[head_dir, tail_dir], whole_dir)
@@ -0,0 +1,47 @@
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from src.analytics.benchmark import synthetic_candles
+from src.analytics.metrics import summary as metrics_summary
+from src.analytics.trade_report import generate_trade_log
+from src.analytics.walk_forward import OBJECTIVES, _evaluate_params, optimise_window
+from src.core.backtest_runner import StrategyInputs
+from src.indicators.volatility import atr
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "settings.yaml"
+
+
+def synthetic_inputs(n: int = 3000) -> StrategyInputs:
+    df = synthetic_candles(n)
+    rng = np.random.default_rng(3)
+
+    def score(scale: float) -> pd.Series:
+        return pd.Series(np.tanh(np.cumsum(rng.normal(0, scale, n))), index=df.index)
+
+    atr_series = atr(df, 14)
+    # Entries on bars without an ATR are rejected and left off a single run's curve.
+    atr_series[np.arange(n) % 3 == 0] = np.nan
+    return StrategyInputs(symbol="BTC/USDT", tf_entry="1m", df_low=df, total_low=score(0.3),
+                          total_high_on_low=score(0.05), total_mid_on_low=score(0.1), atr_series=atr_series)
+
+
+@pytest.mark.parametrize("buy, sell, sl_atr_mult, tp_rr", list(product([0.2, 0.5], [-0.3], [1.0, 3.0], [1.5, 4.0])))
+def test_batched_window_metrics_match_single_runs(buy, sell, sl_atr_mult, tp_rr):
+    cfg = yaml.safe_load(CONFIG.read_text())
+    cfg['intrabar'] = {'enabled': False}
+    inputs = synthetic_inputs()
+    params = {"buy": buy, "sell": sell, "sl_atr_mult": sl_atr_mult, "tp_rr": tp_rr}
+
+    best = optimise_window(cfg, inputs, {k: [v] for k, v in params.items()}, min_trades=0)
+    equity = cfg['backtest']['initial_equity']
+    curve, records = _evaluate_params(cfg, inputs, params, equity)
+    m = metrics_summary(curve, generate_trade_log(records), equity)
+
+    assert best["num_trades"] == m["num_trades"] > 0
+    for key in OBJECTIVES:
+        assert best[key] == pytest.approx(m[key], rel=1e-9, abs=1e-12)